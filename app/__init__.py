@@ -6,7 +6,10 @@ from flask_login import current_user
 from sqlalchemy.exc import SQLAlchemyError
 
 from .auth import bp as auth_bp, init_login_manager
+from .cli import init_cli
+from .instrumentation import init_instrumentation
 from .models import db
+from .repositories.event_search import init_search_text
 from .routes import bp as main_bp
 
 
@@ -22,15 +25,19 @@ def create_app(
     test_config: Optional[Mapping[str, Any] | MutableMapping[str, Any]] = None,
 ) -> Flask:
     app = Flask(__name__, instance_relative_config=False)
-    app.config.from_pyfile('config.py')
+    # config.py is deployment-local; tests bring their own settings.
+    app.config.from_pyfile('config.py', silent=test_config is not None)
 
     if test_config:
         app.config.from_mapping(test_config)
 
     db.init_app(app)
     Migrate(app, db)
+    init_search_text(db.session)
 
     init_login_manager(app)
+    init_cli(app)
+    init_instrumentation(app)
 
     app.jinja_env.globals['current_user'] = current_user
 
@@ -5,14 +5,15 @@ from flask import Blueprint, flash, redirect, url_for
 from flask.app import Flask
 from flask_login import LoginManager, current_user, logout_user
 
-from ..models import User
 from ..repositories import UserRepository, get_repository
+from ..services.user_cache import SessionUser, user_session_cache
 from .policies import user_allowed
 
 bp = Blueprint('auth', __name__, url_prefix='/auth')
 
 from . import login
 from . import register
+from . import password_setup
 
 
 def init_login_manager(app: Flask) -> None:
@@ -29,8 +30,14 @@ def init_login_manager(app: Flask) -> None:
 user_repository: UserRepository = get_repository('users')
 
 
-def load_user(user_id: Optional[int | str]) -> Optional[User]:
-    return user_repository.get_by_id(user_id) if user_id is not None else None
+def load_user(user_id: Optional[int | str]) -> Optional[SessionUser]:
+    if user_id is None:
+        return None
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    return user_session_cache.get(user_id, user_repository.get_for_session)
 
 
 @bp.route('/logout', methods=['GET'])
@@ -0,0 +1,96 @@
+import hashlib
+from datetime import timedelta
+from typing import Iterable, Optional
+
+from flask import current_app, flash, redirect, render_template, request, url_for
+from flask.typing import ResponseReturnValue
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..models import User
+from ..repositories import UserRepository, get_repository
+from ..signals import user_changed
+from . import bp
+
+DEFAULT_LINK_MAX_AGE_HOURS = 72
+MIN_PASSWORD_LENGTH = 8
+
+user_repository: UserRepository = get_repository('users')
+
+
+def password_setup_link_max_age() -> timedelta:
+    return timedelta(hours=int(current_app.config.get('PASSWORD_SETUP_LINK_MAX_AGE_HOURS', DEFAULT_LINK_MAX_AGE_HOURS)))
+
+
+def _serializer() -> URLSafeTimedSerializer:
+    return URLSafeTimedSerializer(current_app.secret_key, salt='password-setup')
+
+
+def _fingerprint(password_hash: str) -> str:
+    # Setting a password changes the hash, which retires every older link.
+    return hashlib.sha256(password_hash.encode()).hexdigest()[:16]
+
+
+def password_setup_token(user: User) -> str:
+    return _serializer().dumps({'e': user.email, 'h': _fingerprint(user.password_hash)})
+
+
+def password_setup_links(emails: Iterable[str]) -> dict[str, str]:
+    """Links by email that let new users choose their password.
+
+    Nothing is stored: the link is signed and dies once the password changes
+    or after ``PASSWORD_SETUP_LINK_MAX_AGE_HOURS``.
+    """
+    return {
+        user.email: url_for('auth.password_setup', token=password_setup_token(user), _external=True)
+        for user in user_repository.get_by_emails(emails)
+    }
+
+
+def load_password_setup_user(token: str) -> Optional[User]:
+    try:
+        payload = _serializer().loads(token, max_age=int(password_setup_link_max_age().total_seconds()))
+    except BadSignature:
+        return None
+    if not isinstance(payload, dict):
+        return None
+    user = user_repository.get_by_email(str(payload.get('e') or ''))
+    if user is None or _fingerprint(user.password_hash) != payload.get('h'):
+        return None
+    return user
+
+
+@bp.route('/password/<token>', methods=['GET', 'POST'])
+def password_setup(token: str) -> ResponseReturnValue:
+    user = load_password_setup_user(token)
+    if user is None:
+        flash('Ссылка для установки пароля недействительна или устарела. Обратитесь к администратору школы', 'warning')
+        return redirect(url_for('auth.login'))
+
+    if request.method == 'POST':
+        password = request.form.get('password') or ''
+        password_confirm = request.form.get('password_confirm') or ''
+        if len(password) < MIN_PASSWORD_LENGTH:
+            flash(f'Пароль должен содержать не менее {MIN_PASSWORD_LENGTH} символов', 'warning')
+        elif password != password_confirm:
+            flash('Пароли не совпадают', 'warning')
+        else:
+            user.set_password(password)
+            try:
+                user_repository.commit()
+            except SQLAlchemyError:
+                user_repository.rollback()
+                current_app.logger.exception('Failed to set password for user %s', user.user_id)
+                flash('Не удалось сохранить пароль, попробуйте ещё раз позже', 'danger')
+            else:
+                user_changed.send(user_repository, user_id=user.user_id)
+                flash('Пароль установлен. Теперь вы можете войти', 'success')
+                return redirect(url_for('auth.login'))
+
+    return render_template(
+        'auth/password/setup.html',
+        page_title='Установка пароля',
+        form_heading='Установка пароля',
+        form_subheading=user.email,
+        token=token,
+    )
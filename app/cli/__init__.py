@@ -0,0 +1,20 @@
+from flask import Flask
+
+from .import_jobs import import_jobs_cli
+from .perf import perf_cli
+from .seed import seed_cli
+from .slots import slots_cli
+from .statuses import statuses_cli
+from .users import users_cli
+
+
+def init_cli(app: Flask) -> None:
+    app.cli.add_command(import_jobs_cli)
+    app.cli.add_command(perf_cli)
+    app.cli.add_command(seed_cli)
+    app.cli.add_command(slots_cli)
+    app.cli.add_command(statuses_cli)
+    app.cli.add_command(users_cli)
+
+
+__all__ = ['init_cli']
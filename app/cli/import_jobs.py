@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from ..services.import_jobs import ImportJobRunner
+
+import_jobs_cli = AppGroup('import-jobs', help='Background teacher imports.')
+
+
+@import_jobs_cli.command('run')
+@click.option('--poll-interval', default=5, show_default=True, help='Seconds between queue checks.')
+@click.option('--once', is_flag=True, help='Run the queued jobs and exit.')
+def run_worker(poll_interval: int, once: bool) -> None:
+    """Process queued teacher imports.
+
+    Run this as a separate worker and set IMPORT_JOBS_RUN_IN_PROCESS to False
+    so that web processes only enqueue jobs.
+    """
+    runner = ImportJobRunner(poll_interval=timedelta(seconds=poll_interval))
+    if once:
+        processed = runner.run_pending()
+        click.echo(f'Processed jobs: {processed}')
+        return
+    click.echo('Import worker started, press Ctrl+C to stop')
+    try:
+        runner.run_forever(current_app._get_current_object())
+    except KeyboardInterrupt:
+        click.echo('Stopped')
+
+
+__all__ = ['import_jobs_cli']
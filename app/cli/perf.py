@@ -0,0 +1,349 @@
+import json
+import math
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Iterator, Optional, Sequence
+from urllib.parse import urlencode
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import event as sa_event
+from sqlalchemy import select
+
+from ..instrumentation import NPlusOneFinding
+from ..models import Building, ImportJob, db
+from ..query_plans import captured_selects, explain_probes, full_scans
+from ..repositories import EventRepository, UserRepository, get_repository
+from ..routes.parent.routes import GRID_JSON_BUDGET_BYTES
+from ..services import user_session_cache
+from ..signals import n_plus_one_detected
+
+perf_cli = AppGroup('perf', help='Performance checks.')
+
+# The pages each role lands on most; every check walks these.
+ROLE_ROUTES: dict[str, tuple[str, ...]] = {
+    'admin': ('/', '/events', '/teachers', '/buildings', '/account'),
+    'teacher': ('/teacher/events', '/teacher/consultations', '/account'),
+    'parent': ('/parent/events', '/parent/bookings', '/account'),
+}
+
+
+class StatementLog:
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self.statements)
+
+    def record(self, _conn: Any, _cursor: Any, statement: str, *_args: Any) -> None:
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_statements() -> Iterator[StatementLog]:
+    log = StatementLog()
+    engine = db.engine
+    sa_event.listen(engine, 'before_cursor_execute', log.record)
+    try:
+        yield log
+    finally:
+        sa_event.remove(engine, 'before_cursor_execute', log.record)
+
+
+def logged_in_client(user_id: int):
+    client = current_app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    return client
+
+
+def get_isolated(client, route: str):
+    # CLI commands run inside an app context that test requests would
+    # share, together with its ``g`` and the logged-in user cached there.
+    with current_app.app_context():
+        return client.get(route)
+
+
+def _resolve_user(email: str):
+    user_repository: UserRepository = get_repository('users')
+    user = user_repository.get_by_email(email)
+    if user is None:
+        raise click.ClickException(f'User {email} not found')
+    if user.role not in ROLE_ROUTES:
+        raise click.ClickException(f'No routes to check for role "{user.role}"')
+    return user
+
+
+@perf_cli.command('query-counts')
+@click.option('--email', 'emails', multiple=True, required=True, help='User to check as; repeat for several roles.')
+@click.option('--max-queries', type=int, default=None, help='Fail if a warm request issues more statements.')
+def query_counts(emails: tuple[str, ...], max_queries: Optional[int]) -> None:
+    """Count SQL statements per request for the main pages of each user.
+
+    "cold" is the first request with an empty session user cache, "warm" a
+    repeat of it. Exits with status 1 when --max-queries is exceeded.
+    """
+    failures: list[str] = []
+    click.echo(f'{"role":<8} {"route":<24} {"status":>6} {"cold":>5} {"warm":>5}')
+    for email in emails:
+        user = _resolve_user(email)
+        role, user_id = user.role, user.user_id
+        client = logged_in_client(user_id)
+        for route in ROLE_ROUTES[role]:
+            user_session_cache.invalidate(user_id)
+            with count_statements() as cold:
+                get_isolated(client, route)
+            with count_statements() as warm:
+                response = get_isolated(client, route)
+            click.echo(f'{role:<8} {route:<24} {response.status_code:>6} {len(cold):>5} {len(warm):>5}')
+            if max_queries is not None and len(warm) > max_queries:
+                failures.append(f'{role} {route}: {len(warm)} statements')
+
+    if failures:
+        click.echo(f'Over the budget of {max_queries} statements:', err=True)
+        for failure in failures:
+            click.echo(f'  {failure}', err=True)
+        raise SystemExit(1)
+
+
+def crawlable_routes() -> list[str]:
+    """GET pages of the main blueprint that take no URL arguments."""
+    return sorted(
+        rule.rule
+        for rule in current_app.url_map.iter_rules()
+        if rule.endpoint.startswith('main.') and 'GET' in rule.methods and not rule.arguments
+    )
+
+
+def parameterised_routes(user) -> list[str]:
+    """Pages of USER's role that take arguments, filled in from the school's data.
+
+    The cursor is taken after the first event, so the next-page path runs
+    whatever the page size.
+    """
+    event_repository: EventRepository = get_repository('events')
+    user_repository: UserRepository = get_repository('users')
+    school_id = user.school_id
+    routes: list[str] = []
+
+    def with_args(route: str, **args: Any) -> str:
+        return f'{route}?{urlencode(args)}'
+
+    if user.role == 'admin':
+        page = event_repository.get_for_school(school_id, limit=1)
+        if page.events:
+            routes.append(with_args('/events', q=page.events[0].name.split()[0]))
+        if page.next_cursor:
+            routes.append(with_args('/events', cursor=page.next_cursor))
+        teachers = user_repository.get_teachers_for_school(school_id)
+        if teachers:
+            routes.append(with_args('/', q=teachers[0].last_name))
+            routes.append(with_args('/teachers', q=teachers[0].last_name))
+        building_name = db.session.execute(
+            select(Building.name).where(Building.school_id == school_id).limit(1)
+        ).scalar()
+        if building_name:
+            routes.append(with_args('/buildings', q=building_name))
+        job_id = db.session.execute(
+            select(ImportJob.job_id).where(ImportJob.school_id == school_id).order_by(ImportJob.job_id.desc()).limit(1)
+        ).scalar()
+        if job_id is not None:
+            routes.append(f'/teachers/import/{job_id}')
+    elif user.role == 'teacher':
+        page = event_repository.get_for_teacher(user.user_id, limit=1)
+        if page.events:
+            routes.append(with_args('/teacher/events', q=page.events[0].name.split()[0]))
+        if page.next_cursor:
+            routes.append(with_args('/teacher/events', cursor=page.next_cursor))
+            routes.append(with_args('/teacher/consultations', cursor=page.next_cursor))
+    return routes
+
+
+@perf_cli.command('n-plus-one')
+@click.option('--email', 'emails', multiple=True, required=True, help='User to crawl as; repeat for several roles.')
+@click.option('--threshold', type=int, default=None, help='Parameter sets of one statement that count as N+1.')
+def n_plus_one(emails: tuple[str, ...], threshold: Optional[int]) -> None:
+    """Crawl the main GET pages as each user and report N+1 query patterns.
+
+    Besides pages without arguments, this visits the user's search and
+    next-page variants (see parameterised_routes).
+
+    Exits with status 1 if any page repeats one query for THRESHOLD or more
+    parameter sets.
+    """
+    config = current_app.config
+    saved = {key: config.get(key) for key in ('N_PLUS_ONE_DETECTION', 'N_PLUS_ONE_RAISE', 'N_PLUS_ONE_THRESHOLD')}
+    config.update(N_PLUS_ONE_DETECTION=True, N_PLUS_ONE_RAISE=False)
+    if threshold is not None:
+        config['N_PLUS_ONE_THRESHOLD'] = threshold
+
+    reports: list[tuple[str, str, list[NPlusOneFinding]]] = []
+    current_role = ''
+
+    def collect(_sender: Any, *, endpoint: str, findings: list[NPlusOneFinding], **_kwargs: Any) -> None:
+        reports.append((current_role, endpoint, findings))
+
+    routes = crawlable_routes()
+    try:
+        with n_plus_one_detected.connected_to(collect):
+            for email in emails:
+                user = _resolve_user(email)
+                current_role = user.role
+                client = logged_in_client(user.user_id)
+                for route in routes + parameterised_routes(user):
+                    response = get_isolated(client, route)
+                    click.echo(f'{current_role:<8} {route:<24} {response.status_code}')
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                config.pop(key, None)
+            else:
+                config[key] = value
+
+    if reports:
+        click.echo('N+1 query patterns found:', err=True)
+        for role, endpoint, findings in reports:
+            for finding in findings:
+                click.echo(f'  {role} {endpoint}: {finding}', err=True)
+        raise SystemExit(1)
+    click.echo('No N+1 query patterns found')
+
+
+@perf_cli.command('grid-size')
+@click.option('--email', required=True, help='Parent whose booking grid is fetched.')
+def grid_size(email: str) -> None:
+    """Check the JSON booking grid against its documented size budget.
+
+    The budget is set for 40 teachers x 30 slots and scaled up linearly for
+    bigger events. Exits with status 1 when it is exceeded.
+    """
+    user = _resolve_user(email)
+    if user.role != 'parent':
+        raise click.ClickException('The booking grid is only served to parents')
+    response = get_isolated(logged_in_client(user.user_id), '/parent/events/grid')
+    if response.status_code != 200:
+        raise click.ClickException(f'/parent/events/grid answered {response.status_code}')
+
+    grid = response.get_json()
+    teachers = len(grid['teachers'])
+    cells = teachers * grid.get('slot_count', 0)
+    budget = int(GRID_JSON_BUDGET_BYTES * max(1.0, cells / (40 * 30)))
+    size = len(response.get_data())
+    click.echo(f'{teachers} teachers x {grid.get("slot_count", 0)} slots: {size} bytes (budget {budget})')
+    if size > budget:
+        raise SystemExit(1)
+
+
+@perf_cli.command('explain')
+@click.option('--school-id', type=int, required=True, help='School whose data the queries run against.')
+def explain(school_id: int) -> None:
+    """EXPLAIN the hot repository queries and report full table scans.
+
+    Runs on SQLite and MySQL. Planners may prefer scanning tiny tables, so
+    point it at realistic data (see 'flask seed school'). Exits with status
+    1 if a query reads slots, events or users in full.
+    """
+    try:
+        probes = explain_probes(school_id)
+    except LookupError as exc:
+        raise click.ClickException(str(exc)) from exc
+
+    failures: list[str] = []
+    for label, tables, probe in probes:
+        scanned = sorted({
+            table
+            for statement, parameters in captured_selects(probe)
+            for table in full_scans(statement, parameters, tables)
+        })
+        click.echo(f'{label:<48} {", ".join(scanned) if scanned else "ok"}')
+        if scanned:
+            failures.append(f'{label}: {", ".join(scanned)}')
+
+    if failures:
+        click.echo('Full table scans:', err=True)
+        for failure in failures:
+            click.echo(f'  {failure}', err=True)
+        raise SystemExit(1)
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of VALUES."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+@perf_cli.command('benchmark')
+@click.option('--email', 'emails', multiple=True, required=True, help='User to benchmark as; repeat for several roles.')
+@click.option('--iterations', default=30, show_default=True, help='Measured requests per page.')
+@click.option('--warmup', default=2, show_default=True, help='Unmeasured requests per page first.')
+@click.option('--output', type=click.Path(dir_okay=False, writable=True), default='benchmark.json', show_default=True)
+def benchmark(emails: tuple[str, ...], iterations: int, warmup: int, output: str) -> None:
+    """Time the main pages of each user through the test client.
+
+    Writes p50/p95/p99 latency and SQL statement counts per page to OUTPUT
+    as JSON, so runs before and after a change can be compared. Pair with
+    'flask seed school' for realistic data volumes.
+    """
+    results: list[dict[str, Any]] = []
+    click.echo(f'{"role":<8} {"route":<24} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"queries":>8}')
+    for email in emails:
+        user = _resolve_user(email)
+        role = user.role
+        client = logged_in_client(user.user_id)
+        for route in ROLE_ROUTES[role]:
+            for _ in range(warmup):
+                get_isolated(client, route)
+
+            latencies: list[float] = []
+            statement_counts: list[int] = []
+            statuses: set[int] = set()
+            for _ in range(iterations):
+                with count_statements() as statements:
+                    started = time.perf_counter()
+                    response = get_isolated(client, route)
+                    latencies.append((time.perf_counter() - started) * 1000)
+                statement_counts.append(len(statements))
+                statuses.add(response.status_code)
+
+            result = {
+                'role': role,
+                'route': route,
+                'statuses': sorted(statuses),
+                'iterations': iterations,
+                'p50_ms': round(percentile(latencies, 50), 2),
+                'p95_ms': round(percentile(latencies, 95), 2),
+                'p99_ms': round(percentile(latencies, 99), 2),
+                'mean_ms': round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+                'queries_min': min(statement_counts, default=0),
+                'queries_max': max(statement_counts, default=0),
+            }
+            results.append(result)
+            click.echo(
+                f'{role:<8} {route:<24} {result["p50_ms"]:>8.1f} {result["p95_ms"]:>8.1f} '
+                f'{result["p99_ms"]:>8.1f} {result["queries_max"]:>8}'
+            )
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'database': db.engine.dialect.name,
+        'results': results,
+    }
+    with open(output, 'w', encoding='utf-8') as target:
+        json.dump(report, target, ensure_ascii=False, indent=2)
+    click.echo(f'Wrote {output}')
+
+
+__all__ = [
+    'count_statements',
+    'crawlable_routes',
+    'get_isolated',
+    'logged_in_client',
+    'percentile',
+    'perf_cli',
+]
@@ -0,0 +1,180 @@
+import random
+from datetime import datetime, time, timedelta
+from typing import Optional
+from uuid import uuid4
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import insert
+
+from ..models import Building, BuildingBooking, Event, Slot, SlotStatus, db, event_teachers_table
+from ..repositories import (
+    EventRepository,
+    NewUser,
+    SchoolRepository,
+    UserRepository,
+    get_repository,
+)
+from ..repositories.event_search import rebuild_search_text
+from ..services import hash_passwords
+
+seed_cli = AppGroup('seed', help='Synthetic data for benchmarks.')
+
+FIRST_NAMES = ('Анна', 'Иван', 'Мария', 'Пётр', 'Елена', 'Алексей', 'Ольга', 'Дмитрий', 'Наталья', 'Сергей')
+LAST_NAMES = ('Иванова', 'Петров', 'Смирнова', 'Кузнецов', 'Попова', 'Соколов', 'Лебедева', 'Козлов')
+MIDDLE_NAMES = ('Ивановна', 'Петрович', 'Сергеевна', 'Алексеевич', None)
+INSERT_BATCH_SIZE = 1000
+
+
+def _new_users(prefix: str, kind: str, count: int, password: str, rng: random.Random) -> list[NewUser]:
+    return [
+        NewUser(
+            email=f'{prefix}-{kind}-{index}@example.invalid',
+            password_hash=password_hash,
+            first_name=rng.choice(FIRST_NAMES),
+            last_name=rng.choice(LAST_NAMES),
+            middle_name=rng.choice(MIDDLE_NAMES),
+        )
+        for index, password_hash in enumerate(hash_passwords([password] * count))
+    ]
+
+
+def _insert_rows(table, rows: list[dict]) -> None:
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        batch = rows[start:start + INSERT_BATCH_SIZE]
+        if batch:
+            db.session.execute(insert(table).values(batch))
+
+
+@seed_cli.command('school')
+@click.option('--buildings', default=3, show_default=True)
+@click.option('--teachers', default=40, show_default=True)
+@click.option('--parents', default=300, show_default=True)
+@click.option('--events', default=20, show_default=True)
+@click.option('--teachers-per-event', default=30, show_default=True)
+@click.option('--slots-per-event', default=30, show_default=True, help='Consultations per teacher and event.')
+@click.option('--slot-minutes', default=10, show_default=True)
+@click.option('--fill-rate', default=0.5, show_default=True, type=click.FloatRange(0, 1))
+@click.option('--password', default='benchmark', show_default=True, help='Password of every generated user.')
+@click.option('--random-seed', type=int, default=None, help='Makes names, links and bookings reproducible.')
+def seed_school(
+    buildings: int,
+    teachers: int,
+    parents: int,
+    events: int,
+    teachers_per_event: int,
+    slots_per_event: int,
+    slot_minutes: int,
+    fill_rate: float,
+    password: str,
+    random_seed: Optional[int],
+) -> None:
+    """Create a school with synthetic buildings, users, events and bookings.
+
+    Events are spread one per day around today, so the school has past,
+    current and upcoming events. FILL_RATE is the share of consultation
+    slots booked by a random parent without overlapping their bookings.
+    """
+    rng = random.Random(random_seed)
+    school_repository: SchoolRepository = get_repository('schools')
+    user_repository: UserRepository = get_repository('users')
+    event_repository: EventRepository = get_repository('events')
+
+    prefix = f'seed-{uuid4().hex[:8]}'
+    school = school_repository.create(f'Школа {prefix}')
+    school_id = school.school_id
+
+    click.echo('Creating users...')
+    admin_ids = user_repository.create_many(
+        _new_users(prefix, 'admin', 1, password, rng), role='admin', school_id=school_id
+    )
+    teacher_ids = list(user_repository.create_many(
+        _new_users(prefix, 'teacher', teachers, password, rng), role='teacher', school_id=school_id
+    ).values())
+    parent_ids = list(user_repository.create_many(
+        _new_users(prefix, 'parent', parents, password, rng), role='parent', school_id=school_id
+    ).values())
+
+    building_objects = [
+        Building(name=f'Корпус {index + 1}', address=f'ул. Школьная, {index + 1}', school_id=school_id)
+        for index in range(buildings)
+    ]
+    db.session.add_all(building_objects)
+    db.session.flush()
+    building_ids = [building.building_id for building in building_objects]
+
+    click.echo('Creating events...')
+    today = datetime.combine(datetime.now().date(), time(17, 0))
+    event_objects = []
+    for index in range(events):
+        start_time = today + timedelta(days=index - events // 2)
+        event_objects.append(Event(
+            name=f'Консультации #{index + 1}',
+            start_time=start_time,
+            end_time=start_time + timedelta(minutes=slots_per_event * slot_minutes),
+            consultations_count=slots_per_event,
+            consultation_duration_minutes=slot_minutes,
+            school_id=school_id,
+        ))
+    db.session.add_all(event_objects)
+    db.session.flush()
+
+    link_rows: list[dict] = []
+    booking_rows: list[dict] = []
+    slot_rows: list[dict] = []
+    for event in event_objects:
+        event_teacher_ids = rng.sample(teacher_ids, min(teachers_per_event, len(teacher_ids)))
+        busy_parents: dict[int, set[int]] = {}
+        for teacher_id in event_teacher_ids:
+            link_rows.append({'event_id': event.event_id, 'teacher_id': teacher_id})
+            if building_ids:
+                booking_rows.append({
+                    'event_id': event.event_id,
+                    'teacher_id': teacher_id,
+                    'building_id': rng.choice(building_ids),
+                    'classroom': str(rng.randint(100, 450)),
+                })
+            if not parent_ids:
+                continue
+            for slot_index in range(slots_per_event):
+                if rng.random() >= fill_rate:
+                    continue
+                taken = busy_parents.setdefault(slot_index, set())
+                if len(taken) >= len(parent_ids):
+                    continue
+                parent_id = rng.choice(parent_ids)
+                while parent_id in taken:
+                    parent_id = rng.choice(parent_ids)
+                taken.add(parent_id)
+                slot_start = event.start_time + timedelta(minutes=slot_index * slot_minutes)
+                slot_rows.append({
+                    'event_id': event.event_id,
+                    'teacher_id': teacher_id,
+                    'parent_id': parent_id,
+                    'start_time': slot_start,
+                    'end_time': slot_start + timedelta(minutes=slot_minutes),
+                    'status': SlotStatus.booked,
+                })
+
+    click.echo('Creating links and bookings...')
+    _insert_rows(event_teachers_table, link_rows)
+    _insert_rows(BuildingBooking.__table__, booking_rows)
+    _insert_rows(Slot.__table__, slot_rows)
+    # Core inserts bypass the flush hooks that maintain search_text.
+    rebuild_search_text(db.session.connection(), [event.event_id for event in event_objects])
+    db.session.commit()
+    event_repository.refresh_statuses_for_school(school_id)
+
+    click.echo(
+        f'School {school_id}: {buildings} buildings, {len(teacher_ids)} teachers, {len(parent_ids)} parents, '
+        f'{events} events, {len(slot_rows)} booked slots'
+    )
+    click.echo(f'Password for all users: {password}')
+    click.echo(f'Admin:   {next(iter(admin_ids))}')
+    if teacher_ids:
+        click.echo(f'Teacher: {prefix}-teacher-0@example.invalid')
+    if parent_ids:
+        click.echo(f'Parent:  {prefix}-parent-0@example.invalid')
+
+
+__all__ = ['seed_cli']
@@ -0,0 +1,379 @@
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import func, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..models import Event, Parent, Slot, db
+from ..repositories import EventRepository, SlotRepository, get_repository
+from .perf import logged_in_client, percentile
+
+slots_cli = AppGroup('slots', help='Consultation slot checks.')
+
+
+def _resolve_event(event_id: Optional[int]) -> Optional[Event]:
+    if event_id is not None:
+        return db.session.get(Event, event_id)
+    stmt = (
+        select(Event)
+        .where(Event.start_time > datetime.now(), Event.consultations_count > 0)
+        .order_by(Event.start_time.asc())
+        .limit(1)
+    )
+    return db.session.execute(stmt).scalar_one_or_none()
+
+
+def _free_cells(event: Event) -> list[tuple[int, datetime, datetime]]:
+    duration = timedelta(minutes=event.consultation_duration_minutes or 0)
+    taken = set(
+        db.session.execute(
+            select(Slot.teacher_id, Slot.start_time).where(Slot.event_id == event.event_id)
+        ).tuples()
+    )
+    cells: list[tuple[int, datetime, datetime]] = []
+    for teacher in event.teachers:
+        for index in range(event.consultations_count or 0):
+            slot_start = event.start_time + duration * index
+            if (teacher.teacher_id, slot_start) not in taken:
+                cells.append((teacher.teacher_id, slot_start, slot_start + duration))
+    return cells
+
+
+@slots_cli.command('stress-booking')
+@click.option('--workers', default=50, show_default=True, help='Concurrent bookings per slot.')
+@click.option('--rounds', default=5, show_default=True, help='Number of free slots to race for.')
+@click.option('--event-id', type=int, default=None, help='Event to use, defaults to the next upcoming one.')
+@click.option('--keep', is_flag=True, help='Keep the winning bookings instead of removing them.')
+def stress_booking(workers: int, rounds: int, event_id: Optional[int], keep: bool) -> None:
+    """Race concurrent bookings for the same slot and check that exactly one wins."""
+    app = current_app._get_current_object()
+    slot_repository: SlotRepository = get_repository('slots')
+
+    event = _resolve_event(event_id)
+    if event is None:
+        raise click.ClickException('No upcoming event with consultations found')
+
+    parent_ids = list(
+        db.session.execute(select(Parent.parent_id).where(Parent.school_id == event.school_id)).scalars()
+    )
+    if not parent_ids:
+        raise click.ClickException('The event school has no parents to book with')
+
+    cells = _free_cells(event)[:rounds]
+    if not cells:
+        raise click.ClickException('The event has no free slots left')
+    db.session.rollback()
+
+    totals: Counter[str] = Counter()
+    double_bookings = 0
+    winners: list[int] = []
+
+    for teacher_id, slot_start, slot_end in cells:
+        barrier = threading.Barrier(workers)
+        outcomes: list[str] = []
+        lock = threading.Lock()
+
+        def attempt(worker_index: int) -> None:
+            with app.app_context():
+                barrier.wait()
+                try:
+                    booking = slot_repository.try_book(
+                        event_id=event.event_id,
+                        teacher_id=teacher_id,
+                        parent_id=parent_ids[worker_index % len(parent_ids)],
+                        start_time=slot_start,
+                        end_time=slot_end,
+                    )
+                    outcome = 'booked' if booking.ok else 'taken'
+                except SQLAlchemyError:
+                    slot_repository.rollback()
+                    outcome = 'error'
+                with lock:
+                    outcomes.append(outcome)
+
+        threads = [threading.Thread(target=attempt, args=(index,)) for index in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stored = db.session.execute(
+            select(Slot.slot_id).where(
+                Slot.event_id == event.event_id,
+                Slot.teacher_id == teacher_id,
+                Slot.start_time == slot_start,
+            )
+        ).scalars().all()
+        db.session.rollback()
+
+        counts = Counter(outcomes)
+        totals.update(counts)
+        winners.extend(stored)
+        if len(stored) > 1 or counts['booked'] > 1:
+            double_bookings += 1
+
+        click.echo(
+            f"teacher {teacher_id} @ {slot_start:%H:%M}: "
+            f"booked={counts['booked']} taken={counts['taken']} errors={counts['error']} rows={len(stored)}"
+        )
+
+    if not keep and winners:
+        db.session.execute(Slot.__table__.delete().where(Slot.slot_id.in_(winners)))
+        db.session.commit()
+
+    remaining = db.session.execute(
+        select(func.count())
+        .select_from(Slot)
+        .where(Slot.event_id == event.event_id)
+        .group_by(Slot.teacher_id, Slot.start_time)
+        .having(func.count() > 1)
+    ).all()
+
+    click.echo(
+        f"Rounds: {len(cells)}, workers: {workers}, booked: {totals['booked']}, "
+        f"taken: {totals['taken']}, errors: {totals['error']}, double bookings: {double_bookings + len(remaining)}"
+    )
+    if double_bookings or remaining:
+        raise SystemExit(1)
+
+
+SLOT_FORM_PATTERN = re.compile(
+    r'data-slot-state="(?P<state>\w+)".*?'
+    r'name="teacher_id" value="(?P<teacher_id>\d+)".*?'
+    r'name="slot_index" value="(?P<slot_index>\d+)".*?'
+    r'name="slot_id" value="(?P<slot_id>\d*)"',
+    re.S,
+)
+
+Cell = tuple[int, int]
+
+
+def parse_parent_grid(html: str) -> dict[Cell, tuple[str, Optional[int]]]:
+    """Read (teacher_id, slot_index) -> (state, slot_id) from the parent events page."""
+    return {
+        (int(match['teacher_id']), int(match['slot_index'])): (match['state'], int(match['slot_id']) if match['slot_id'] else None)
+        for match in SLOT_FORM_PATTERN.finditer(html)
+    }
+
+
+class RushStats:
+    def __init__(self) -> None:
+        self.latencies: defaultdict[str, list[float]] = defaultdict(list)
+        self.outcomes: Counter[str] = Counter()
+        self.held: dict[Cell, int] = {}
+        self.released: set[tuple[Cell, int]] = set()
+        self._lock = threading.Lock()
+
+    def timed(self, kind: str, request) -> Any:
+        started = time.perf_counter()
+        response = request()
+        elapsed = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.latencies[kind].append(elapsed)
+            if response.status_code >= 500:
+                self.outcomes['server_error'] += 1
+        return response
+
+    def count(self, outcome: str) -> None:
+        with self._lock:
+            self.outcomes[outcome] += 1
+
+    def settle(self, parent_id: int, held: dict[Cell, int], released: set[Cell]) -> None:
+        with self._lock:
+            for cell in held:
+                self.held[cell] = parent_id
+            self.released.update((cell, parent_id) for cell in released if cell not in held)
+
+
+@slots_cli.command('booking-rush')
+@click.option('--school-id', type=int, required=True, help='School whose parents and closest event are used.')
+@click.option('--clients', default=50, show_default=True, help='Concurrent parents.')
+@click.option('--actions', default=5, show_default=True, help='Book or cancel attempts per parent.')
+@click.option('--cancel-rate', default=0.2, show_default=True, type=click.FloatRange(0, 1))
+@click.option('--think-min', default=0.2, show_default=True, help='Seconds between a parent\'s actions, lower bound.')
+@click.option('--think-max', default=1.5, show_default=True, help='Seconds between a parent\'s actions, upper bound.')
+@click.option('--password', default=None, help='Log in through /auth/login with this password instead of a prepared session.')
+@click.option('--random-seed', type=int, default=None)
+@click.option('--output', type=click.Path(dir_okay=False, writable=True), default=None, help='Also write the report as JSON.')
+@click.option('--keep', is_flag=True, help='Keep the bookings made during the run.')
+def booking_rush(
+    school_id: int,
+    clients: int,
+    actions: int,
+    cancel_rate: float,
+    think_min: float,
+    think_max: float,
+    password: Optional[str],
+    random_seed: Optional[int],
+    output: Optional[str],
+    keep: bool,
+) -> None:
+    """Simulate parents rushing the booking grid when the invite goes out.
+
+    Each client loads /parent/events, picks a free slot (or cancels one of
+    its own), POSTs the form like the page does and reloads the grid to see
+    whether it won. Afterwards the database is checked for double bookings
+    and lost updates: slots a client saw as its own that are not, or
+    cancelled slots that are still held.
+    """
+    app = current_app._get_current_object()
+    event_repository: EventRepository = get_repository('events')
+    event_repository.refresh_statuses_for_school(school_id)
+    event = event_repository.get_closest_for_school(school_id, include_past=False)
+    if event is None or not event.consultations_count:
+        raise click.ClickException('The school has no upcoming event with consultations')
+    event_id, event_start = event.event_id, event.start_time
+    duration = timedelta(minutes=event.consultation_duration_minutes or 0)
+
+    parents = db.session.execute(
+        select(Parent.parent_id, Parent.email).where(Parent.school_id == school_id).order_by(Parent.parent_id).limit(clients)
+    ).all()
+    if not parents:
+        raise click.ClickException('The school has no parents')
+    if len(parents) < clients:
+        click.echo(f'Only {len(parents)} parents in the school, running with that many clients')
+    existing_slot_ids = set(db.session.execute(select(Slot.slot_id).where(Slot.event_id == event_id)).scalars())
+    db.session.rollback()
+
+    stats = RushStats()
+    seed = random_seed if random_seed is not None else random.randrange(1 << 30)
+    test_clients = [logged_in_client(parent_id) if password is None else app.test_client() for parent_id, _ in parents]
+
+    def run_client(index: int) -> None:
+        rng = random.Random(seed + index)
+        parent_id, email = parents[index]
+        client = test_clients[index]
+        held: dict[Cell, int] = {}
+        released: set[Cell] = set()
+
+        def load_grid() -> dict[Cell, tuple[str, Optional[int]]]:
+            response = stats.timed('grid', lambda: client.get('/parent/events'))
+            return parse_parent_grid(response.get_data(as_text=True)) if response.status_code == 200 else {}
+
+        if password is not None:
+            stats.timed('login', lambda: client.post('/auth/login', data={'email': email, 'password': password}))
+
+        grid = load_grid()
+        for _ in range(actions):
+            time.sleep(rng.uniform(think_min, think_max))
+            if held and rng.random() < cancel_rate:
+                cell = rng.choice(sorted(held))
+                form = {'action': 'cancel', 'slot_id': held[cell], 'teacher_id': cell[0], 'slot_index': cell[1]}
+                stats.timed('cancel', lambda: client.post('/parent/events', data=form))
+                grid = load_grid()
+                if grid.get(cell, ('', None))[0] == 'mine':
+                    stats.count('cancel_failed')
+                else:
+                    stats.count('cancelled')
+                    held.pop(cell)
+                    released.add(cell)
+                continue
+
+            free = [cell for cell, (state, _) in grid.items() if state == 'available']
+            if not free:
+                stats.count('sold_out')
+                grid = load_grid()
+                continue
+            cell = rng.choice(free)
+            form = {'action': 'book', 'teacher_id': cell[0], 'slot_index': cell[1]}
+            stats.timed('book', lambda: client.post('/parent/events', data=form))
+            grid = load_grid()
+            state, slot_id = grid.get(cell, ('', None))
+            if state == 'mine' and slot_id is not None:
+                stats.count('booked')
+                held[cell] = slot_id
+                released.discard(cell)
+            else:
+                stats.count('conflict')
+
+        stats.settle(parent_id, held, released)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=run_client, args=(index,)) for index in range(len(parents))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    rows = db.session.execute(
+        select(Slot.slot_id, Slot.teacher_id, Slot.start_time, Slot.parent_id).where(Slot.event_id == event_id)
+    ).all()
+    owners: defaultdict[tuple[int, datetime], list[int]] = defaultdict(list)
+    for _, teacher_id, start_time, parent_id in rows:
+        owners[(teacher_id, start_time)].append(parent_id)
+
+    def cell_owners(cell: Cell) -> list[int]:
+        return owners.get((cell[0], event_start + duration * cell[1]), [])
+
+    double_bookings = sum(1 for parent_ids in owners.values() if len(parent_ids) > 1)
+    lost_bookings = sum(1 for cell, parent_id in stats.held.items() if parent_id not in cell_owners(cell))
+    lost_cancels = sum(1 for cell, parent_id in stats.released if parent_id in cell_owners(cell))
+    parent_times = Counter((parent_id, start_time) for _, _, start_time, parent_id in rows)
+    parent_overlaps = sum(1 for count in parent_times.values() if count > 1)
+
+    if not keep:
+        new_slot_ids = [slot_id for slot_id, *_ in rows if slot_id not in existing_slot_ids]
+        if new_slot_ids:
+            db.session.execute(Slot.__table__.delete().where(Slot.slot_id.in_(new_slot_ids)))
+            db.session.commit()
+
+    outcomes = stats.outcomes
+    attempts = outcomes['booked'] + outcomes['conflict']
+    total_requests = sum(len(values) for values in stats.latencies.values())
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'database': db.engine.dialect.name,
+        'event_id': event_id,
+        'clients': len(parents),
+        'seconds': round(elapsed, 2),
+        'requests': total_requests,
+        'requests_per_second': round(total_requests / elapsed, 2) if elapsed else 0.0,
+        'bookings_per_second': round(outcomes['booked'] / elapsed, 2) if elapsed else 0.0,
+        'conflict_rate': round(outcomes['conflict'] / attempts, 4) if attempts else 0.0,
+        'outcomes': dict(outcomes),
+        'latency_ms': {
+            kind: {
+                'count': len(values),
+                'p50': round(percentile(values, 50), 2),
+                'p95': round(percentile(values, 95), 2),
+                'p99': round(percentile(values, 99), 2),
+            }
+            for kind, values in sorted(stats.latencies.items())
+        },
+        'double_bookings': double_bookings,
+        'lost_updates': lost_bookings + lost_cancels,
+        'parent_overlaps': parent_overlaps,
+    }
+
+    click.echo(
+        f"{report['clients']} clients, {total_requests} requests in {report['seconds']}s "
+        f"({report['requests_per_second']} req/s, {report['bookings_per_second']} bookings/s)"
+    )
+    click.echo(
+        f"booked={outcomes['booked']} conflicts={outcomes['conflict']} (rate {report['conflict_rate']:.1%}) "
+        f"cancelled={outcomes['cancelled']} sold_out={outcomes['sold_out']} server_errors={outcomes['server_error']}"
+    )
+    for kind, values in report['latency_ms'].items():
+        click.echo(f"  {kind:<7} n={values['count']:<6} p50={values['p50']:.1f}ms p95={values['p95']:.1f}ms p99={values['p99']:.1f}ms")
+    click.echo(
+        f"double bookings: {double_bookings}, lost updates: {report['lost_updates']}, "
+        f"parents booked twice at one time: {parent_overlaps}"
+    )
+    if output:
+        with open(output, 'w', encoding='utf-8') as target:
+            json.dump(report, target, ensure_ascii=False, indent=2)
+    if double_bookings or report['lost_updates']:
+        raise SystemExit(1)
+
+
+__all__ = ['slots_cli']
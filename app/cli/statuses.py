@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+import click
+from flask.cli import AppGroup
+
+from ..repositories import EventRepository, get_repository
+from ..services import StatusScheduler
+
+statuses_cli = AppGroup('event-statuses', help='Event status transitions.')
+
+
+@statuses_cli.command('run')
+@click.option('--poll-interval', default=5, show_default=True, help='Seconds between checks for edited events.')
+@click.option('--reload-interval', default=300, show_default=True, help='Seconds between full schedule reloads.')
+@click.option('--once', is_flag=True, help='Apply due transitions and exit.')
+def run_scheduler(poll_interval: int, reload_interval: int, once: bool) -> None:
+    """Move events between scheduled, ongoing and completed as time passes.
+
+    Run this next to the web workers and set EVENT_STATUS_REFRESH_ON_REQUEST
+    to False so that page loads stop writing statuses themselves.
+    """
+    event_repository: EventRepository = get_repository('events')
+    scheduler = StatusScheduler(
+        event_repository,
+        poll_interval=timedelta(seconds=poll_interval),
+        reload_interval=timedelta(seconds=reload_interval),
+    )
+    try:
+        if once:
+            changed = scheduler.run_pending()
+            click.echo(f'Updated events: {changed}')
+            return
+        click.echo('Status scheduler started, press Ctrl+C to stop')
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        click.echo('Stopped')
+    finally:
+        scheduler.close()
+
+
+__all__ = ['statuses_cli']
@@ -0,0 +1,82 @@
+import os
+import time
+from uuid import uuid4
+
+import click
+from flask.cli import AppGroup
+
+from ..models import Teacher, User, db
+from ..repositories import NewUser, UserRepository, get_repository
+from ..services import hash_passwords, shutdown_hash_pool
+
+users_cli = AppGroup('users', help='User account maintenance.')
+
+
+def _parse_worker_counts(value: str) -> list[int]:
+    try:
+        counts = sorted({int(part) for part in value.split(',') if part.strip()})
+    except ValueError as exc:
+        raise click.BadParameter('Use a comma separated list of numbers, e.g. 1,2,4') from exc
+    if not counts or counts[0] < 1:
+        raise click.BadParameter('Worker counts must be positive')
+    return counts
+
+
+@users_cli.command('benchmark-import')
+@click.option('--count', default=200, show_default=True, help='Users to create per run.')
+@click.option(
+    '--workers',
+    default=None,
+    help='Comma separated hashing pool sizes to compare, defaults to 1,2,4,... up to the CPU count.',
+)
+def benchmark_import(count: int, workers: str) -> None:
+    """Measure bulk teacher creation throughput for different hashing pool sizes.
+
+    Every run hashes COUNT passwords and inserts COUNT throwaway teachers
+    through create_many(), then deletes them again.
+    """
+    user_repository: UserRepository = get_repository('users')
+    if workers:
+        worker_counts = _parse_worker_counts(workers)
+    else:
+        cpu_count = os.cpu_count() or 1
+        worker_counts = sorted({1, cpu_count, *(2 ** power for power in range(cpu_count.bit_length()) if 2 ** power <= cpu_count)})
+
+    baseline = None
+    click.echo(f'{"workers":>8} {"seconds":>9} {"users/s":>9} {"speedup":>8}')
+    try:
+        for worker_count in worker_counts:
+            # Start the pool outside the measured section.
+            hash_passwords(['warm-up'] * (worker_count * 2), workers=worker_count)
+
+            prefix = f'bench-{uuid4().hex[:12]}'
+            passwords = [uuid4().hex for _ in range(count)]
+            started = time.perf_counter()
+            created: dict[str, int] = {}
+            try:
+                users = [
+                    NewUser(
+                        email=f'{prefix}-{index}@example.invalid',
+                        password_hash=password_hash,
+                        first_name='Бенчмарк',
+                        last_name='Импорт',
+                    )
+                    for index, password_hash in enumerate(hash_passwords(passwords, workers=worker_count))
+                ]
+                created = user_repository.create_many(users, role='teacher')
+                elapsed = time.perf_counter() - started
+            finally:
+                user_repository.rollback()
+                if created:
+                    user_ids = list(created.values())
+                    db.session.execute(Teacher.__table__.delete().where(Teacher.teacher_id.in_(user_ids)))
+                    db.session.execute(User.__table__.delete().where(User.user_id.in_(user_ids)))
+                    db.session.commit()
+
+            baseline = baseline or elapsed
+            click.echo(f'{worker_count:>8} {elapsed:>9.2f} {count / elapsed:>9.1f} {baseline / elapsed:>7.2f}x')
+    finally:
+        shutdown_hash_pool()
+
+
+__all__ = ['users_cli']
@@ -0,0 +1,287 @@
+import hmac
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from flask import (
+    Flask,
+    Response,
+    abort,
+    before_render_template,
+    current_app,
+    g,
+    has_app_context,
+    request,
+    template_rendered,
+)
+from flask_login import current_user
+from sqlalchemy import event as sa_event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from .models import Base
+from .signals import n_plus_one_detected
+
+METRIC_PREFIX = 'consult'
+DEFAULT_N_PLUS_ONE_THRESHOLD = 3
+SQL_LABEL_LENGTH = 120
+
+
+class NPlusOneError(Exception):
+    """A request ran the same query for many parameter sets."""
+
+
+@dataclass(frozen=True)
+class NPlusOneFinding:
+    label: str
+    count: int
+
+    def __str__(self) -> str:
+        return f'{self.label} ({self.count} queries)'
+
+
+@dataclass
+class QueryLog:
+    """Statements of one request grouped by SQL text, for N+1 detection."""
+
+    parameters: defaultdict[str, set[str]] = field(default_factory=lambda: defaultdict(set))
+    relationship_paths: dict[str, str] = field(default_factory=dict)
+    loading: list[str] = field(default_factory=list)
+
+    def findings(self, threshold: int) -> list[NPlusOneFinding]:
+        findings = [
+            NPlusOneFinding(
+                label=self.relationship_paths.get(statement) or ' '.join(statement.split())[:SQL_LABEL_LENGTH],
+                count=len(parameter_sets),
+            )
+            for statement, parameter_sets in self.parameters.items()
+            if len(parameter_sets) >= threshold
+        ]
+        findings.sort(key=lambda finding: -finding.count)
+        return findings
+
+
+@dataclass
+class RequestMetrics:
+    """What one request cost; summed per endpoint by MetricsRegistry."""
+
+    requests: int = 1
+    request_seconds: float = 0.0
+    db_statements: int = 0
+    db_seconds: float = 0.0
+    db_rows: int = 0
+    render_seconds: float = 0.0
+    orm_objects_loaded: int = 0
+    started_at: float = field(default_factory=time.perf_counter, repr=False)
+    render_started: list[float] = field(default_factory=list, repr=False)
+    query_log: Optional[QueryLog] = field(default=None, repr=False)
+
+
+# (metric name, field, help text)
+METRICS = (
+    ('requests_total', 'requests', 'Requests handled.'),
+    ('request_seconds_total', 'request_seconds', 'Wall time spent handling requests.'),
+    ('db_statements_total', 'db_statements', 'SQL statements executed.'),
+    ('db_seconds_total', 'db_seconds', 'Time spent executing SQL statements.'),
+    ('db_rows_total', 'db_rows', 'Rows reported by the DB-API cursor (not available on SQLite).'),
+    ('render_seconds_total', 'render_seconds', 'Time spent rendering Jinja templates.'),
+    ('orm_objects_loaded_total', 'orm_objects_loaded', 'ORM instances loaded from rows.'),
+)
+SUMMED_FIELDS = tuple(item[1] for item in METRICS)
+
+
+class MetricsRegistry:
+    """Per-process counters of RequestMetrics, labelled by endpoint."""
+
+    def __init__(self) -> None:
+        self._totals: dict[str, RequestMetrics] = {}
+        self._lock = threading.Lock()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._totals.clear()
+
+    def record(self, endpoint: str, metrics: RequestMetrics) -> None:
+        with self._lock:
+            totals = self._totals.get(endpoint)
+            if totals is None:
+                totals = self._totals[endpoint] = RequestMetrics(requests=0)
+            for name in SUMMED_FIELDS:
+                setattr(totals, name, getattr(totals, name) + getattr(metrics, name))
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            return {
+                endpoint: {name: getattr(totals, name) for name in SUMMED_FIELDS}
+                for endpoint, totals in self._totals.items()
+            }
+
+    def render_prometheus(self) -> str:
+        snapshot = self.snapshot()
+        lines: list[str] = []
+        for metric, name, help_text in METRICS:
+            full_name = f'{METRIC_PREFIX}_{metric}'
+            lines.append(f'# HELP {full_name} {help_text}')
+            lines.append(f'# TYPE {full_name} counter')
+            for endpoint in sorted(snapshot):
+                label = endpoint.replace('\\', '\\\\').replace('"', '\\"')
+                lines.append(f'{full_name}{{endpoint="{label}"}} {snapshot[endpoint][name]:g}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics_registry = MetricsRegistry()
+
+
+def current_metrics() -> Optional[RequestMetrics]:
+    if not has_app_context():
+        return None
+    return g.get('request_metrics')
+
+
+@sa_event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, _cursor, _statement, _parameters, _context, _executemany) -> None:
+    if current_metrics() is not None:
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+@sa_event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, _context, executemany) -> None:
+    metrics = current_metrics()
+    started = conn.info.get('query_started')
+    if metrics is None or not started:
+        return
+    metrics.db_statements += 1
+    metrics.db_seconds += time.perf_counter() - started.pop()
+    # Buffered MySQL cursors report the row count of a SELECT up front;
+    # sqlite3 reports -1 until the rows are fetched.
+    if cursor.rowcount and cursor.rowcount > 0:
+        metrics.db_rows += cursor.rowcount
+
+    query_log = metrics.query_log
+    if query_log is not None and not executemany:
+        query_log.parameters[statement].add(repr(parameters))
+        if query_log.loading:
+            query_log.relationship_paths.setdefault(statement, query_log.loading[-1])
+
+
+@sa_event.listens_for(Session, 'do_orm_execute')
+def _on_orm_execute(state: ORMExecuteState):
+    metrics = current_metrics()
+    if metrics is None or metrics.query_log is None or not state.is_relationship_load:
+        return None
+    # Run the load here so the statements it issues can be tagged with the
+    # relationship path, e.g. "Slot.event > Event.teachers".
+    path = ' > '.join(str(prop) for prop in state.loader_strategy_path.path[1::2])
+    metrics.query_log.loading.append(path)
+    try:
+        return state.invoke_statement()
+    finally:
+        metrics.query_log.loading.pop()
+
+
+@sa_event.listens_for(Base, 'load', propagate=True)
+def _on_orm_load(_instance, _context) -> None:
+    metrics = current_metrics()
+    if metrics is not None:
+        metrics.orm_objects_loaded += 1
+
+
+def _on_before_render(_sender: Flask, **_kwargs: Any) -> None:
+    metrics = current_metrics()
+    if metrics is not None:
+        metrics.render_started.append(time.perf_counter())
+
+
+def _on_template_rendered(_sender: Flask, **_kwargs: Any) -> None:
+    metrics = current_metrics()
+    if metrics is not None and metrics.render_started:
+        started = metrics.render_started.pop()
+        # Only the outermost render_template counts, nested calls are
+        # already inside its time.
+        if not metrics.render_started:
+            metrics.render_seconds += time.perf_counter() - started
+
+
+before_render_template.connect(_on_before_render)
+template_rendered.connect(_on_template_rendered)
+
+
+def _start_request() -> None:
+    metrics = RequestMetrics()
+    if current_app.config.get('N_PLUS_ONE_DETECTION', current_app.debug):
+        metrics.query_log = QueryLog()
+    g.request_metrics = metrics
+
+
+def _check_n_plus_one(metrics: RequestMetrics) -> None:
+    config = current_app.config
+    threshold = int(config.get('N_PLUS_ONE_THRESHOLD', DEFAULT_N_PLUS_ONE_THRESHOLD))
+    findings = metrics.query_log.findings(threshold)
+    if not findings:
+        return
+    endpoint = request.endpoint or 'unmatched'
+    n_plus_one_detected.send(current_app._get_current_object(), endpoint=endpoint, findings=findings)
+    summary = '; '.join(str(finding) for finding in findings)
+    if config.get('N_PLUS_ONE_RAISE', False):
+        raise NPlusOneError(f'N+1 queries in {endpoint}: {summary}')
+    current_app.logger.warning('N+1 queries in %s: %s', endpoint, summary)
+
+
+def _finish_request(response: Response) -> Response:
+    metrics: Optional[RequestMetrics] = g.pop('request_metrics', None)
+    if metrics is None:
+        return response
+    metrics.request_seconds = time.perf_counter() - metrics.started_at
+    metrics_registry.record(request.endpoint or 'unmatched', metrics)
+    if metrics.query_log is not None:
+        _check_n_plus_one(metrics)
+
+    if current_app.config.get('SERVER_TIMING_ENABLED', False):
+        response.headers.add(
+            'Server-Timing',
+            ', '.join((
+                f'db;dur={metrics.db_seconds * 1000:.1f};desc="{metrics.db_statements} queries"',
+                f'render;dur={metrics.render_seconds * 1000:.1f}',
+                f'orm;desc="{metrics.orm_objects_loaded} objects"',
+                f'app;dur={metrics.request_seconds * 1000:.1f}',
+            )),
+        )
+    return response
+
+
+def metrics_allowed() -> bool:
+    """Scrapers send ``Authorization: Bearer <METRICS_TOKEN>``; admins may look too."""
+    token = current_app.config.get('METRICS_TOKEN')
+    authorization = request.authorization
+    if token and authorization is not None and authorization.type == 'bearer':
+        return hmac.compare_digest(str(authorization.token or ''), str(token))
+    return current_user.is_authenticated and current_user.role == 'admin'
+
+
+def metrics_view() -> Response:
+    if not metrics_allowed():
+        abort(404)
+    return Response(metrics_registry.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+
+def init_instrumentation(app: Flask) -> None:
+    if not app.config.get('INSTRUMENTATION_ENABLED', True):
+        return
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    if app.config.get('METRICS_ENDPOINT_ENABLED', False):
+        app.add_url_rule('/_metrics', 'metrics', metrics_view)
+
+
+__all__ = [
+    'MetricsRegistry',
+    'NPlusOneError',
+    'NPlusOneFinding',
+    'QueryLog',
+    'RequestMetrics',
+    'current_metrics',
+    'init_instrumentation',
+    'metrics_registry',
+]
@@ -8,7 +8,7 @@ from flask_login import UserMixin
 from flask_sqlalchemy import SQLAlchemy
 import sqlalchemy
 from sqlalchemy.orm import DeclarativeBase
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 from sqlalchemy import (
     String,
     ForeignKey,
@@ -21,8 +21,16 @@ from sqlalchemy import (
     TIMESTAMP,
     Table,
     Column,
+    Index,
+    UniqueConstraint,
+    text,
 )
 
+def normalize_email(email: str) -> str:
+    """Emails are stored lowercased, so lookups can compare the plain indexed column."""
+    return email.strip().lower()
+
+
 class Base(DeclarativeBase):
     metadata = MetaData(naming_convention={
         "ix": 'ix_%(column_0_label)s',
@@ -58,10 +66,24 @@ class EventStatus(enum.Enum):
     completed = "completed"
     cancelled = "cancelled"
 
+# Position of each status in event lists: running events first.
+EVENT_STATUS_ORDER = {
+    EventStatus.ongoing: 0,
+    EventStatus.scheduled: 1,
+    EventStatus.completed: 2,
+    EventStatus.cancelled: 3,
+}
+
 class SlotStatus(enum.Enum):
     booked = "booked"
     cancelled = "cancelled"
 
+class ImportJobStatus(enum.Enum):
+    queued = "queued"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
 
 class School(Base):
     __tablename__ = 'schools'
@@ -100,6 +122,13 @@ class Building(Base):
 
 class Event(Base):
     __tablename__ = 'events'
+    __table_args__ = (
+        Index('ix_events_search_text', 'search_text', mysql_prefix='FULLTEXT', mysql_with_parser='ngram').ddl_if(dialect='mysql'),
+        # Closest upcoming event of a school.
+        Index('ix_events_school_end', 'school_id', 'end_time'),
+        # Event lists in display order, so every keyset page is an index seek.
+        Index('ix_events_school_status_order_start', 'school_id', 'status_order', 'start_time', text('event_id DESC')),
+    )
 
     event_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(String(120), nullable=False)
@@ -117,7 +146,24 @@ class Event(Base):
         default=EventStatus.scheduled,
         nullable=False
     )
+    status_order: Mapped[int] = mapped_column(
+        Integer,
+        Computed(
+            'CASE status '
+            + ' '.join(f"WHEN '{status.name}' THEN {order}" for status, order in EVENT_STATUS_ORDER.items())
+            + f' ELSE {len(EVENT_STATUS_ORDER)} END',
+            persisted=True,
+        ),
+        nullable=False,
+    )
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP, server_default=sqlalchemy.sql.func.now(), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP,
+        server_default=sqlalchemy.sql.func.now(),
+        onupdate=sqlalchemy.sql.func.now(),
+        nullable=False,
+    )
+    search_text: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
 
     school_id: Mapped[int] = mapped_column(ForeignKey('schools.school_id', ondelete="CASCADE", onupdate="CASCADE"), nullable=False)
 
@@ -139,6 +185,10 @@ class Event(Base):
 
 class User(Base, UserMixin):
     __tablename__ = 'users'
+    __table_args__ = (
+        # Teachers of a school in name order.
+        Index('ix_users_school_role_name', 'school_id', 'role', 'last_name', 'first_name'),
+    )
     
     user_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True) 
     first_name: Mapped[str] = mapped_column(String(50), nullable=False)
@@ -170,6 +220,10 @@ class User(Base, UserMixin):
     def initials(self):
         return f'{self.last_name} {self.first_name[0]}. {self.middle_name[0] + "." if self.middle_name else ""}'
 
+    @validates('email')
+    def _normalize_email(self, _key, email):
+        return normalize_email(email) if email is not None else email
+
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
 
@@ -240,6 +294,12 @@ class Admin(User):
 
 class Slot(Base):
     __tablename__ = 'slots'
+    __table_args__ = (
+        # Also serves every lookup by event_id alone.
+        UniqueConstraint('event_id', 'teacher_id', 'start_time', name='uq_slots_event_teacher_start'),
+        # A parent's bookings in time order and their overlap checks.
+        Index('ix_slots_parent_status_start', 'parent_id', 'status', 'start_time'),
+    )
 
     slot_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     start_time: Mapped[datetime] = mapped_column(DateTime, nullable=False)
@@ -281,3 +341,34 @@ class BuildingBooking(Base):
 
     def __repr__(self):
         return f'<BuildingBooking {self.building_booking_id}: {self.teacher.surname_name} > {self.building.name}>'
+
+class ImportJob(Base):
+    __tablename__ = 'import_jobs'
+    __table_args__ = (
+        Index('ix_import_jobs_status', 'status', 'job_id'),
+    )
+
+    job_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    status: Mapped[ImportJobStatus] = mapped_column(
+        Enum(ImportJobStatus),
+        default=ImportJobStatus.queued,
+        nullable=False,
+    )
+    file_path: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    processed_rows: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    created_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    failed_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    errors: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    result: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    message: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    worker_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP, server_default=sqlalchemy.sql.func.now(), nullable=False)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    school_id: Mapped[int] = mapped_column(ForeignKey('schools.school_id', ondelete="CASCADE", onupdate="CASCADE"), nullable=False)
+    created_by: Mapped[Optional[int]] = mapped_column(ForeignKey('users.user_id', ondelete="SET NULL", onupdate="CASCADE"), nullable=True)
+
+    def __repr__(self):
+        return f'<ImportJob {self.job_id}: {self.status.value} {self.created_count}/{self.processed_rows}>'
@@ -0,0 +1,113 @@
+import re
+from datetime import timedelta
+from typing import Any, Callable
+
+from sqlalchemy import event as sa_event
+from sqlalchemy import select
+
+from .models import Parent, Slot, db
+from .repositories import EventCursor, EventRepository, SlotRepository, UserRepository, get_repository
+
+# (label, tables that must not be read in full, call running the queries)
+ExplainProbe = tuple[str, tuple[str, ...], Callable[[], Any]]
+
+SQLITE_SCAN_PATTERN = re.compile(r'^SCAN (\w+)')
+
+
+class CapturedStatements:
+    def __init__(self) -> None:
+        self.statements: list[tuple[str, Any]] = []
+
+    def record(self, _conn: Any, _cursor: Any, statement: str, parameters: Any, _context: Any, executemany: bool) -> None:
+        if not executemany and statement.lstrip().upper().startswith('SELECT'):
+            self.statements.append((statement, parameters))
+
+
+def captured_selects(probe: Callable[[], Any]) -> list[tuple[str, Any]]:
+    """SELECT statements PROBE runs, with their parameters."""
+    captured = CapturedStatements()
+    sa_event.listen(db.engine, 'before_cursor_execute', captured.record)
+    try:
+        probe()
+    finally:
+        sa_event.remove(db.engine, 'before_cursor_execute', captured.record)
+    return captured.statements
+
+
+def full_scans(statement: str, parameters: Any, tables: tuple[str, ...]) -> list[str]:
+    """Tables of TABLES (or their aliases) that STATEMENT reads in full."""
+    connection = db.session.connection()
+    scanned: list[str] = []
+    if connection.dialect.name == 'sqlite':
+        for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters):
+            detail = row[-1]
+            match = SQLITE_SCAN_PATTERN.match(detail)
+            if match and 'INDEX' not in detail:
+                scanned.append(match.group(1))
+    else:
+        for row in connection.exec_driver_sql(f'EXPLAIN {statement}', parameters).mappings():
+            if row.get('type') == 'ALL' and row.get('table'):
+                scanned.append(row['table'])
+    return [name for name in scanned if any(name == table or name.startswith(f'{table}_') for table in tables)]
+
+
+def explain_probes(school_id: int) -> list[ExplainProbe]:
+    """The hot repository queries, bound to the data of SCHOOL_ID.
+
+    Raises LookupError when the school has no events or parents to query.
+    """
+    event_repository: EventRepository = get_repository('events')
+    slot_repository: SlotRepository = get_repository('slots')
+    user_repository: UserRepository = get_repository('users')
+
+    event = event_repository.get_closest_for_school(school_id, include_past=True)
+    if event is None:
+        raise LookupError(f'School {school_id} has no events')
+    parent_id = db.session.execute(
+        select(Slot.parent_id).where(Slot.event_id == event.event_id).limit(1)
+    ).scalar() or db.session.execute(
+        select(Parent.parent_id).where(Parent.school_id == school_id).limit(1)
+    ).scalar()
+    if parent_id is None:
+        raise LookupError(f'School {school_id} has no parents')
+    teacher_id = event.teachers[0].teacher_id if event.teachers else 0
+    window = (event.start_time, event.start_time + timedelta(days=1))
+    event_id = event.event_id
+    second_page = EventCursor.after(event)
+
+    return [
+        ('SlotRepository.get_booking_versions', ('slots',), lambda: slot_repository.get_booking_versions([event_id])),
+        ('SlotRepository.get_booking_cells', ('slots',), lambda: slot_repository.get_booking_cells([event_id])),
+        ('SlotRepository.find_existing', ('slots',), lambda: slot_repository.find_existing(
+            event_id=event_id, teacher_id=teacher_id, start_time=window[0],
+        )),
+        ('SlotRepository.get_booked_for_parent', ('slots',), lambda: slot_repository.get_booked_for_parent(parent_id)),
+        ('SlotRepository.get_parent_bookings', ('slots',), lambda: slot_repository.get_parent_bookings(
+            parent_id, *window,
+        )),
+        ('EventRepository.get_closest_for_school', ('events',), lambda: event_repository.get_closest_for_school(
+            school_id,
+        )),
+        ('EventRepository.get_closest_version', ('events', 'slots'), lambda: event_repository.get_closest_version(
+            school_id,
+        )),
+        ('EventRepository.get_for_school', ('events',), lambda: event_repository.get_for_school(school_id, limit=20)),
+        ('EventRepository.get_for_school (next page)', ('events',), lambda: event_repository.get_for_school(
+            school_id, cursor=second_page, limit=20,
+        )),
+        ('EventRepository.refresh_statuses_for_school', ('events',), lambda: (
+            event_repository.refresh_statuses_for_school(school_id)
+        )),
+        ('UserRepository.get_teachers_for_school', ('users',), lambda: user_repository.get_teachers_for_school(
+            school_id,
+        )),
+    ]
+
+
+__all__ = [
+    'CapturedStatements',
+    'ExplainProbe',
+    'captured_selects',
+    'explain_probes',
+    'full_scans',
+]
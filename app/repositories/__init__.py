@@ -4,10 +4,12 @@ from ..models import db
 
 from .base_repository import BaseRepository
 from .school_repository import SchoolRepository
-from .user_repository import UserRepository
+from .user_repository import NewUser, UserRepository
 from .building_repository import BuildingRepository
-from .event_repository import EventRepository
-from .slot_repository import SlotRepository
+from .event_repository import EventCursor, EventPage, EventRepository, EventStats
+from .event_search import EventSearch
+from .slot_repository import BookingRequest, BookingResult, SlotRepository
+from .import_job_repository import ImportJobRepository
 
 RepositoryMap = Dict[str, Type[BaseRepository]]
 
@@ -17,6 +19,7 @@ _REPOSITORIES: RepositoryMap = {
     "buildings": BuildingRepository,
     "events": EventRepository,
     "slots": SlotRepository,
+    "import_jobs": ImportJobRepository,
 }
 
 
@@ -33,8 +36,16 @@ __all__ = [
     "BaseRepository",
     "SchoolRepository",
     "UserRepository",
+    "NewUser",
     "BuildingRepository",
+    "EventCursor",
+    "EventPage",
     "EventRepository",
+    "EventSearch",
+    "EventStats",
+    "BookingRequest",
+    "BookingResult",
     "SlotRepository",
+    "ImportJobRepository",
     "get_repository",
 ]
@@ -1,11 +1,74 @@
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import Iterable, Optional
 
-from sqlalchemy import case, select
+from sqlalchemy import case, exists, func, literal, or_, select, update
 from sqlalchemy.orm import selectinload
 
 from .base_repository import BaseRepository
-from ..models import BuildingBooking, Event, EventStatus, Slot, Teacher, event_teachers_table
+from .event_search import EventSearch
+from ..models import BuildingBooking, Event, EventStatus, Slot, SlotStatus, Teacher, event_teachers_table
+from ..signals import event_schedule_changed
+
+
+CURSOR_TIME_FORMAT = '%Y%m%d%H%M%S%f'
+
+
+def _aggregate(column, *, where):
+    return select(column).where(where).scalar_subquery()
+
+
+# Matches ix_events_school_status_order_start column for column.
+EVENT_LIST_ORDER = (Event.status_order.asc(), Event.start_time.asc(), Event.event_id.desc())
+
+
+@dataclass(frozen=True)
+class EventCursor:
+    status_order: int
+    start_time: datetime
+    event_id: int
+
+    @classmethod
+    def after(cls, event: Event) -> 'EventCursor':
+        return cls(
+            status_order=event.status_order,
+            start_time=event.start_time,
+            event_id=event.event_id,
+        )
+
+    @classmethod
+    def decode(cls, token: Optional[str]) -> Optional['EventCursor']:
+        if not token:
+            return None
+        try:
+            status_order, start_time, event_id = token.split('.')
+            return cls(
+                status_order=int(status_order),
+                start_time=datetime.strptime(start_time, CURSOR_TIME_FORMAT),
+                event_id=int(event_id),
+            )
+        except ValueError:
+            return None
+
+    def encode(self) -> str:
+        return f'{self.status_order}.{self.start_time.strftime(CURSOR_TIME_FORMAT)}.{self.event_id}'
+
+
+@dataclass(frozen=True)
+class EventPage:
+    events: list[Event]
+    next_cursor: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class EventStats:
+    event_id: int
+    slot_count: int = 0
+    parent_count: int = 0
+    teacher_count: int = 0
+    slot_teacher_count: int = 0
+    building_count: int = 0
+    classroom_count: int = 0
 
 
 class EventRepository(BaseRepository[Event]):
@@ -15,52 +78,171 @@ class EventRepository(BaseRepository[Event]):
     def get_by_id(self, event_id: int) -> Optional[Event]:
         return self._get_one(event_id=event_id)
 
-    def get_for_school(self, school_id: int) -> list[Event]:
-        status_order = case(
-            (Event.status == EventStatus.ongoing, 0),
-            (Event.status == EventStatus.scheduled, 1),
-            (Event.status == EventStatus.completed, 2),
-            (Event.status == EventStatus.cancelled, 3),
-            else_=4,
-        )
+    def get_for_school(
+        self,
+        school_id: int,
+        *,
+        search: Optional[EventSearch] = None,
+        cursor: Optional[EventCursor] = None,
+        limit: Optional[int] = None,
+    ) -> EventPage:
         stmt = (
             select(Event)
             .where(Event.school_id == school_id)
             .options(
-                selectinload(Event.slots),
-                selectinload(Event.slots).selectinload(Slot.parent),
-                selectinload(Event.slots).selectinload(Slot.teacher),
                 selectinload(Event.building_bookings).selectinload(BuildingBooking.building),
                 selectinload(Event.teachers),
             )
-            .order_by(status_order, Event.start_time.asc(), Event.event_id.desc())
         )
-        result = self.session.execute(stmt)
-        return list(result.scalars().unique())
+        if search is not None:
+            stmt = stmt.where(self._search_criteria(search, Event.school_id == school_id))
+        return self._paginate(stmt, cursor=cursor, limit=limit)
+
+    def get_stats(self, event_ids: Iterable[int]) -> dict[int, EventStats]:
+        ids = list(set(event_ids))
+        if not ids:
+            return {}
+
+        slot_stats = (
+            select(
+                Slot.event_id.label('event_id'),
+                func.count(Slot.slot_id).label('slot_count'),
+                func.count(func.distinct(Slot.parent_id)).label('parent_count'),
+                func.count(func.distinct(Slot.teacher_id)).label('teacher_count'),
+            )
+            .where(Slot.event_id.in_(ids), Slot.status != SlotStatus.cancelled)
+            .group_by(Slot.event_id)
+            .subquery()
+        )
+        teacher_stats = (
+            select(
+                event_teachers_table.c.event_id.label('event_id'),
+                func.count(func.distinct(event_teachers_table.c.teacher_id)).label('teacher_count'),
+            )
+            .where(event_teachers_table.c.event_id.in_(ids))
+            .group_by(event_teachers_table.c.event_id)
+            .subquery()
+        )
+        building_stats = (
+            select(
+                BuildingBooking.event_id.label('event_id'),
+                func.count(func.distinct(BuildingBooking.building_id)).label('building_count'),
+            )
+            .where(BuildingBooking.event_id.in_(ids))
+            .group_by(BuildingBooking.event_id)
+            .subquery()
+        )
+        classrooms = (
+            select(BuildingBooking.event_id, BuildingBooking.building_id, BuildingBooking.classroom)
+            .where(
+                BuildingBooking.event_id.in_(ids),
+                BuildingBooking.classroom.is_not(None),
+                BuildingBooking.classroom != '',
+            )
+            .distinct()
+            .subquery()
+        )
+        classroom_stats = (
+            select(
+                classrooms.c.event_id.label('event_id'),
+                func.count().label('classroom_count'),
+            )
+            .group_by(classrooms.c.event_id)
+            .subquery()
+        )
 
-    def get_for_teacher(self, teacher_id: int) -> list[Event]:
-        status_order = case(
-            (Event.status == EventStatus.ongoing, 0),
-            (Event.status == EventStatus.scheduled, 1),
-            (Event.status == EventStatus.completed, 2),
-            (Event.status == EventStatus.cancelled, 3),
-            else_=4,
+        stmt = (
+            select(
+                Event.event_id,
+                func.coalesce(slot_stats.c.slot_count, 0),
+                func.coalesce(slot_stats.c.parent_count, 0),
+                func.coalesce(teacher_stats.c.teacher_count, 0),
+                func.coalesce(slot_stats.c.teacher_count, 0),
+                func.coalesce(building_stats.c.building_count, 0),
+                func.coalesce(classroom_stats.c.classroom_count, 0),
+            )
+            .outerjoin(slot_stats, slot_stats.c.event_id == Event.event_id)
+            .outerjoin(teacher_stats, teacher_stats.c.event_id == Event.event_id)
+            .outerjoin(building_stats, building_stats.c.event_id == Event.event_id)
+            .outerjoin(classroom_stats, classroom_stats.c.event_id == Event.event_id)
+            .where(Event.event_id.in_(ids))
         )
+        return {row[0]: EventStats(*row) for row in self.session.execute(stmt)}
+
+    def get_for_teacher(
+        self,
+        teacher_id: int,
+        *,
+        search: Optional[EventSearch] = None,
+        cursor: Optional[EventCursor] = None,
+        limit: Optional[int] = None,
+    ) -> EventPage:
         stmt = (
             select(Event)
             .join(event_teachers_table, event_teachers_table.c.event_id == Event.event_id)
             .where(event_teachers_table.c.teacher_id == teacher_id)
             .options(
-                selectinload(Event.slots),
-                selectinload(Event.slots).selectinload(Slot.parent),
-                selectinload(Event.slots).selectinload(Slot.teacher),
                 selectinload(Event.building_bookings).selectinload(BuildingBooking.building),
                 selectinload(Event.teachers),
             )
-            .order_by(status_order, Event.start_time.asc(), Event.event_id.desc())
         )
-        result = self.session.execute(stmt)
-        return list(result.scalars().unique())
+        if search is not None:
+            teacher_events = select(event_teachers_table.c.event_id).where(event_teachers_table.c.teacher_id == teacher_id)
+            stmt = stmt.where(self._search_criteria(search, Event.event_id.in_(teacher_events)))
+        return self._paginate(stmt, cursor=cursor, limit=limit)
+
+    def _search_criteria(self, search: EventSearch, scope):
+        # On MySQL the text is matched by its own FULLTEXT query; the page
+        # query then ORs plain ids with the column predicates.
+        if self.session.get_bind().dialect.name == 'mysql':
+            fulltext = search.fulltext_clause()
+            if fulltext is not None:
+                event_ids = self.session.execute(select(Event.event_id).where(fulltext, scope)).scalars().all()
+                return search.criteria(Event.event_id.in_(event_ids))
+        return search.criteria()
+
+    def _fetch(self, stmt, limit: Optional[int]) -> list[Event]:
+        stmt = stmt.order_by(*EVENT_LIST_ORDER)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        return list(self.session.execute(stmt).scalars().unique())
+
+    def _paginate(self, stmt, *, cursor: Optional[EventCursor], limit: Optional[int]) -> EventPage:
+        fetch_limit = limit + 1 if limit is not None else None
+        if cursor is None:
+            events = self._fetch(stmt, fetch_limit)
+        else:
+            # The rest of the cursor's status group, then the later groups:
+            # two range seeks on the index instead of one OR it cannot use.
+            events = self._fetch(
+                stmt.where(
+                    Event.status_order == cursor.status_order,
+                    Event.start_time >= cursor.start_time,
+                    or_(Event.start_time > cursor.start_time, Event.event_id < cursor.event_id),
+                ),
+                fetch_limit,
+            )
+            if fetch_limit is None or len(events) < fetch_limit:
+                events += self._fetch(
+                    stmt.where(Event.status_order > cursor.status_order),
+                    fetch_limit - len(events) if fetch_limit is not None else None,
+                )
+
+        if limit is None or len(events) <= limit:
+            return EventPage(events=events)
+        events = events[:limit]
+        return EventPage(events=events, next_cursor=EventCursor.after(events[-1]).encode())
+
+    @staticmethod
+    def _closest_for_school(stmt, school_id: int, *, now: datetime, include_past: bool):
+        stmt = (
+            stmt.where(Event.school_id == school_id)
+            .order_by(*EVENT_LIST_ORDER)
+            .limit(1)
+        )
+        if not include_past:
+            stmt = stmt.where(Event.end_time >= now)
+        return stmt
 
     def get_closest_for_school(
         self,
@@ -69,31 +251,58 @@ class EventRepository(BaseRepository[Event]):
         reference_time: Optional[datetime] = None,
         include_past: bool = False,
     ) -> Optional[Event]:
-        now = reference_time or datetime.now()
-        status_order = case(
-            (Event.status == EventStatus.ongoing, 0),
-            (Event.status == EventStatus.scheduled, 1),
-            (Event.status == EventStatus.completed, 2),
-            (Event.status == EventStatus.cancelled, 3),
-            else_=4,
+        stmt = select(Event).options(
+            selectinload(Event.building_bookings).selectinload(BuildingBooking.building),
+            selectinload(Event.teachers),
         )
-        stmt = (
-            select(Event)
-            .where(Event.school_id == school_id)
-            .options(
-                selectinload(Event.slots).selectinload(Slot.teacher),
-                selectinload(Event.building_bookings).selectinload(BuildingBooking.building),
-                selectinload(Event.teachers),
-            )
-            .order_by(status_order, Event.start_time.asc(), Event.event_id.desc())
+        stmt = self._closest_for_school(
+            stmt,
+            school_id,
+            now=reference_time or datetime.now(),
+            include_past=include_past,
         )
-        if not include_past:
-            stmt = stmt.where(Event.end_time >= now)
-
-        stmt = stmt.limit(1)
         result = self.session.execute(stmt)
         return result.scalars().unique().first()
 
+    def get_closest_version(
+        self,
+        school_id: int,
+        *,
+        reference_time: Optional[datetime] = None,
+        include_past: bool = False,
+    ) -> Optional[tuple]:
+        """A cheap fingerprint of what get_closest_for_school() would return.
+
+        Covers the event row, its bookings (slot ids only grow), its
+        teacher links and its building bookings, in one statement.
+        """
+        links = event_teachers_table.c
+        stmt = select(
+            Event.event_id,
+            Event.status,
+            Event.updated_at,
+            _aggregate(func.count(Slot.slot_id), where=Slot.event_id == Event.event_id),
+            _aggregate(func.max(Slot.slot_id), where=Slot.event_id == Event.event_id),
+            _aggregate(func.count(links.teacher_id), where=links.event_id == Event.event_id),
+            _aggregate(func.max(links.created_at), where=links.event_id == Event.event_id),
+            _aggregate(
+                func.count(BuildingBooking.building_booking_id),
+                where=BuildingBooking.event_id == Event.event_id,
+            ),
+            _aggregate(
+                func.max(BuildingBooking.building_booking_id),
+                where=BuildingBooking.event_id == Event.event_id,
+            ),
+        )
+        stmt = self._closest_for_school(
+            stmt,
+            school_id,
+            now=reference_time or datetime.now(),
+            include_past=include_past,
+        )
+        row = self.session.execute(stmt).first()
+        return tuple(row) if row is not None else None
+
     def _resolve_teachers(self, teacher_ids: Optional[set[int]]) -> list[Teacher]:
         if not teacher_ids:
             return []
@@ -126,6 +335,7 @@ class EventRepository(BaseRepository[Event]):
             event.teachers = self._resolve_teachers(teacher_ids)
         self.add(event)
         self.commit()
+        event_schedule_changed.send(self, event_id=event.event_id)
         return event
 
     def update(
@@ -164,6 +374,7 @@ class EventRepository(BaseRepository[Event]):
             updated = True
         if updated:
             self.commit()
+            event_schedule_changed.send(self, event_id=event_id)
 
         return event
 
@@ -173,32 +384,69 @@ class EventRepository(BaseRepository[Event]):
             return False
         self.session.delete(event)
         self.commit()
+        event_schedule_changed.send(self, event_id=event_id)
         return True
 
-    def refresh_statuses_for_school(self, school_id: int, *, reference_time: Optional[datetime] = None) -> None:
+    @staticmethod
+    def _desired_status(now: datetime):
+        status_type = Event.__table__.c.status.type
+        return case(
+            (Event.end_time <= now, literal(EventStatus.completed, status_type)),
+            (Event.start_time <= now, literal(EventStatus.ongoing, status_type)),
+            else_=literal(EventStatus.scheduled, status_type),
+        )
+
+    def _apply_status_transitions(self, *criteria, reference_time: Optional[datetime] = None) -> int:
         now = reference_time or datetime.now()
-        stmt = select(Event).where(Event.school_id == school_id)
+        desired_status = self._desired_status(now)
+        stale = (
+            Event.status != EventStatus.cancelled,
+            Event.status != desired_status,
+            *criteria,
+        )
+
+        # A plain read first: most calls find nothing to change, and should not take row locks.
+        has_stale = self.session.execute(select(exists().where(*stale))).scalar()
+        if not has_stale:
+            return 0
+
+        stmt = (
+            update(Event)
+            .where(*stale)
+            .values(status=desired_status)
+            .execution_options(synchronize_session=False)
+        )
         result = self.session.execute(stmt)
-        events = list(result.scalars())
+        self.commit()
+        return result.rowcount
 
-        updated = False
-        for event in events:
-            if event.status == EventStatus.cancelled:
-                continue
+    def refresh_statuses_for_school(self, school_id: int, *, reference_time: Optional[datetime] = None) -> int:
+        return self._apply_status_transitions(Event.school_id == school_id, reference_time=reference_time)
 
-            if event.end_time <= now:
-                desired_status = EventStatus.completed
-            elif event.start_time <= now:
-                desired_status = EventStatus.ongoing
-            else:
-                desired_status = EventStatus.scheduled
+    def refresh_statuses(self, *, reference_time: Optional[datetime] = None) -> int:
+        return self._apply_status_transitions(reference_time=reference_time)
 
-            if event.status != desired_status:
-                event.status = desired_status
-                updated = True
+    def refresh_statuses_for_events(
+        self,
+        event_ids: Iterable[int],
+        *,
+        reference_time: Optional[datetime] = None,
+    ) -> int:
+        ids = set(event_ids)
+        if not ids:
+            return 0
+        return self._apply_status_transitions(Event.event_id.in_(ids), reference_time=reference_time)
 
-        if updated:
-            self.commit()
+    def get_status_boundaries(self, reference_time: datetime) -> list[tuple[int, datetime, datetime]]:
+        stmt = select(Event.event_id, Event.start_time, Event.end_time).where(
+            Event.status != EventStatus.cancelled,
+            Event.end_time > reference_time,
+        )
+        return [tuple(row) for row in self.session.execute(stmt)]
 
+    def get_schedule_fingerprint(self) -> tuple[int, Optional[datetime]]:
+        stmt = select(func.count(Event.event_id), func.max(Event.updated_at))
+        count, last_updated = self.session.execute(stmt).one()
+        return count, last_updated
 
-__all__ = ["EventRepository"]
+__all__ = ["EventCursor", "EventPage", "EventRepository", "EventSearch", "EventStats"]
@@ -0,0 +1,335 @@
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import and_, bindparam, event as sa_event, extract, false, inspect, or_, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from ..models import Building, BuildingBooking, Event, EventStatus, Teacher, event_teachers_table
+
+STATUS_SEARCH_TERMS: dict[EventStatus, tuple[str, ...]] = {
+    EventStatus.scheduled: ('запланировано', 'scheduled'),
+    EventStatus.ongoing: ('идёт сейчас', 'идет сейчас', 'ongoing'),
+    EventStatus.completed: ('завершено', 'completed'),
+    EventStatus.cancelled: ('отменено', 'мероприятие отменено', 'cancelled'),
+}
+
+FULL_DATE_PATTERNS = (
+    (re.compile(r'^(\d{1,2})\.(\d{1,2})\.(\d{4})$'), ('day', 'month', 'year')),
+    (re.compile(r'^(\d{4})-(\d{1,2})-(\d{1,2})$'), ('year', 'month', 'day')),
+)
+DAY_MONTH_PATTERN = re.compile(r'^(\d{1,2})\.(\d{1,2})$')
+TIME_PATTERN = re.compile(r'^(\d{1,2}):(\d{2})$')
+YEAR_PATTERN = re.compile(r'^(19|20)\d{2}$')
+FULLTEXT_TOKEN_PATTERN = re.compile(r'\w+')
+# ngram_token_size of the ngram parser behind ix_events_search_text.
+FULLTEXT_NGRAM_SIZE = 2
+
+SEARCH_TEXT_EVENT_FIELDS = ('name', 'start_time', 'end_time', 'teachers', 'building_bookings')
+SEARCH_TEXT_TEACHER_FIELDS = ('first_name', 'middle_name', 'last_name', 'email')
+SEARCH_TEXT_BOOKING_FIELDS = ('event_id', 'building_id', 'classroom')
+
+
+def escape_like(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def build_search_text(
+    name: Optional[str],
+    start_time: Optional[datetime],
+    end_time: Optional[datetime],
+    teachers: Iterable[tuple[Optional[str], ...]] = (),
+    locations: Iterable[tuple[Optional[str], ...]] = (),
+) -> str:
+    parts: list[Optional[str]] = [
+        name,
+        start_time.strftime('%d.%m.%Y %H:%M') if start_time else None,
+        end_time.strftime('%d.%m.%Y %H:%M') if end_time else None,
+    ]
+    for values in (*teachers, *locations):
+        parts.extend(values)
+    return ' '.join(part for part in parts if part).lower()
+
+
+@dataclass(frozen=True)
+class EventSearch:
+    """A free-text event search split into what SQL can match directly.
+
+    The raw text is matched against the denormalized ``Event.search_text``
+    (name, period, teachers, buildings and rooms); text that looks like a
+    date, time, number or status label is additionally turned into column
+    predicates, since statuses change without the event row being edited.
+    """
+
+    text: str
+    statuses: tuple[EventStatus, ...] = ()
+    on_date: Optional[date] = None
+    day_month: Optional[tuple[int, int]] = None
+    at_time: Optional[time] = None
+    year: Optional[int] = None
+    number: Optional[int] = None
+
+    @classmethod
+    def parse(cls, query: str) -> Optional['EventSearch']:
+        text = ' '.join(query.split()).lower()
+        if not text:
+            return None
+
+        statuses = tuple(
+            status
+            for status, terms in STATUS_SEARCH_TERMS.items()
+            if any(text in term for term in terms)
+        )
+        return cls(
+            text=text,
+            statuses=statuses,
+            on_date=_parse_full_date(text),
+            day_month=_parse_day_month(text),
+            at_time=_parse_time(text),
+            year=int(text) if YEAR_PATTERN.match(text) else None,
+            number=int(text) if text.isdigit() else None,
+        )
+
+    def criteria(self, text_match=None):
+        """Everything the search matches, OR-ed together.
+
+        TEXT_MATCH replaces the LIKE over search_text, e.g. with the ids a
+        separate fulltext_clause() query found: MySQL cannot use a FULLTEXT
+        index for a MATCH that sits inside an OR.
+        """
+        clauses = [self.like_clause() if text_match is None else text_match]
+        if self.statuses:
+            clauses.append(Event.status.in_(self.statuses))
+        if self.on_date is not None:
+            day_start = datetime.combine(self.on_date, time.min)
+            clauses.append(and_(Event.start_time < day_start + timedelta(days=1), Event.end_time >= day_start))
+        if self.day_month is not None:
+            day, month = self.day_month
+            clauses.append(or_(
+                and_(extract('day', Event.start_time) == day, extract('month', Event.start_time) == month),
+                and_(extract('day', Event.end_time) == day, extract('month', Event.end_time) == month),
+            ))
+        if self.at_time is not None:
+            clauses.append(or_(
+                and_(
+                    extract('hour', Event.start_time) == self.at_time.hour,
+                    extract('minute', Event.start_time) == self.at_time.minute,
+                ),
+                and_(
+                    extract('hour', Event.end_time) == self.at_time.hour,
+                    extract('minute', Event.end_time) == self.at_time.minute,
+                ),
+            ))
+        if self.year is not None:
+            clauses.append(or_(
+                extract('year', Event.start_time) == self.year,
+                extract('year', Event.end_time) == self.year,
+            ))
+        if self.number is not None:
+            clauses.extend((
+                Event.event_id == self.number,
+                Event.consultations_count == self.number,
+                Event.consultation_duration_minutes == self.number,
+                Event.duration_minutes == self.number,
+            ))
+        return or_(false(), *clauses)
+
+    def like_clause(self):
+        # search_text is stored lowercased, so a plain LIKE works everywhere.
+        return Event.search_text.like(f'%{escape_like(self.text)}%', escape='\\')
+
+    def fulltext_clause(self):
+        """The LIKE, narrowed by the MySQL FULLTEXT index, or None.
+
+        The index uses the ngram parser, so a quoted token matches anywhere
+        inside a word ("етров" finds "петров"), and every row the LIKE
+        accepts also passes the MATCH. Tokens shorter than an ngram cannot
+        be looked up and are left to the LIKE.
+        """
+        tokens = [
+            token
+            for token in FULLTEXT_TOKEN_PATTERN.findall(self.text)
+            if len(token) >= FULLTEXT_NGRAM_SIZE
+        ]
+        if not tokens:
+            return None
+        boolean_query = ' '.join(f'+"{token}"' for token in tokens)
+        return and_(Event.search_text.match(boolean_query), self.like_clause())
+
+
+def _parse_full_date(text: str) -> Optional[date]:
+    for pattern, order in FULL_DATE_PATTERNS:
+        match = pattern.match(text)
+        if not match:
+            continue
+        parts = dict(zip(order, (int(group) for group in match.groups())))
+        try:
+            return date(parts['year'], parts['month'], parts['day'])
+        except ValueError:
+            return None
+    return None
+
+
+def _parse_day_month(text: str) -> Optional[tuple[int, int]]:
+    match = DAY_MONTH_PATTERN.match(text)
+    if not match:
+        return None
+    day, month = (int(group) for group in match.groups())
+    if not (1 <= day <= 31 and 1 <= month <= 12):
+        return None
+    return day, month
+
+
+def _parse_time(text: str) -> Optional[time]:
+    match = TIME_PATTERN.match(text)
+    if not match:
+        return None
+    try:
+        return time(int(match.group(1)), int(match.group(2)))
+    except ValueError:
+        return None
+
+
+def _changed(instance: object, fields: Iterable[str]) -> bool:
+    state = inspect(instance)
+    return any(state.attrs[field].history.has_changes() for field in fields)
+
+
+def _stale_event_ids(session: Session, stmt) -> set[int]:
+    return set(session.execute(stmt).scalars())
+
+
+def rebuild_search_text(connection, event_ids: Iterable[int]) -> dict[int, str]:
+    ids = sorted(set(event_ids))
+    if not ids:
+        return {}
+
+    teachers: dict[int, list[tuple[Optional[str], ...]]] = {}
+    teacher_rows = connection.execute(
+        select(
+            event_teachers_table.c.event_id,
+            Teacher.last_name,
+            Teacher.first_name,
+            Teacher.middle_name,
+            Teacher.email,
+        )
+        .join(Teacher, Teacher.teacher_id == event_teachers_table.c.teacher_id)
+        .where(event_teachers_table.c.event_id.in_(ids))
+    )
+    for event_id, *values in teacher_rows:
+        teachers.setdefault(event_id, []).append(tuple(values))
+
+    locations: dict[int, list[tuple[Optional[str], ...]]] = {}
+    location_rows = connection.execute(
+        select(BuildingBooking.event_id, Building.name, BuildingBooking.classroom)
+        .outerjoin(Building, Building.building_id == BuildingBooking.building_id)
+        .where(BuildingBooking.event_id.in_(ids))
+    )
+    for event_id, *values in location_rows:
+        locations.setdefault(event_id, []).append(tuple(values))
+
+    texts = {
+        event_id: build_search_text(
+            name,
+            start_time,
+            end_time,
+            teachers.get(event_id, ()),
+            locations.get(event_id, ()),
+        )
+        for event_id, name, start_time, end_time in connection.execute(
+            select(Event.event_id, Event.name, Event.start_time, Event.end_time).where(Event.event_id.in_(ids))
+        )
+    }
+    if texts:
+        events_table = Event.__table__
+        connection.execute(
+            update(events_table)
+            .where(events_table.c.event_id == bindparam('target_id'))
+            # Keep updated_at as is: search text is derived data and must
+            # not look like a schedule change to the status scheduler.
+            .values(search_text=bindparam('search_text'), updated_at=events_table.c.updated_at),
+            [{'target_id': event_id, 'search_text': text} for event_id, text in texts.items()],
+        )
+    return texts
+
+
+def _collect_stale_search_text(session: Session, _flush_context, _instances) -> None:
+    events: list[Event] = []
+    event_ids: set[int] = set()
+    building_ids: set[int] = set()
+    teacher_ids: set[int] = set()
+
+    for instance in session.new:
+        if isinstance(instance, Event):
+            events.append(instance)
+        elif isinstance(instance, BuildingBooking):
+            if instance.event is not None:
+                events.append(instance.event)
+            else:
+                event_ids.add(instance.event_id)
+
+    for instance in session.dirty:
+        if isinstance(instance, Event) and _changed(instance, SEARCH_TEXT_EVENT_FIELDS):
+            events.append(instance)
+        elif isinstance(instance, BuildingBooking) and _changed(instance, SEARCH_TEXT_BOOKING_FIELDS):
+            event_ids.update(inspect(instance).attrs.event_id.history.sum())
+        elif isinstance(instance, Building) and _changed(instance, ('name',)):
+            building_ids.add(instance.building_id)
+        elif isinstance(instance, Teacher) and _changed(instance, SEARCH_TEXT_TEACHER_FIELDS):
+            teacher_ids.add(instance.teacher_id)
+
+    for instance in session.deleted:
+        if isinstance(instance, BuildingBooking):
+            event_ids.add(instance.event_id)
+        elif isinstance(instance, Building):
+            building_ids.add(instance.building_id)
+        elif isinstance(instance, Teacher):
+            teacher_ids.add(instance.teacher_id)
+
+    # Links to deleted buildings and teachers are gone after the flush, so
+    # the affected events have to be looked up now.
+    if building_ids:
+        event_ids |= _stale_event_ids(
+            session,
+            select(BuildingBooking.event_id).where(BuildingBooking.building_id.in_(building_ids)),
+        )
+    if teacher_ids:
+        event_ids |= _stale_event_ids(
+            session,
+            select(event_teachers_table.c.event_id).where(event_teachers_table.c.teacher_id.in_(teacher_ids)),
+        )
+
+    if events or event_ids:
+        pending = session.info.setdefault('stale_search_text', ([], set()))
+        pending[0].extend(events)
+        pending[1].update(event_ids)
+
+
+def _refresh_stale_search_text(session: Session, _flush_context) -> None:
+    pending = session.info.pop('stale_search_text', None)
+    if pending is None:
+        return
+    events, event_ids = pending
+    event_ids = {event_id for event_id in event_ids if event_id is not None}
+    event_ids.update(event.event_id for event in events if event.event_id is not None)
+    texts = rebuild_search_text(session.connection(), event_ids)
+    for event in events:
+        if event.event_id in texts and event not in session.deleted:
+            set_committed_value(event, 'search_text', texts[event.event_id])
+
+
+def init_search_text(sessions) -> None:
+    """Keep Event.search_text current on flushes of SESSIONS.
+
+    SESSIONS is a sessionmaker or scoped_session; other sessions in the
+    process are left alone.
+    """
+    if sa_event.contains(sessions, 'before_flush', _collect_stale_search_text):
+        return
+    sa_event.listen(sessions, 'before_flush', _collect_stale_search_text)
+    sa_event.listen(sessions, 'after_flush', _refresh_stale_search_text)
+
+
+__all__ = ["EventSearch", "build_search_text", "init_search_text", "rebuild_search_text"]
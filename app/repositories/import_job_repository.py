@@ -0,0 +1,125 @@
+import json
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select, update
+
+from .base_repository import BaseRepository
+from ..models import ImportJob, ImportJobStatus
+
+
+class ImportJobRepository(BaseRepository[ImportJob]):
+    model = ImportJob
+    default_order_by = (ImportJob.created_at.asc(), ImportJob.job_id.asc())
+
+    def get_by_id(self, job_id: int) -> Optional[ImportJob]:
+        return self._get_one(job_id=job_id)
+
+    def get_for_school(self, job_id: int, school_id: int) -> Optional[ImportJob]:
+        return self._get_one(job_id=job_id, school_id=school_id)
+
+    def create(self, *, school_id: int, file_path: str, created_by: Optional[int] = None) -> ImportJob:
+        job = ImportJob(school_id=school_id, file_path=file_path, created_by=created_by)
+        self.add(job)
+        self.commit()
+        return job
+
+    def claim_next(self, worker_id: str) -> Optional[ImportJob]:
+        """Atomically move the oldest queued job to running for this worker.
+
+        The conditional UPDATE is the lock: if another worker claimed the
+        same row first, rowcount is 0 and the next candidate is tried.
+        """
+        while True:
+            job_id = self.session.execute(
+                select(ImportJob.job_id)
+                .where(ImportJob.status == ImportJobStatus.queued)
+                .order_by(ImportJob.job_id.asc())
+                .limit(1)
+            ).scalar_one_or_none()
+            if job_id is None:
+                self.rollback()
+                return None
+
+            now = datetime.now()
+            result = self.session.execute(
+                update(ImportJob)
+                .where(ImportJob.job_id == job_id, ImportJob.status == ImportJobStatus.queued)
+                .values(
+                    status=ImportJobStatus.running,
+                    worker_id=worker_id,
+                    started_at=now,
+                    heartbeat_at=now,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            self.commit()
+            if result.rowcount == 1:
+                return self.get_by_id(job_id)
+
+    def requeue_stale(self, older_than: timedelta) -> int:
+        """Requeue running jobs whose worker has not reported for OLDER_THAN.
+
+        Runners beat once per batch, so a long import that is still making
+        progress is never handed to a second worker.
+        """
+        result = self.session.execute(
+            update(ImportJob)
+            .where(
+                ImportJob.status == ImportJobStatus.running,
+                ImportJob.heartbeat_at < datetime.now() - older_than,
+            )
+            .values(status=ImportJobStatus.queued, worker_id=None, started_at=None, heartbeat_at=None)
+            .execution_options(synchronize_session=False)
+        )
+        self.commit()
+        return result.rowcount
+
+    def update_progress(
+        self,
+        job: ImportJob,
+        *,
+        processed_rows: int,
+        created_count: int,
+        errors: list[str],
+    ) -> None:
+        job.processed_rows = processed_rows
+        job.created_count = created_count
+        job.failed_count = len(errors)
+        job.errors = json.dumps(errors, ensure_ascii=False)
+        job.heartbeat_at = datetime.now()
+        self.commit()
+
+    def get_created(self, job: ImportJob) -> list[dict[str, str]]:
+        return json.loads(job.result) if job.result else []
+
+    def record_created(self, job: ImportJob, accounts: list[dict[str, str]]) -> None:
+        """Append created accounts; committed by the caller with the inserts."""
+        job.result = json.dumps(self.get_created(job) + accounts, ensure_ascii=False)
+
+    def finish(
+        self,
+        job: ImportJob,
+        *,
+        status: ImportJobStatus,
+        message: Optional[str] = None,
+    ) -> None:
+        job.status = status
+        job.message = message
+        job.file_path = None
+        job.finished_at = datetime.now()
+        self.commit()
+
+    def purge_results(self, older_than: timedelta) -> int:
+        """Drop the created accounts of jobs finished more than OLDER_THAN ago."""
+        result = self.session.execute(
+            update(ImportJob)
+            .where(ImportJob.result.is_not(None), ImportJob.finished_at < datetime.now() - older_than)
+            .values(result=None)
+            .execution_options(synchronize_session=False)
+        )
+        self.commit()
+        return result.rowcount
+
+
+__all__ = ["ImportJobRepository"]
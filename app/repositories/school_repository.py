@@ -2,6 +2,7 @@ from typing import Optional
 
 from .base_repository import BaseRepository
 from ..models import School
+from ..signals import school_changed
 
 
 class SchoolRepository(BaseRepository):
@@ -49,6 +50,7 @@ class SchoolRepository(BaseRepository):
                 updated = True
             if updated:
                 self.commit()
+                school_changed.send(self, school_id=school_id)
         return school
 
     def regenerate_invite_code(self, school_id: int) -> Optional[str]:
@@ -63,4 +65,5 @@ class SchoolRepository(BaseRepository):
             return False
         self.session.delete(school)
         self.commit()
+        school_changed.send(self, school_id=school_id)
         return True
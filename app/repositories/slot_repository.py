@@ -1,11 +1,62 @@
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import Iterable, Optional, Sequence
 
-from sqlalchemy import select
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload
 
 from .base_repository import BaseRepository
 from ..models import BuildingBooking, Event, Parent, Slot, SlotStatus, Teacher
+from ..signals import slot_booked, slot_released
+
+
+SLOT_UNIQUE_CONSTRAINT = 'uq_slots_event_teacher_start'
+
+
+@dataclass(frozen=True)
+class BookingRequest:
+    teacher_id: int
+    start_time: datetime
+    end_time: datetime
+
+
+@dataclass(frozen=True)
+class BookingResult:
+    """Outcome of one BookingRequest of a batch.
+
+    ``error`` is None when booked, otherwise ``taken`` (the slot is held;
+    try_book does not look up by whom), ``mine`` (the parent already holds
+    it, ``slot`` is that booking), ``overlap`` (the parent is busy at that
+    time) or ``skipped`` (the batch was all-or-nothing and another item
+    failed).
+    """
+
+    request: BookingRequest
+    slot: Optional[Slot] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _is_slot_conflict(exc: IntegrityError) -> bool:
+    """Whether EXC is a violation of uq_slots_event_teacher_start.
+
+    MySQL names the key in its message; SQLite lists the columns instead.
+    """
+    message = str(exc.orig)
+    constraint = next(
+        constraint for constraint in Slot.__table__.constraints
+        if constraint.name == SLOT_UNIQUE_CONSTRAINT
+    )
+    columns = ', '.join(f'{Slot.__tablename__}.{column.name}' for column in constraint.columns)
+    return SLOT_UNIQUE_CONSTRAINT in message or columns in message
+
+
+def _overlaps(start_time: datetime, end_time: datetime, intervals: Iterable[tuple[datetime, datetime]]) -> bool:
+    return any(start_time < busy_end and busy_start < end_time for busy_start, busy_end in intervals)
 
 
 class SlotRepository(BaseRepository[Slot]):
@@ -28,6 +79,30 @@ class SlotRepository(BaseRepository[Slot]):
         result = self.session.execute(stmt)
         return list(result.scalars().unique())
 
+    def get_booking_cells(self, event_ids: Iterable[int]) -> list[tuple]:
+        stmt = select(
+            Slot.slot_id,
+            Slot.event_id,
+            Slot.teacher_id,
+            Slot.parent_id,
+            Slot.start_time,
+            Slot.end_time,
+            Slot.status,
+        ).where(Slot.event_id.in_(set(event_ids)))
+        return list(self.session.execute(stmt).tuples())
+
+    def get_booking_versions(self, event_ids: Iterable[int]) -> dict[int, tuple[int, int]]:
+        # Slot ids only grow, so (count, max id) changes on every insert and delete.
+        stmt = (
+            select(Slot.event_id, func.count(Slot.slot_id), func.max(Slot.slot_id))
+            .where(Slot.event_id.in_(set(event_ids)))
+            .group_by(Slot.event_id)
+        )
+        return {
+            event_id: (count, max_slot_id)
+            for event_id, count, max_slot_id in self.session.execute(stmt)
+        }
+
     def get_booked_for_parent(self, parent_id: int) -> list[Slot]:
         stmt = (
             select(Slot)
@@ -84,11 +159,129 @@ class SlotRepository(BaseRepository[Slot]):
         )
         self.add(slot)
         self.commit()
+        slot_booked.send(self, slot=slot)
         return slot
 
+    def try_book(
+        self,
+        *,
+        event_id: int,
+        teacher_id: int,
+        parent_id: int,
+        start_time: datetime,
+        end_time: datetime,
+    ) -> BookingResult:
+        # The unique (event_id, teacher_id, start_time) index decides who gets
+        # the slot; losers of the race get 'taken' instead of a duplicate row.
+        # Telling a repeat booking by the same parent apart is left to callers
+        # that already hold the event's bookings, so a conflict costs no SELECT.
+        request = BookingRequest(teacher_id=teacher_id, start_time=start_time, end_time=end_time)
+        try:
+            slot = self.create_booked(
+                event_id=event_id,
+                teacher_id=teacher_id,
+                parent_id=parent_id,
+                start_time=start_time,
+                end_time=end_time,
+            )
+        except IntegrityError as exc:
+            self.rollback()
+            if not _is_slot_conflict(exc):
+                raise
+            return BookingResult(request=request, error='taken')
+        return BookingResult(request=request, slot=slot)
+
+    def get_parent_bookings(
+        self,
+        parent_id: int,
+        start_time: datetime,
+        end_time: datetime,
+    ) -> list[Slot]:
+        stmt = select(Slot).where(
+            Slot.parent_id == parent_id,
+            Slot.status == SlotStatus.booked,
+            Slot.start_time < end_time,
+            Slot.end_time > start_time,
+        )
+        return list(self.session.execute(stmt).scalars())
+
+    def book_many(
+        self,
+        *,
+        event_id: int,
+        parent_id: int,
+        requests: Sequence[BookingRequest],
+        atomic: bool = True,
+    ) -> list[BookingResult]:
+        """Book REQUESTS for one parent in a single transaction.
+
+        Each insert runs in a savepoint, so a slot lost to another parent
+        only undoes that item. With ATOMIC, any failure rolls back the whole
+        batch and the remaining items are reported as ``skipped``.
+        """
+        if not requests:
+            return []
+
+        booked = self.get_parent_bookings(
+            parent_id,
+            min(request.start_time for request in requests),
+            max(request.end_time for request in requests),
+        )
+        busy = [(slot.start_time, slot.end_time) for slot in booked]
+        mine = {(slot.teacher_id, slot.start_time): slot for slot in booked if slot.event_id == event_id}
+        results: list[BookingResult] = []
+        for request in requests:
+            if atomic and any(not result.ok for result in results):
+                results.append(BookingResult(request=request, error='skipped'))
+                continue
+            existing = mine.get((request.teacher_id, request.start_time))
+            if existing is not None:
+                results.append(BookingResult(request=request, slot=existing, error='mine'))
+                continue
+            if _overlaps(request.start_time, request.end_time, busy):
+                results.append(BookingResult(request=request, error='overlap'))
+                continue
+
+            slot = Slot(
+                event_id=event_id,
+                teacher_id=request.teacher_id,
+                parent_id=parent_id,
+                start_time=request.start_time,
+                end_time=request.end_time,
+                status=SlotStatus.booked,
+            )
+            try:
+                with self.session.begin_nested():
+                    self.session.add(slot)
+            except IntegrityError as exc:
+                if not _is_slot_conflict(exc):
+                    raise
+                results.append(BookingResult(request=request, error='taken'))
+                continue
+            busy.append((request.start_time, request.end_time))
+            results.append(BookingResult(request=request, slot=slot))
+
+        if atomic and any(not result.ok for result in results):
+            # Keep the parent's existing slots loaded past the rollback.
+            for result in results:
+                if result.error == 'mine' and result.slot in self.session:
+                    self.session.expunge(result.slot)
+            self.rollback()
+            return [
+                result if result.error else BookingResult(request=result.request, error='skipped')
+                for result in results
+            ]
+
+        self.commit()
+        for result in results:
+            if result.slot is not None:
+                slot_booked.send(self, slot=result.slot)
+        return results
+
     def delete_slot(self, slot: Slot) -> None:
         self.session.delete(slot)
         self.commit()
+        slot_released.send(self, slot=slot)
 
 
-__all__ = ["SlotRepository"]
+__all__ = ["BookingRequest", "BookingResult", "SlotRepository"]
@@ -1,7 +1,12 @@
-from typing import Optional
+from dataclasses import dataclass
+from typing import Iterable, Optional, Sequence
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import joinedload, lazyload, with_polymorphic
 
 from .base_repository import BaseRepository
-from ..models import User, Admin, Parent, Teacher
+from ..models import User, Admin, Parent, Teacher, normalize_email
+from ..signals import user_changed
 
 ROLE_MODEL_MAP = {
     "teacher": Teacher,
@@ -9,6 +14,18 @@ ROLE_MODEL_MAP = {
     "admin": Admin,
 }
 
+BULK_BATCH_SIZE = 500
+
+
+@dataclass(frozen=True)
+class NewUser:
+    email: str
+    password_hash: str
+    first_name: str
+    last_name: str
+    middle_name: Optional[str] = None
+
+
 class UserRepository(BaseRepository):
     model = User
     default_order_by = (
@@ -21,8 +38,58 @@ class UserRepository(BaseRepository):
     def get_by_id(self, user_id: int) -> Optional[User]:
         return self._get_one(user_id=user_id)
 
+    def get_for_session(self, user_id: int) -> Optional[User]:
+        """Load a user with its role columns and school in one statement."""
+        user_entity = with_polymorphic(User, [Teacher, Parent, Admin])
+        stmt = (
+            select(user_entity)
+            .options(
+                joinedload(user_entity.school),
+                # Teacher.events is selectin-loaded by default; the session
+                # user never needs it.
+                lazyload(user_entity.Teacher.events),
+            )
+            .where(user_entity.user_id == user_id)
+        )
+        return self.session.execute(stmt).unique().scalar_one_or_none()
+
     def get_by_email(self, email: str) -> Optional[User]:
-        return self._get_one(email=email)
+        return self._get_one(email=normalize_email(email))
+
+    def get_existing_emails(self, emails: Iterable[str]) -> set[str]:
+        candidates = sorted({normalize_email(email) for email in emails})
+        existing: set[str] = set()
+        for start in range(0, len(candidates), BULK_BATCH_SIZE):
+            chunk = candidates[start:start + BULK_BATCH_SIZE]
+            stmt = select(User.email).where(User.email.in_(chunk))
+            existing.update(self.session.execute(stmt).scalars())
+        return existing
+
+    def get_by_emails(self, emails: Iterable[str]) -> list[User]:
+        candidates = sorted({normalize_email(email) for email in emails})
+        users: list[User] = []
+        for start in range(0, len(candidates), BULK_BATCH_SIZE):
+            chunk = candidates[start:start + BULK_BATCH_SIZE]
+            users.extend(self.session.execute(select(User).where(User.email.in_(chunk))).scalars())
+        return users
+
+    def get_teachers_for_school(self, school_id: int, *, search: Optional[str] = None) -> list[Teacher]:
+        # The role predicate is implied by the join, but spelling it out lets
+        # ix_users_school_role_name serve both the filter and the order.
+        stmt = (
+            select(Teacher)
+            .where(Teacher.school_id == school_id, Teacher.role == 'teacher')
+            .order_by(Teacher.last_name.asc(), Teacher.first_name.asc(), Teacher.middle_name.asc())
+        )
+        if search:
+            like_pattern = f"%{search.lower()}%"
+            stmt = stmt.where(
+                Teacher.email.like(like_pattern)
+                | func.lower(Teacher.first_name).like(like_pattern)
+                | func.lower(Teacher.last_name).like(like_pattern)
+                | func.lower(func.coalesce(Teacher.middle_name, '')).like(like_pattern)
+            )
+        return list(self.session.execute(stmt).scalars())
 
     def get_all(self, sort: bool = False) -> list[User]:
         order_by = self.default_order_by if sort else ()
@@ -56,6 +123,58 @@ class UserRepository(BaseRepository):
         self.commit()
         return user
 
+    def create_many(
+        self,
+        users: Sequence[NewUser],
+        *,
+        role: str,
+        school_id: Optional[int] = None,
+        batch_size: int = BULK_BATCH_SIZE,
+    ) -> dict[str, int]:
+        """Insert users in multi-row batches inside one transaction.
+
+        Returns the new ids by email. Nothing is committed if any batch
+        fails; the caller is expected to roll back.
+        """
+        model_cls = ROLE_MODEL_MAP.get(role, User)
+        users_table = User.__table__
+        role_table = model_cls.__table__ if model_cls is not User else None
+        role_key = role_table.primary_key.columns.values()[0].name if role_table is not None else None
+
+        created: dict[str, int] = {}
+        for start in range(0, len(users), batch_size):
+            batch = users[start:start + batch_size]
+            self.session.execute(
+                insert(users_table).values([
+                    {
+                        # Core inserts skip the User.email validator.
+                        "email": normalize_email(user.email),
+                        "password_hash": user.password_hash,
+                        "first_name": user.first_name,
+                        "middle_name": user.middle_name,
+                        "last_name": user.last_name,
+                        "school_id": school_id,
+                        "role": role,
+                    }
+                    for user in batch
+                ])
+            )
+            # MySQL has no INSERT ... RETURNING, so read the generated keys
+            # back through the unique email column.
+            emails = [normalize_email(user.email) for user in batch]
+            id_rows = self.session.execute(
+                select(users_table.c.email, users_table.c.user_id).where(users_table.c.email.in_(emails))
+            )
+            batch_ids = {email: user_id for email, user_id in id_rows}
+            if role_table is not None:
+                self.session.execute(
+                    insert(role_table).values([{role_key: batch_ids[email]} for email in emails])
+                )
+            created.update(batch_ids)
+
+        self.commit()
+        return created
+
     def update(
         self,
         user_id: int,
@@ -81,6 +200,7 @@ class UserRepository(BaseRepository):
                 updated = True
             if updated:
                 self.commit()
+                user_changed.send(self, user_id=user_id)
         return user
 
     def delete(self, user_id: int) -> bool:
@@ -89,6 +209,7 @@ class UserRepository(BaseRepository):
             return False
         self.session.delete(user)
         self.commit()
+        user_changed.send(self, user_id=user_id)
         return True
 
     def get_authorized_user(self, email: str, password: str) -> Optional[User]:
@@ -102,4 +223,5 @@ class UserRepository(BaseRepository):
         if user:
             user.set_password(new_password)
             self.commit()
+            user_changed.send(self, user_id=user_id)
         return user
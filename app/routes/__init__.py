@@ -1,14 +1,17 @@
 from flask import Blueprint
 
 from .navigation import get_pages
+from .conditional import not_modified, page_etag, with_etag
+from .event_statuses import refresh_event_statuses
 
 bp = Blueprint('main', __name__)
 
 from .general import routes as general_routes
+from .general import stream as general_stream
 from .admin import teachers as admin_teachers
 from .admin import buildings as admin_buildings
 from .admin import events as admin_events
 from .parent import routes as parent_routes
 from .teacher import routes as teacher_routes
 
-__all__ = ['bp', 'get_pages']
+__all__ = ['bp', 'get_pages', 'not_modified', 'page_etag', 'refresh_event_statuses', 'with_etag']
@@ -2,22 +2,22 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Iterable, Optional
+from typing import Optional
 
 from flask import abort, current_app, flash, redirect, render_template, request, url_for
 from flask.typing import ResponseReturnValue
 from flask_login import current_user, login_required
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import select
 
 from app.auth import check_rights
 from app.auth.policies import EventsPolicy
-from app.models import Event, EventStatus, SlotStatus, Teacher, db
-from app.repositories import EventRepository, get_repository
-from app.routes import bp, get_pages
+from app.models import Event, EventStatus, Teacher
+from app.repositories import EventCursor, EventRepository, EventSearch, EventStats, UserRepository, get_repository
+from app.routes import bp, get_pages, refresh_event_statuses
 
 
 event_repository: EventRepository = get_repository('events')
+user_repository: UserRepository = get_repository('users')
 
 
 @dataclass(frozen=True)
@@ -117,19 +117,8 @@ def build_meta_items(event: Event) -> tuple[MetaItem, ...]:
     return tuple(meta)
 
 
-def build_stats(event: Event) -> tuple[StatItem, ...]:
-    active_slots = [slot for slot in event.slots if slot.status != SlotStatus.cancelled]
-    slot_count = len(active_slots)
-    teacher_count = len(getattr(event, 'teachers', []) or [])
-    if teacher_count == 0:
-        teacher_count = len({slot.teacher_id for slot in active_slots if slot.teacher_id})
-    parent_count = len({slot.parent_id for slot in active_slots if slot.parent_id})
-    building_count = len({booking.building_id for booking in event.building_bookings})
-    classroom_count = len({
-        (booking.building_id, booking.classroom)
-        for booking in event.building_bookings
-        if booking.classroom
-    })
+def build_stats(event: Event, stats_row: EventStats) -> tuple[StatItem, ...]:
+    teacher_count = stats_row.teacher_count or stats_row.slot_teacher_count
     duration_minutes = (
         event.duration_minutes
         if getattr(event, 'duration_minutes', None) is not None
@@ -140,13 +129,13 @@ def build_stats(event: Event) -> tuple[StatItem, ...]:
         StatItem(label='Консультаций', value=str(event.consultations_count or 0)),
         StatItem(label='Длительность, мин', value=str(duration_minutes)),
         StatItem(label='Консультация, мин', value=str(event.consultation_duration_minutes or 0)),
-        StatItem(label='Записей', value=str(slot_count)),
+        StatItem(label='Записей', value=str(stats_row.slot_count)),
         StatItem(label='Педагогов', value=str(teacher_count)),
-        StatItem(label='Родителей', value=str(parent_count)),
-        StatItem(label='Зданий', value=str(building_count)),
+        StatItem(label='Родителей', value=str(stats_row.parent_count)),
+        StatItem(label='Зданий', value=str(stats_row.building_count)),
     ]
 
-    stats.append(StatItem(label='Аудиторий', value=str(classroom_count)))
+    stats.append(StatItem(label='Аудиторий', value=str(stats_row.classroom_count)))
     return tuple(stats)
 
 
@@ -214,7 +203,13 @@ def build_menu_config(event: Event, *, can_edit: bool, can_delete: bool) -> Opti
     }
 
 
-def build_event_view_model(event: Event, *, can_edit: bool, can_delete: bool) -> EventViewModel:
+def build_event_view_model(
+    event: Event,
+    stats_row: EventStats,
+    *,
+    can_edit: bool,
+    can_delete: bool,
+) -> EventViewModel:
     status_label = STATUS_LABELS.get(event.status, event.status.value.title())
     duration_minutes = (
         event.duration_minutes
@@ -234,7 +229,7 @@ def build_event_view_model(event: Event, *, can_edit: bool, can_delete: bool) ->
         status_modifier=event.status.value,
         status_hint=build_status_hint(event),
         meta_items=build_meta_items(event),
-        stats=build_stats(event),
+        stats=build_stats(event, stats_row),
         bookings=build_bookings(event),
         consultations_count=event.consultations_count or 0,
         duration_minutes=duration_minutes,
@@ -245,43 +240,6 @@ def build_event_view_model(event: Event, *, can_edit: bool, can_delete: bool) ->
     )
 
 
-def matches_search(view_model: EventViewModel, query_lower: str) -> bool:
-    if query_lower in str(view_model.event_id):
-        return True
-    if query_lower and query_lower in view_model.title_text.lower():
-        return True
-    if query_lower and query_lower in view_model.period_text.lower():
-        return True
-    if query_lower and query_lower in view_model.status_label.lower():
-        return True
-    if query_lower and query_lower in str(view_model.consultations_count):
-        return True
-    if query_lower and query_lower in str(view_model.duration_minutes):
-        return True
-    if query_lower and query_lower in str(view_model.consultation_duration_minutes):
-        return True
-    for teacher_name in view_model.teacher_names:
-        if query_lower in teacher_name.lower():
-            return True
-
-    for meta in view_model.meta_items:
-        if query_lower in meta.label.lower() or query_lower in meta.value.lower():
-            return True
-
-    for stat in view_model.stats:
-        if query_lower in stat.label.lower() or query_lower in stat.value.lower():
-            return True
-
-    for booking in view_model.bookings:
-        if query_lower in booking.building.lower():
-            return True
-        for room in booking.rooms:
-            if query_lower in room.lower():
-                return True
-
-    return False
-
-
 @bp.route('/events', methods=['GET', 'POST'])
 @login_required
 @check_rights('events', 'get_page')
@@ -298,12 +256,7 @@ def events() -> ResponseReturnValue:
     teacher_map: dict[int, Teacher] = {}
     teacher_options: list[dict[str, str]] = []
     if school:
-        teacher_stmt = (
-            select(Teacher)
-            .where(Teacher.school_id == school.school_id)
-            .order_by(Teacher.last_name.asc(), Teacher.first_name.asc(), Teacher.middle_name.asc())
-        )
-        teachers = db.session.execute(teacher_stmt).scalars().all()
+        teachers = user_repository.get_teachers_for_school(school.school_id)
         teacher_map = {teacher.teacher_id: teacher for teacher in teachers}
         teacher_options = [
             {
@@ -520,20 +473,27 @@ def events() -> ResponseReturnValue:
                     return redirect(url_for('main.events'))
 
     view_models: list[EventViewModel] = []
+    next_cursor: Optional[str] = None
     if school:
-        event_repository.refresh_statuses_for_school(school.school_id)
-        raw_events: Iterable[Event] = event_repository.get_for_school(school.school_id)
+        refresh_event_statuses(school.school_id)
+        page = event_repository.get_for_school(
+            school.school_id,
+            search=EventSearch.parse(search_query),
+            cursor=EventCursor.decode(request.args.get('cursor')),
+            limit=current_app.config.get('EVENTS_PAGE_SIZE', 20),
+        )
+        raw_events = page.events
+        next_cursor = page.next_cursor
+        event_stats = event_repository.get_stats(event.event_id for event in raw_events)
         view_models = [
-            build_event_view_model(event, can_edit=can_edit, can_delete=can_delete)
+            build_event_view_model(
+                event,
+                event_stats.get(event.event_id) or EventStats(event_id=event.event_id),
+                can_edit=can_edit,
+                can_delete=can_delete,
+            )
             for event in raw_events
         ]
-        if search_query:
-            search_lower = search_query.lower()
-            view_models = [
-                view_model
-                for view_model in view_models
-                if matches_search(view_model, search_lower)
-            ]
 
     if not form_data:
         form_data = {
@@ -551,6 +511,7 @@ def events() -> ResponseReturnValue:
         page_title='Мероприятия',
         pages=get_pages(),
         events=view_models,
+        next_cursor=next_cursor,
         search_query=search_query,
         can_manage_events=can_create,
         event_form_data=form_data,
@@ -1,30 +1,31 @@
-import secrets
-import string
+import json
+from datetime import datetime
 from typing import Optional
 
 from flask import abort, current_app, flash, jsonify, redirect, render_template, request, url_for
 from flask.typing import ResponseReturnValue
 from flask_login import current_user, login_required
-from sqlalchemy import func, select
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
-
-from openpyxl import load_workbook
+from werkzeug.exceptions import RequestEntityTooLarge
 
 from app.auth import check_rights
+from app.auth.password_setup import password_setup_link_max_age, password_setup_links
 from app.auth.register import _parse_full_name
 from app.auth.policies import TeachersPolicy
-from app.models import Teacher, User, db
-from app.repositories import UserRepository, get_repository
+from app.models import ImportJobStatus, Teacher, db
+from app.repositories import ImportJobRepository, UserRepository, get_repository
 from app.routes import bp, get_pages
+from app.services.import_jobs import enqueue_teacher_import
+from app.services.teacher_import import (
+    TeacherImportError,
+    check_upload_size,
+    import_limits,
+    upload_body_limit,
+    upload_too_large_message,
+)
 
 user_repository: UserRepository = get_repository('users')
-
-
-def _generate_password(length: int = 12) -> str:
-    alphabet = string.ascii_letters + string.digits
-    if length < 8:
-        length = 8
-    return ''.join(secrets.choice(alphabet) for _ in range(length))
+import_job_repository: ImportJobRepository = get_repository('import_jobs')
 
 
 @bp.route('/teachers', methods=['GET', 'POST'])
@@ -128,10 +129,9 @@ def teachers() -> ResponseReturnValue:
                     errors.append('Учитель не найден или не относится к вашей школе')
 
         if not errors and email_value:
-            stmt = select(User).where(func.lower(User.email) == email_lower)
-            if form_type == 'update' and teacher:
-                stmt = stmt.where(User.user_id != teacher.user_id)
-            existing_user = db.session.execute(stmt).scalar_one_or_none()
+            existing_user = user_repository.get_by_email(email_lower)
+            if form_type == 'update' and teacher and existing_user and existing_user.user_id == teacher.user_id:
+                existing_user = None
             if existing_user:
                 errors.append('Пользователь с такой электронной почтой уже существует')
 
@@ -176,22 +176,7 @@ def teachers() -> ResponseReturnValue:
     teachers_list: list[Teacher] = []
 
     if school:
-        stmt = (
-            select(Teacher)
-            .where(Teacher.school_id == school.school_id)
-            .order_by(Teacher.last_name.asc(), Teacher.first_name.asc(), Teacher.middle_name.asc())
-        )
-
-        if search_query:
-            like_pattern = f"%{search_query.lower()}%"
-            stmt = stmt.where(
-                func.lower(Teacher.email).like(like_pattern)
-                | func.lower(Teacher.first_name).like(like_pattern)
-                | func.lower(Teacher.last_name).like(like_pattern)
-                | func.lower(func.coalesce(Teacher.middle_name, '')).like(like_pattern)
-            )
-
-        teachers_list = db.session.execute(stmt).scalars().all()
+        teachers_list = user_repository.get_teachers_for_school(school.school_id, search=search_query)
 
     return render_template(
         'admin/teachers.html',
@@ -218,7 +203,17 @@ def teachers_import() -> ResponseReturnValue:
             'message': 'Невозможно определить школу для привязки учителей. Обратитесь к администратору системы',
         }), 400
 
-    upload = request.files.get('file')
+    max_bytes, _ = import_limits()
+    # Parsing stops as soon as the body outgrows the limit, before it is spooled.
+    request.max_content_length = upload_body_limit(max_bytes)
+    try:
+        upload = request.files.get('file')
+    except RequestEntityTooLarge:
+        return jsonify({
+            'success': False,
+            'message': upload_too_large_message(max_bytes),
+        }), 413
+
     if not upload or not upload.filename:
         return jsonify({
             'success': False,
@@ -233,139 +228,91 @@ def teachers_import() -> ResponseReturnValue:
         }), 400
 
     try:
-        workbook = load_workbook(upload, data_only=True)
-    except Exception:  # pragma: no cover - handled by error response
-        current_app.logger.exception('Failed to load teachers workbook')
+        check_upload_size(upload.stream, max_bytes)
+    except TeacherImportError as exc:
         return jsonify({
             'success': False,
-            'message': 'Не удалось прочитать файл. Убедитесь, что это корректный Excel-документ (.xlsx)',
+            'message': str(exc),
         }), 400
 
     try:
-        worksheet = workbook.active
-        rows = [tuple(row) for row in worksheet.iter_rows(values_only=True)]
-    finally:
-        workbook.close()
-
-    if not rows:
-        return jsonify({
-            'success': False,
-            'message': 'Файл пуст. Добавьте данные об учителях и повторите попытку',
-        }), 400
-
-    header_row = rows[0]
-    normalized_header = [str(cell).strip().lower() if isinstance(cell, str) else '' for cell in header_row]
-    has_header = 'email' in normalized_header and 'full_name' in normalized_header
-
-    if has_header:
-        email_index = normalized_header.index('email')
-        fullname_index = normalized_header.index('full_name')
-        data_rows = rows[1:]
-        row_start_index = 2
-    else:
-        email_index = 0
-        fullname_index = 1
-        data_rows = rows
-        row_start_index = 1
-
-    if email_index == fullname_index:
+        job = enqueue_teacher_import(upload.stream, school_id=school.school_id, created_by=current_user.user_id)
+    except (OSError, SQLAlchemyError):
+        current_app.logger.exception('Failed to queue teachers import')
         return jsonify({
             'success': False,
-            'message': 'Файл должен содержать отдельные колонки для email и ФИО учителя',
-        }), 400
-
-    created_teachers: list[dict[str, str]] = []
-    errors: list[str] = []
-    seen_emails: set[str] = set()
-
-    for offset, row in enumerate(data_rows, start=row_start_index):
-        row_values = list(row)
-        email_raw = row_values[email_index] if len(row_values) > email_index else None
-        full_name_raw = row_values[fullname_index] if len(row_values) > fullname_index else None
+            'message': 'Не удалось поставить импорт в очередь — попробуйте ещё раз позже',
+        }), 500
 
-        if email_raw is None and full_name_raw is None:
-            continue
-
-        email_value = str(email_raw).strip() if email_raw is not None else ''
-        full_name_value = str(full_name_raw).strip() if full_name_raw is not None else ''
-
-        if not email_value:
-            errors.append(f'Строка {offset}: не указана электронная почта учителя')
-            continue
+    return jsonify({
+        'success': True,
+        'job_id': job.job_id,
+        'status': job.status.value,
+        'status_url': url_for('main.teachers_import_status', job_id=job.job_id),
+    }), 202
 
-        email_lower = email_value.lower()
-        if (
-            '@' not in email_lower
-            or email_lower.startswith('@')
-            or email_lower.endswith('@')
-            or ' ' in email_value
-            or '.' not in email_lower.split('@', 1)[-1]
-        ):
-            errors.append(f'Строка {offset}: некорректный адрес электронной почты — "{email_value}"')
-            continue
 
-        if email_lower in seen_emails:
-            errors.append(f'Строка {offset}: адрес "{email_value}" уже встречался в файле. Дубликат пропущен')
-            continue
+@bp.route('/teachers/import/<int:job_id>', methods=['GET'])
+@login_required
+@check_rights('teachers', 'create')
+def teachers_import_status(job_id: int) -> ResponseReturnValue:
+    school = current_user.school
+    job = import_job_repository.get_for_school(job_id, school.school_id) if school else None
+    if job is None:
+        return jsonify({
+            'success': False,
+            'message': 'Задача импорта не найдена',
+        }), 404
+
+    errors = json.loads(job.errors) if job.errors else []
+    payload: dict[str, object] = {
+        'job_id': job.job_id,
+        'status': job.status.value,
+        'done': job.status in (ImportJobStatus.completed, ImportJobStatus.failed),
+        'processed': job.processed_rows,
+        'created': job.created_count,
+        'failed': job.failed_count,
+        'errors': errors,
+    }
+    if job.status == ImportJobStatus.failed:
+        payload.update(success=False, message=job.message or 'Не удалось загрузить учителей')
+    elif job.status == ImportJobStatus.completed:
+        if job.created_count:
+            # Every poll gets the links, until they would have expired anyway.
+            links_alive = job.finished_at and job.finished_at + password_setup_link_max_age() > datetime.now()
+            teachers = import_job_repository.get_created(job) if links_alive else []
+            links = password_setup_links(teacher['email'] for teacher in teachers)
+            payload.update(
+                success=True,
+                message=job.message,
+                count=job.created_count,
+                teachers=[dict(teacher, link=links.get(teacher['email'])) for teacher in teachers],
+            )
+        else:
+            payload.update(
+                success=False,
+                message=job.message or 'Учителя не были созданы',
+                errors=errors or ['Файл не содержит корректных данных для импорта'],
+            )
+    return jsonify(payload)
 
-        seen_emails.add(email_lower)
 
-        if not full_name_value:
-            errors.append(f'Строка {offset}: не указано ФИО учителя')
-            continue
-
-        try:
-            first_name, last_name, middle_name = _parse_full_name(full_name_value)
-        except ValueError as exc:
-            errors.append(f'Строка {offset}: {exc}')
-            continue
-
-        stmt = select(User).where(func.lower(User.email) == email_lower)
-        existing_user = db.session.execute(stmt).scalar_one_or_none()
-        if existing_user:
-            errors.append(f'Строка {offset}: пользователь с электронной почтой "{email_value}" уже существует')
-            continue
-
-        password = _generate_password()
-
-        try:
-            user_repository.create(
-                email=email_lower,
-                password=password,
-                first_name=first_name,
-                last_name=last_name,
-                middle_name=middle_name,
-                school_id=school.school_id,
-                role='teacher',
-            )
-        except IntegrityError:
-            user_repository.rollback()
-            errors.append(f'Строка {offset}: пользователь с электронной почтой "{email_value}" уже существует')
-            continue
-        except SQLAlchemyError:
-            user_repository.rollback()
-            current_app.logger.exception('Failed to create teacher from import (row %s)', offset)
-            errors.append(f'Строка {offset}: не удалось создать учителя из-за ошибки базы данных')
-            continue
-
-        recorded_full_name = ' '.join(filter(None, [last_name, first_name, middle_name]))
-        created_teachers.append({
-            'full_name': recorded_full_name,
-            'email': email_lower,
-            'password': password,
-        })
-
-    if not created_teachers:
+@bp.route('/teachers/<int:teacher_id>/password-link', methods=['POST'])
+@login_required
+@check_rights('teachers', 'create')
+def teacher_password_link(teacher_id: int) -> ResponseReturnValue:
+    """A fresh password setup link, e.g. when the one from the import got lost."""
+    school = current_user.school
+    teacher = db.session.get(Teacher, teacher_id)
+    if not teacher or not school or teacher.school_id != school.school_id:
         return jsonify({
             'success': False,
-            'message': 'Учителя не были созданы',
-            'errors': errors or ['Файл не содержит корректных данных для импорта'],
-        }), 400
+            'message': 'Учитель не найден или не относится к вашей школе',
+        }), 404
 
+    link = password_setup_links([teacher.email]).get(teacher.email)
     return jsonify({
         'success': True,
-        'message': f'Добавлено учителей: {len(created_teachers)}',
-        'count': len(created_teachers),
-        'errors': errors,
-        'teachers': created_teachers,
+        'email': teacher.email,
+        'link': link,
     })
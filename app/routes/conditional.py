@@ -0,0 +1,61 @@
+import hashlib
+import time
+from typing import Any
+
+from flask import Response, current_app, make_response, request, session
+from flask.typing import ResponseReturnValue
+from flask_login import current_user
+
+DEFAULT_ETAG_TIME_BUCKET_SECONDS = 60
+
+
+def page_etag(*parts: Any) -> str:
+    """Validator for a page rendered for the current user from PARTS.
+
+    Besides the data versions passed in, the tag covers who is looking
+    (names and school are in the page chrome), pending flash messages and
+    a time bucket, since labels like "Через 5 мин." and closed slots move
+    with the clock.
+    """
+    bucket_seconds = current_app.config.get('ETAG_TIME_BUCKET_SECONDS', DEFAULT_ETAG_TIME_BUCKET_SECONDS)
+    school = getattr(current_user, 'school', None)
+    user_part = (
+        getattr(current_user, 'user_id', None),
+        getattr(current_user, 'role', None),
+        getattr(current_user, 'email', None),
+        getattr(current_user, 'last_name', None),
+        getattr(current_user, 'first_name', None),
+        getattr(current_user, 'middle_name', None),
+        getattr(school, 'school_name', None),
+    )
+    payload = repr((
+        request.full_path,
+        user_part,
+        session.get('_flashes'),
+        int(time.time() // max(1, int(bucket_seconds))),
+        parts,
+    ))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def not_modified(etag: str) -> Response | None:
+    """The 304 answer to a matching If-None-Match, before any rendering."""
+    # A pending flash message has to be rendered, whatever the client has.
+    if session.get('_flashes'):
+        return None
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = Response(status=304)
+    return with_etag(response, etag)
+
+
+def with_etag(response: ResponseReturnValue, etag: str) -> Response:
+    response = make_response(response)
+    response.set_etag(etag, weak=True)
+    # Pages are per user: the browser may keep them but must revalidate.
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+__all__ = ['not_modified', 'page_etag', 'with_etag']
@@ -0,0 +1,17 @@
+from flask import current_app
+
+from ..repositories import EventRepository, get_repository
+
+
+event_repository: EventRepository = get_repository('events')
+
+
+def refresh_event_statuses(school_id: int) -> None:
+    # Deployments that run the status transitions elsewhere switch this off,
+    # so that page loads never write to the events table.
+    if not current_app.config.get('EVENT_STATUS_REFRESH_ON_REQUEST', True):
+        return
+    event_repository.refresh_statuses_for_school(school_id)
+
+
+__all__ = ['refresh_event_statuses']
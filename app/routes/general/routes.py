@@ -1,21 +1,24 @@
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Iterable, Mapping, Optional
+from typing import Iterable
 
 from flask import abort, current_app, flash, redirect, render_template, request, url_for
 from flask.typing import ResponseReturnValue
 from flask_login import current_user, login_required
-from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.auth import check_rights
 from app.auth.policies import AccountPolicy
-from app.models import Event, Slot, SlotStatus, Teacher, User, db
-from app.repositories import EventRepository, get_repository
-from app.routes import bp, get_pages
+from app.models import Event, Teacher, db
+from app.repositories import EventRepository, SlotRepository, UserRepository, get_repository
+from app.routes import bp, get_pages, not_modified, page_etag, refresh_event_statuses, with_etag
+from app.services import EventAvailability, availability_registry, booking_grid_cache
+from app.signals import school_changed, user_changed
 
 
 event_repository: EventRepository = get_repository('events')
+slot_repository: SlotRepository = get_repository('slots')
+user_repository: UserRepository = get_repository('users')
 
 
 @dataclass(frozen=True)
@@ -47,6 +50,13 @@ class DashboardEventView:
     is_future: bool
 
 
+DASHBOARD_SLOT_STATES: dict[str, str] = {
+    'free': 'free',
+    'booked': 'taken',
+    'cancelled': 'cancelled',
+}
+
+
 def format_time_range(start: datetime, end: datetime) -> str:
     return f"{start.strftime('%H:%M')}–{end.strftime('%H:%M')}"
 
@@ -55,43 +65,29 @@ def format_date(value: datetime) -> str:
     return value.strftime('%d.%m.%Y')
 
 
-def build_dashboard_slot(slot_start: datetime, slot_end: datetime, slot: Optional[Slot]) -> DashboardSlotView:
-    state = 'free'
-    if slot is not None:
-        if slot.status == SlotStatus.cancelled:
-            state = 'cancelled'
-        elif slot.parent_id is not None and slot.status == SlotStatus.booked:
-            state = 'taken'
+def build_dashboard_slot(slot_start: datetime, slot_end: datetime, state: str) -> DashboardSlotView:
     label = format_time_range(slot_start, slot_end)
-    return DashboardSlotView(label=label, state=state)
+    return DashboardSlotView(label=label, state=DASHBOARD_SLOT_STATES.get(state, 'free'))
 
 
 def build_dashboard_teacher(
     teacher: Teacher,
     slot_times: Iterable[tuple[datetime, datetime]],
-    existing_slots: Mapping[tuple[int, datetime], Slot],
+    availability: EventAvailability,
 ) -> DashboardTeacherView:
-    slot_items: list[DashboardSlotView] = []
-    taken_slots = 0
-
-    for slot_start, slot_end in slot_times:
-        slot = existing_slots.get((teacher.teacher_id, slot_start))
-        slot_view = build_dashboard_slot(slot_start, slot_end, slot)
-        slot_items.append(slot_view)
-        if slot_view.state == 'taken':
-            taken_slots += 1
-
-    total_slots = len(slot_items)
-    has_availability = any(slot.state == 'free' for slot in slot_items)
+    slot_items: list[DashboardSlotView] = [
+        build_dashboard_slot(slot_start, slot_end, availability.state(teacher.teacher_id, index))
+        for index, (slot_start, slot_end) in enumerate(slot_times)
+    ]
 
     return DashboardTeacherView(
         teacher_id=teacher.teacher_id,
         name=teacher.full_name or teacher.email,
         email=teacher.email,
         slots=tuple(slot_items),
-        total_slots=total_slots,
-        taken_slots=taken_slots,
-        has_availability=has_availability,
+        total_slots=len(slot_items),
+        taken_slots=availability.booked_count(teacher.teacher_id),
+        has_availability=availability.has_free(teacher.teacher_id),
     )
 
 
@@ -142,18 +138,27 @@ def render_admin_dashboard() -> ResponseReturnValue:
             search_query=search_query,
         )
 
-    event_repository.refresh_statuses_for_school(school.school_id)
+    refresh_event_statuses(school.school_id)
+    version = event_repository.get_closest_version(school.school_id)
+    etag = page_etag('admin-dashboard', version, booking_grid_cache.version(version[0]) if version else None)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
     event = event_repository.get_closest_for_school(school.school_id)
 
     if not event:
-        return render_template(
-            'admin/dashboard.html',
-            page_title='Главная',
-            page_description='Ближайшее мероприятие',
-            pages=pages,
-            dashboard_event=None,
-            teacher_cards=(),
-            search_query=search_query,
+        return with_etag(
+            render_template(
+                'admin/dashboard.html',
+                page_title='Главная',
+                page_description='Ближайшее мероприятие',
+                pages=pages,
+                dashboard_event=None,
+                teacher_cards=(),
+                search_query=search_query,
+            ),
+            etag,
         )
 
     reference_time = datetime.now(event.start_time.tzinfo) if event.start_time.tzinfo else datetime.now()
@@ -161,16 +166,12 @@ def render_admin_dashboard() -> ResponseReturnValue:
     dashboard_event = build_dashboard_event(event, reference_time)
 
     slot_times = generate_slot_times(event)
-    slots_map: dict[tuple[int, datetime], Slot] = {}
-    for slot in event.slots:
-        key = (slot.teacher_id, slot.start_time)
-        if key not in slots_map:
-            slots_map[key] = slot
+    availability = availability_registry.get(event, slot_repository)
 
     teacher_cards: list[DashboardTeacherView] = []
     teachers_sorted = sorted(event.teachers, key=lambda teacher: teacher.full_name or teacher.email or '')
     for teacher in teachers_sorted:
-        card = build_dashboard_teacher(teacher, slot_times, slots_map)
+        card = build_dashboard_teacher(teacher, slot_times, availability)
         teacher_cards.append(card)
 
     if search_query:
@@ -180,14 +181,17 @@ def render_admin_dashboard() -> ResponseReturnValue:
             if lowered in card.name.lower() or lowered in card.email.lower()
         ]
 
-    return render_template(
-        'admin/dashboard.html',
-        page_title='Главная',
-        page_description='Ближайшее мероприятие',
-        pages=pages,
-        dashboard_event=dashboard_event,
-        teacher_cards=teacher_cards,
-        search_query=search_query,
+    return with_etag(
+        render_template(
+            'admin/dashboard.html',
+            page_title='Главная',
+            page_description='Ближайшее мероприятие',
+            pages=pages,
+            dashboard_event=dashboard_event,
+            teacher_cards=teacher_cards,
+            search_query=search_query,
+        ),
+        etag,
     )
 
 
@@ -221,9 +225,16 @@ def account() -> ResponseReturnValue:
         if not policy.edit():
             abort(403)
 
+        # current_user is a cached read-only snapshot; edit the ORM rows.
+        user = user_repository.get_by_id(current_user.user_id)
+        if user is None:
+            abort(404)
+        school = user.school
+
         form = request.form
         errors: list[str] = []
         updated = False
+        school_updated = False
 
         email_input = (form.get('email') or '').strip()
         normalized_email = email_input.lower()
@@ -246,31 +257,29 @@ def account() -> ResponseReturnValue:
         ):
             errors.append('Введите корректный адрес электронной почты')
         else:
-            current_email_normalized = (current_user.email or '').lower()
-            if normalized_email != current_email_normalized:
-                stmt = select(User).where(User.email == normalized_email)
-                existing_user = db.session.execute(stmt).scalar_one_or_none()
-                if existing_user and existing_user.user_id != current_user.user_id:
+            if normalized_email != user.email:
+                existing_user = user_repository.get_by_email(normalized_email)
+                if existing_user and existing_user.user_id != user.user_id:
                     errors.append('Пользователь с такой электронной почтой уже существует')
                 else:
-                    current_user.email = normalized_email
+                    user.email = normalized_email
                     updated = True
 
         if not first_name:
             errors.append('Имя не может быть пустым')
-        elif first_name != current_user.first_name:
-            current_user.first_name = first_name
+        elif first_name != user.first_name:
+            user.first_name = first_name
             updated = True
 
         if not last_name:
             errors.append('Фамилия не может быть пустой')
-        elif last_name != current_user.last_name:
-            current_user.last_name = last_name
+        elif last_name != user.last_name:
+            user.last_name = last_name
             updated = True
 
         middle_value = middle_name or None
-        if current_user.middle_name != middle_value:
-            current_user.middle_name = middle_value
+        if user.middle_name != middle_value:
+            user.middle_name = middle_value
             updated = True
 
         if can_manage_school:
@@ -283,16 +292,17 @@ def account() -> ResponseReturnValue:
                 elif school.school_name != school_name:
                     school.school_name = school_name
                     updated = True
+                    school_updated = True
 
         if password_old or password_new:
             if not password_old or not password_new:
                 errors.append('Для смены пароля заполните оба поля')
-            elif not current_user.check_password(password_old):
+            elif not user.check_password(password_old):
                 errors.append('Старый пароль указан неверно')
             elif len(password_new) < 8:
                 errors.append('Новый пароль должен содержать не менее 8 символов')
             else:
-                current_user.set_password(password_new)
+                user.set_password(password_new)
                 updated = True
 
         if errors:
@@ -307,14 +317,15 @@ def account() -> ResponseReturnValue:
                 current_app.logger.exception('Failed to update account information')
                 flash('Не удалось сохранить изменения, попробуйте ещё раз позже', 'danger')
             else:
+                user_changed.send(user_repository, user_id=user.user_id)
+                if school_updated:
+                    school_changed.send(user_repository, school_id=school.school_id)
                 flash('Изменения успешно сохранены!', 'success')
                 return redirect(url_for('main.account'))
         else:
             flash('Изменений не обнаружено', 'info')
             return redirect(url_for('main.account'))
 
-        school = current_user.school
-
     invite_link = None
 
     if policy.view_invite_link() and school and school.invite_code:
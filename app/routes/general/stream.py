@@ -0,0 +1,123 @@
+"""Live slot deltas over server-sent events.
+
+Off unless ``SLOT_STREAM_ENABLED`` is set; pages then poll their
+ETag-validated grid every ``SLOT_GRID_POLL_SECONDS`` instead. Each open
+stream holds a worker for up to ``SLOT_STREAM_MAX_SECONDS`` and the
+default broker only reaches streams of the process that took the booking,
+so enable it only with an async worker class (gevent, eventlet) and a
+PubSubBackend shared by all workers, such as Redis pub/sub or database
+LISTEN/NOTIFY, installed with ``slot_stream_broker.set_backend``.
+"""
+import json
+import time
+from datetime import datetime
+from typing import Any, Iterator, Optional
+
+from flask import Response, abort, current_app
+from flask.typing import ResponseReturnValue
+from flask_login import current_user, login_required
+
+from app.repositories import EventRepository, get_repository
+from app.routes import bp
+from app.services import SlotDelta, event_layout, layout_slot_index, slot_stream_broker
+from app.services.availability import EventLayout
+
+
+event_repository: EventRepository = get_repository('events')
+
+DEFAULT_GRID_POLL_SECONDS = 20
+DEFAULT_HEARTBEAT_SECONDS = 15
+DEFAULT_MAX_STREAM_SECONDS = 300
+RECONNECT_DELAY_MS = 3000
+
+
+def slot_stream_enabled() -> bool:
+    return bool(current_app.config.get('SLOT_STREAM_ENABLED', False))
+
+
+@bp.app_context_processor
+def live_slot_settings() -> dict[str, Any]:
+    return {
+        'slot_stream_enabled': slot_stream_enabled(),
+        'slot_grid_poll_seconds': int(current_app.config.get('SLOT_GRID_POLL_SECONDS', DEFAULT_GRID_POLL_SECONDS)),
+    }
+
+
+def viewer_slot_state(delta: SlotDelta, parent_id: Optional[int], now: datetime) -> str:
+    """State of a cell as the parent booking page or the dashboard draws it."""
+    if parent_id is None:
+        return 'taken' if delta.booked else 'free'
+    if delta.booked:
+        return 'mine' if delta.parent_id == parent_id else 'taken'
+    return 'closed' if delta.start_time <= now else 'available'
+
+
+def format_sse(event: str, data: Any = None) -> str:
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':')) if data is not None else ''
+    return f'event: {event}\ndata: {payload}\n\n'
+
+
+def slot_event_stream(
+    event_id: int,
+    layout: EventLayout,
+    *,
+    parent_id: Optional[int],
+    heartbeat: float,
+    max_seconds: float,
+) -> Iterator[str]:
+    deadline = time.monotonic() + max_seconds
+    subscription = slot_stream_broker.subscribe(event_id)
+    try:
+        yield f'retry: {RECONNECT_DELAY_MS}\n\n'
+        yield format_sse('ready')
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                # Free the worker now and then; EventSource reconnects by itself.
+                return
+            message = subscription.get(timeout=min(heartbeat, remaining))
+            if message is None:
+                yield ': keepalive\n\n'
+                continue
+            if message.get('kind') != 'slot':
+                yield format_sse('resync')
+                return
+
+            delta = SlotDelta.from_message(message)
+            index = layout_slot_index(layout, delta.start_time)
+            if index is None:
+                continue
+            yield format_sse('slot', {
+                'teacher_id': delta.teacher_id,
+                'index': index,
+                'state': viewer_slot_state(delta, parent_id, datetime.now()),
+                'slot_id': delta.slot_id,
+            })
+    finally:
+        subscription.close()
+
+
+@bp.route('/events/<int:event_id>/stream')
+@login_required
+def event_stream(event_id: int) -> ResponseReturnValue:
+    if not slot_stream_enabled():
+        abort(404)
+    event = event_repository.get_by_id(event_id)
+    if event is None or event.school_id != current_user.school_id:
+        abort(404)
+
+    config = current_app.config
+    # The generator runs after the request context is gone, so everything
+    # it needs is captured here and it never holds a database connection.
+    stream = slot_event_stream(
+        event_id,
+        event_layout(event),
+        parent_id=current_user.parent_id,
+        heartbeat=float(config.get('SLOT_STREAM_HEARTBEAT_SECONDS', DEFAULT_HEARTBEAT_SECONDS)),
+        max_seconds=float(config.get('SLOT_STREAM_MAX_SECONDS', DEFAULT_MAX_STREAM_SECONDS)),
+    )
+    return Response(
+        stream,
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
@@ -1,22 +1,49 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import json
+from dataclasses import dataclass, replace
 from datetime import datetime, timedelta
 from typing import Iterable, Optional
 
-from flask import abort, flash, redirect, render_template, request, url_for
+from flask import Response, abort, current_app, flash, jsonify, redirect, render_template, request, url_for
 from flask.typing import ResponseReturnValue
 from flask_login import current_user, login_required
 from sqlalchemy.exc import SQLAlchemyError
 
-from app.models import Event, Slot, SlotStatus, Teacher
-from app.repositories import EventRepository, SlotRepository, get_repository
-from app.routes import bp, get_pages
+from app.models import Event, Slot, Teacher
+from app.repositories import BookingRequest, EventRepository, SlotRepository, get_repository
+from app.routes import bp, get_pages, not_modified, page_etag, refresh_event_statuses, with_etag
+from app.services import EventAvailability, availability_registry, booking_grid_cache, event_layout
 
 
 event_repository: EventRepository = get_repository('events')
 slot_repository: SlotRepository = get_repository('slots')
 
+# One character per slot in the JSON grid; see parent_events_grid.
+GRID_STATE_CODES: dict[str, str] = {
+	'available': 'a',
+	'mine': 'm',
+	'taken': 't',
+	'closed': 'c',
+}
+# Largest number of slots one batch booking request may ask for.
+MAX_BATCH_BOOKINGS = 20
+
+BATCH_ITEM_MESSAGES: dict[str, str] = {
+	'booked': 'Запись создана.',
+	'taken': 'Этот слот уже занят.',
+	'mine': 'Вы уже записаны на этот слот.',
+	'overlap': 'В это время у вас уже есть запись.',
+	'skipped': 'Запись не создана: другие слоты из списка недоступны.',
+	'unknown_teacher': 'Учитель не участвует в мероприятии.',
+	'invalid_slot': 'Такого слота нет в расписании.',
+	'closed': 'Этот слот уже недоступен для записи.',
+}
+
+# Documented ceiling of the JSON grid for 40 teachers x 30 slots;
+# ``flask perf grid-size`` checks it.
+GRID_JSON_BUDGET_BYTES = 5 * 1024
+
 
 @dataclass(frozen=True)
 class ParentSlotView:
@@ -205,21 +232,20 @@ def build_teacher_view(
 	teacher: Teacher,
 	event: Event,
 	slot_times: Iterable[tuple[int, datetime, datetime]],
-	existing_slots: dict[tuple[int, datetime], Slot],
+	availability: EventAvailability,
 	parent_id: Optional[int],
 	reference_time: datetime,
 ) -> ParentTeacherView:
 	slot_views: list[ParentSlotView] = []
 	for index, slot_start, slot_end in slot_times:
-		key = (teacher.teacher_id, slot_start)
-		slot = existing_slots.get(key)
+		cell = availability.cell(teacher.teacher_id, index)
 		label = format_time_range(slot_start, slot_end)
 		state = 'available'
 		disabled = False
-		slot_id: Optional[int] = slot.slot_id if slot else None
+		slot_id: Optional[int] = cell.slot_id if cell else None
 
-		if slot and slot.status == SlotStatus.booked:
-			if slot.parent_id == parent_id:
+		if cell:
+			if cell.parent_id == parent_id:
 				state = 'mine'
 				disabled = False
 			else:
@@ -227,7 +253,7 @@ def build_teacher_view(
 				disabled = True
 
 		if slot_start <= reference_time:
-			if not slot or slot.status == SlotStatus.cancelled:
+			if not cell:
 				state = 'closed'
 			disabled = True
 
@@ -254,12 +280,72 @@ def ensure_parent_role() -> None:
 		abort(403)
 
 
-def resolve_booking_context() -> tuple[Optional[ParentEventView], list[ParentTeacherView]]:
+@dataclass(frozen=True)
+class SharedBookingGrid:
+	"""Teacher views of one event as any parent sees them, plus who holds what.
+
+	``parent_cells`` maps a parent id to (teacher position, slot index)
+	pairs, so a parent's own bookings can be laid over the shared views.
+	"""
+
+	teachers: tuple[ParentTeacherView, ...]
+	parent_cells: dict[int, tuple[tuple[int, int], ...]]
+	started_count: int
+
+
+def build_shared_grid(
+	event: Event,
+	slot_times: list[tuple[int, datetime, datetime]],
+	availability: EventAvailability,
+	reference_time: datetime,
+) -> SharedBookingGrid:
+	teachers_sorted = sorted(event.teachers, key=lambda teacher: teacher.full_name or teacher.email or '')
+	teacher_views: list[ParentTeacherView] = []
+	parent_cells: dict[int, list[tuple[int, int]]] = {}
+	for position, teacher in enumerate(teachers_sorted):
+		teacher_views.append(
+			build_teacher_view(
+				teacher=teacher,
+				event=event,
+				slot_times=slot_times,
+				availability=availability,
+				parent_id=None,
+				reference_time=reference_time,
+			)
+		)
+		for index, _, _ in slot_times:
+			cell = availability.cell(teacher.teacher_id, index)
+			if cell:
+				parent_cells.setdefault(cell.parent_id, []).append((position, index))
+
+	return SharedBookingGrid(
+		teachers=tuple(teacher_views),
+		parent_cells={parent_id: tuple(cells) for parent_id, cells in parent_cells.items()},
+		started_count=sum(1 for _, slot_start, _ in slot_times if slot_start <= reference_time),
+	)
+
+
+def apply_parent_overlay(grid: SharedBookingGrid, parent_id: Optional[int]) -> list[ParentTeacherView]:
+	teacher_views = list(grid.teachers)
+	cells = grid.parent_cells.get(parent_id, ()) if parent_id is not None else ()
+	for position, index in cells:
+		teacher_view = teacher_views[position]
+		slots = list(teacher_view.slots)
+		slots[index] = replace(slots[index], state='mine', disabled=index < grid.started_count)
+		teacher_views[position] = replace(teacher_view, slots=tuple(slots))
+	return teacher_views
+
+
+def resolve_booking_context(
+	*,
+	refresh_statuses: bool = True,
+) -> tuple[Optional[ParentEventView], list[ParentTeacherView]]:
 	school = current_user.school
 	if not school:
 		return None, []
 
-	event_repository.refresh_statuses_for_school(school.school_id)
+	if refresh_statuses:
+		refresh_event_statuses(school.school_id)
 	event = event_repository.get_closest_for_school(school.school_id, include_past=False)
 	if not event:
 		return None, []
@@ -271,30 +357,34 @@ def resolve_booking_context() -> tuple[Optional[ParentEventView], list[ParentTea
 	if not slot_times:
 		return event_view, []
 
-	slots = slot_repository.get_for_event(event.event_id)
-	slot_map: dict[tuple[int, datetime], Slot] = {
-		(slot.teacher_id, slot.start_time): slot
-		for slot in slots
-		if slot.status != SlotStatus.cancelled
-	}
+	availability = availability_registry.get(event, slot_repository)
+	started_count = sum(1 for _, slot_start, _ in slot_times if slot_start <= reference_time)
+	# Slot states only change with bookings (availability.version), with
+	# edits of the event or as slots start; the cache bumps the rest.
+	token = (availability.version, event_layout(event), event.updated_at, started_count)
+	grid = booking_grid_cache.get_or_build(
+		event.event_id,
+		token,
+		lambda: build_shared_grid(event, slot_times, availability, reference_time),
+	)
+	return event_view, apply_parent_overlay(grid, getattr(current_user, 'parent_id', None))
 
-	teacher_views: list[ParentTeacherView] = []
-	teachers_sorted = sorted(event.teachers, key=lambda teacher: teacher.full_name or teacher.email or '')
-	parent_id = getattr(current_user, 'parent_id', None)
 
-	for teacher in teachers_sorted:
-		teacher_views.append(
-			build_teacher_view(
-				teacher=teacher,
-				event=event,
-				slot_times=slot_times,
-				existing_slots=slot_map,
-				parent_id=parent_id,
-				reference_time=reference_time,
-			)
-		)
+def booking_owner(
+	event: Event,
+	teacher_id: int,
+	start_time: datetime,
+	slot_repository: SlotRepository,
+) -> Optional[int]:
+	"""Parent holding the slot, read from the availability bitmaps.
 
-	return event_view, teacher_views
+	The redirected booking page needs the same bitmaps, so this adds no
+	query of its own once the event is cached.
+	"""
+	availability = availability_registry.get(event, slot_repository)
+	index = availability.slot_index(start_time)
+	cell = availability.cell(teacher_id, index) if index is not None else None
+	return cell.parent_id if cell is not None else None
 
 
 @bp.route('/parent/events', methods=['GET', 'POST'])
@@ -315,9 +405,9 @@ def parent_events() -> ResponseReturnValue:
 			teachers=[],
 		)
 
-	event_repository.refresh_statuses_for_school(school.school_id)
-	event = event_repository.get_closest_for_school(school.school_id, include_past=False)
+	refresh_event_statuses(school.school_id)
 	if request.method == 'POST':
+		event = event_repository.get_closest_for_school(school.school_id, include_past=False)
 		if not event:
 			flash('Нет доступного мероприятия для записи.', 'warning')
 			return redirect(url_for('main.parent_events'))
@@ -370,20 +460,8 @@ def parent_events() -> ResponseReturnValue:
 			flash('Этот слот уже недоступен для записи.', 'warning')
 			return redirect(url_for('main.parent_events'))
 
-		existing = slot_repository.find_existing(
-			event_id=event.event_id,
-			teacher_id=teacher.teacher_id,
-			start_time=slot_start,
-		)
-		if existing:
-			if existing.status == SlotStatus.booked and existing.parent_id == parent_id:
-				flash('Вы уже записаны на этот слот.', 'info')
-			else:
-				flash('Этот слот уже занят.', 'warning')
-			return redirect(url_for('main.parent_events'))
-
 		try:
-			slot_repository.create_booked(
+			booking = slot_repository.try_book(
 				event_id=event.event_id,
 				teacher_id=teacher.teacher_id,
 				parent_id=parent_id,
@@ -394,20 +472,207 @@ def parent_events() -> ResponseReturnValue:
 			slot_repository.rollback()
 			flash('Не удалось записаться на консультацию. Попробуйте позже.', 'danger')
 		else:
-			flash('Запись успешно создана!', 'success')
+			if booking.ok:
+				flash('Запись успешно создана!', 'success')
+			elif booking_owner(event, teacher.teacher_id, slot_start, slot_repository) == parent_id:
+				flash('Вы уже записаны на этот слот.', 'info')
+			else:
+				flash('Этот слот уже занят.', 'warning')
 		return redirect(url_for('main.parent_events'))
 
-	event_view, teachers = resolve_booking_context()
-	return render_template(
-		'parent/events.html',
-		page_title='Мероприятия',
-		page_description='Запись на консультацию',
-		pages=pages,
-		event_view=event_view,
-		teachers=teachers,
+	etag = booking_page_etag(school.school_id, 'parent-events')
+	cached = not_modified(etag)
+	if cached is not None:
+		return cached
+
+	event_view, teachers = resolve_booking_context(refresh_statuses=False)
+	return with_etag(
+		render_template(
+			'parent/events.html',
+			page_title='Мероприятия',
+			page_description='Запись на консультацию',
+			pages=pages,
+			event_view=event_view,
+			teachers=teachers,
+		),
+		etag,
 	)
 
 
+def encode_grid(event_view: Optional[ParentEventView], teachers: Iterable[ParentTeacherView]) -> dict:
+	if event_view is None:
+		return {'event_id': None, 'teachers': [], 'mine': []}
+
+	encoded_teachers: list[list] = []
+	mine: list[list[int]] = []
+	slot_count = 0
+	for teacher in teachers:
+		slot_count = max(slot_count, len(teacher.slots))
+		encoded_teachers.append([
+			teacher.teacher_id,
+			teacher.name,
+			''.join(GRID_STATE_CODES.get(slot.state, 'c') for slot in teacher.slots),
+		])
+		mine.extend(
+			[teacher.teacher_id, slot.index, slot.slot_id]
+			for slot in teacher.slots
+			if slot.state == 'mine' and slot.slot_id is not None
+		)
+
+	return {
+		'event_id': event_view.event_id,
+		'can_book': event_view.can_book,
+		'slot_count': slot_count,
+		'teachers': encoded_teachers,
+		'mine': mine,
+	}
+
+
+def booking_page_etag(school_id: int, name: str) -> str:
+	version = event_repository.get_closest_version(school_id, include_past=False)
+	return page_etag(name, version, booking_grid_cache.version(version[0]) if version else None)
+
+
+@bp.route('/parent/events/grid')
+@login_required
+def parent_events_grid() -> ResponseReturnValue:
+	"""Slot states of the closest event as compact JSON.
+
+	``teachers`` holds ``[teacher_id, name, states]`` with one character of
+	GRID_STATE_CODES per slot index of generate_slot_times; ``mine`` lists
+	``[teacher_id, slot_index, slot_id]`` of the parent's own bookings.
+	40 teachers x 30 slots stay under GRID_JSON_BUDGET_BYTES.
+	"""
+	ensure_parent_role()
+	school = current_user.school
+	if not school:
+		return Response(json.dumps(encode_grid(None, ())), mimetype='application/json')
+
+	refresh_event_statuses(school.school_id)
+	etag = booking_page_etag(school.school_id, 'parent-events-grid')
+	cached = not_modified(etag)
+	if cached is not None:
+		return cached
+
+	event_view, teachers = resolve_booking_context(refresh_statuses=False)
+	payload = json.dumps(encode_grid(event_view, teachers), ensure_ascii=False, separators=(',', ':'))
+	return with_etag(Response(payload, mimetype='application/json'), etag)
+
+
+def parse_batch_items(payload: object) -> Optional[list[tuple[int, int]]]:
+	if not isinstance(payload, dict) or not isinstance(payload.get('items'), list):
+		return None
+	items: list[tuple[int, int]] = []
+	for item in payload['items']:
+		if not isinstance(item, dict):
+			return None
+		teacher_id, slot_index = item.get('teacher_id'), item.get('slot_index')
+		if type(teacher_id) is not int or type(slot_index) is not int:
+			return None
+		items.append((teacher_id, slot_index))
+	return items
+
+
+def batch_item_result(teacher_id: int, slot_index: int, status: str, slot: Optional[Slot] = None) -> dict:
+	return {
+		'teacher_id': teacher_id,
+		'slot_index': slot_index,
+		'status': status,
+		'slot_id': slot.slot_id if slot is not None else None,
+		'message': BATCH_ITEM_MESSAGES[status],
+	}
+
+
+@bp.route('/parent/events/book', methods=['POST'])
+@login_required
+def parent_events_book() -> ResponseReturnValue:
+	"""Book several slots of the closest event in one transaction.
+
+	Takes ``{"items": [{"teacher_id": .., "slot_index": ..}, ...],
+	"atomic": true}``. Atomic batches are all-or-nothing; with
+	``"atomic": false`` every slot that can be booked is. The answer lists
+	the outcome of every item in request order.
+	"""
+	ensure_parent_role()
+	parent_id = current_user.parent_id
+	school = current_user.school
+	payload = request.get_json(silent=True)
+	items = parse_batch_items(payload)
+	if items is None:
+		return jsonify({
+			'success': False,
+			'message': 'Ожидается список слотов: items с полями teacher_id и slot_index',
+		}), 400
+	if not items or len(items) > MAX_BATCH_BOOKINGS:
+		return jsonify({
+			'success': False,
+			'message': f'За один раз можно записаться на 1–{MAX_BATCH_BOOKINGS} слотов',
+		}), 400
+	atomic = payload.get('atomic', True) is not False
+
+	event = event_repository.get_closest_for_school(school.school_id, include_past=False) if school else None
+	if not event:
+		return jsonify({
+			'success': False,
+			'message': 'Нет доступного мероприятия для записи.',
+		}), 404
+
+	slot_times = generate_slot_times(event)
+	teacher_ids = {teacher.teacher_id for teacher in event.teachers}
+	reference_time = datetime.now(event.start_time.tzinfo) if event.start_time.tzinfo else datetime.now()
+	results: list[Optional[dict]] = []
+	requests: list[BookingRequest] = []
+	positions: list[int] = []
+	for teacher_id, slot_index in items:
+		status = None
+		if teacher_id not in teacher_ids:
+			status = 'unknown_teacher'
+		elif not 0 <= slot_index < len(slot_times):
+			status = 'invalid_slot'
+		else:
+			_, slot_start, slot_end = slot_times[slot_index]
+			if slot_start <= reference_time:
+				status = 'closed'
+			else:
+				positions.append(len(results))
+				requests.append(BookingRequest(teacher_id=teacher_id, start_time=slot_start, end_time=slot_end))
+		results.append(batch_item_result(teacher_id, slot_index, status) if status else None)
+
+	if atomic and len(requests) < len(items):
+		outcomes = []
+	else:
+		try:
+			outcomes = slot_repository.book_many(
+				event_id=event.event_id,
+				parent_id=parent_id,
+				requests=requests,
+				atomic=atomic,
+			)
+		except SQLAlchemyError:
+			slot_repository.rollback()
+			current_app.logger.exception('Batch booking failed')
+			return jsonify({
+				'success': False,
+				'message': 'Не удалось записаться на консультации. Попробуйте позже.',
+			}), 500
+
+	for position, outcome in zip(positions, outcomes):
+		teacher_id, slot_index = items[position]
+		results[position] = batch_item_result(teacher_id, slot_index, outcome.error or 'booked', outcome.slot)
+	for position in positions[len(outcomes):]:
+		teacher_id, slot_index = items[position]
+		results[position] = batch_item_result(teacher_id, slot_index, 'skipped')
+
+	booked = sum(1 for result in results if result['status'] == 'booked')
+	return jsonify({
+		'success': booked == len(items),
+		'event_id': event.event_id,
+		'atomic': atomic,
+		'booked': booked,
+		'results': results,
+	})
+
+
 @bp.route('/parent/bookings', methods=['GET', 'POST'])
 @login_required
 def parent_bookings() -> ResponseReturnValue:
@@ -440,4 +705,4 @@ def parent_bookings() -> ResponseReturnValue:
 	)
 
 
-__all__ = ['parent_events', 'parent_bookings']
+__all__ = ['parent_events', 'parent_events_book', 'parent_events_grid', 'parent_bookings']
@@ -2,18 +2,20 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Iterable, Optional
+from typing import Optional
 
-from flask import abort, render_template, request
+from flask import abort, current_app, render_template, request
 from flask.typing import ResponseReturnValue
 from flask_login import current_user, login_required
 
-from app.models import Event, EventStatus, Slot, SlotStatus
-from app.repositories import EventRepository, get_repository
-from app.routes import bp, get_pages
+from app.models import Event, EventStatus
+from app.repositories import EventCursor, EventRepository, EventSearch, SlotRepository, get_repository
+from app.routes import bp, get_pages, refresh_event_statuses
+from app.services import BookedCell, EventAvailability, availability_registry
 
 
 event_repository: EventRepository = get_repository('events')
+slot_repository: SlotRepository = get_repository('slots')
 
 
 @dataclass(frozen=True)
@@ -154,7 +156,7 @@ def format_time_until(delta: timedelta) -> str:
 	return 'Через ' + ' '.join(parts)
 
 
-def determine_slot_status(slot: Slot, reference_time: datetime) -> tuple[str, str, Optional[str]]:
+def determine_slot_status(slot: BookedCell, reference_time: datetime) -> tuple[str, str, Optional[str]]:
 	if slot.start_time <= reference_time < slot.end_time:
 		return 'Идёт сейчас', 'live', None
 	if slot.start_time > reference_time:
@@ -172,20 +174,13 @@ def find_location_label(event: Event, teacher_id: int) -> Optional[str]:
 	return None
 
 
-def build_parent_alias(slot: Slot) -> str:
-	parent = slot.parent
-	identifier_source: Optional[int] = None
-	if parent and parent.parent_id:
-		identifier_source = parent.parent_id
-	elif slot.parent_id:
-		identifier_source = slot.parent_id
-	else:
-		identifier_source = slot.slot_id
+def build_parent_alias(slot: BookedCell) -> str:
+	identifier_source = slot.parent_id or slot.slot_id
 	suffix = str(identifier_source).zfill(4)[-4:]
 	return f'Родитель #{suffix}'
 
 
-def build_consultation_slot_view(slot: Slot) -> TeacherConsultationSlotView:
+def build_consultation_slot_view(slot: BookedCell) -> TeacherConsultationSlotView:
 	reference_time = datetime.now(slot.start_time.tzinfo) if slot.start_time.tzinfo else datetime.now()
 	status_label, status_modifier, status_hint = determine_slot_status(slot, reference_time)
 	return TeacherConsultationSlotView(
@@ -199,13 +194,12 @@ def build_consultation_slot_view(slot: Slot) -> TeacherConsultationSlotView:
 	)
 
 
-def build_consultation_event_view(event: Event, teacher_id: int) -> TeacherConsultationEventView:
-	slots = [
-		slot
-		for slot in event.slots
-		if slot.teacher_id == teacher_id and slot.status == SlotStatus.booked
-	]
-	slots.sort(key=lambda slot: (slot.start_time, slot.slot_id))
+def build_consultation_event_view(
+	event: Event,
+	teacher_id: int,
+	availability: EventAvailability,
+) -> TeacherConsultationEventView:
+	slots = availability.bookings_for_teacher(teacher_id)
 	return TeacherConsultationEventView(
 		event_id=event.event_id,
 		title_text=event.name or 'Без названия',
@@ -237,37 +231,6 @@ def build_event_view_model(event: Event) -> TeacherEventViewModel:
 	)
 
 
-def matches_search(view_model: TeacherEventViewModel, query_lower: str) -> bool:
-	searchable_values = [
-		str(view_model.event_id),
-		view_model.title_text,
-		view_model.status_label,
-		view_model.status_modifier,
-		view_model.period_text,
-		view_model.status_hint or '',
-		str(view_model.consultations_count),
-		str(view_model.consultation_duration_minutes),
-		str(view_model.duration_minutes),
-	]
-
-	for value in searchable_values:
-		if query_lower in value.lower():
-			return True
-
-	for meta in view_model.meta_items:
-		if query_lower in meta.label.lower() or query_lower in meta.value.lower():
-			return True
-
-	for booking in view_model.bookings:
-		if query_lower in booking.building.lower():
-			return True
-		for room in booking.rooms:
-			if query_lower in room.lower():
-				return True
-
-	return False
-
-
 @bp.route('/teacher/consultations', methods=['GET'])
 @login_required
 def teacher_consultations() -> ResponseReturnValue:
@@ -287,11 +250,20 @@ def teacher_consultations() -> ResponseReturnValue:
 			page_description='Ваши встречи с родителями',
 			pages=pages,
 			event_cards=(),
+			next_cursor=None,
 		)
 
-	event_repository.refresh_statuses_for_school(school.school_id)
-	events = event_repository.get_for_teacher(teacher_id)
-	event_cards = tuple(build_consultation_event_view(event, teacher_id) for event in events)
+	refresh_event_statuses(school.school_id)
+	page = event_repository.get_for_teacher(
+		teacher_id,
+		cursor=EventCursor.decode(request.args.get('cursor')),
+		limit=current_app.config.get('EVENTS_PAGE_SIZE', 20),
+	)
+	availability = availability_registry.get_many(page.events, slot_repository)
+	event_cards = tuple(
+		build_consultation_event_view(event, teacher_id, availability[event.event_id])
+		for event in page.events
+	)
 
 	return render_template(
 		'teacher/consultations.html',
@@ -299,6 +271,7 @@ def teacher_consultations() -> ResponseReturnValue:
 		page_description='Ваши встречи с родителями',
 		pages=pages,
 		event_cards=event_cards,
+		next_cursor=page.next_cursor,
 	)
 
 
@@ -316,17 +289,17 @@ def teacher_events() -> ResponseReturnValue:
 	search_query = (request.args.get('q') or '').strip()
 
 	view_models: list[TeacherEventViewModel] = []
+	next_cursor: Optional[str] = None
 	if school:
-		event_repository.refresh_statuses_for_school(school.school_id)
-		raw_events: Iterable[Event] = event_repository.get_for_teacher(teacher_id)
-		view_models = [build_event_view_model(event) for event in raw_events]
-		if search_query:
-			search_lower = search_query.lower()
-			view_models = [
-				view_model
-				for view_model in view_models
-				if matches_search(view_model, search_lower)
-			]
+		refresh_event_statuses(school.school_id)
+		page = event_repository.get_for_teacher(
+			teacher_id,
+			search=EventSearch.parse(search_query),
+			cursor=EventCursor.decode(request.args.get('cursor')),
+			limit=current_app.config.get('EVENTS_PAGE_SIZE', 20),
+		)
+		next_cursor = page.next_cursor
+		view_models = [build_event_view_model(event) for event in page.events]
 
 	return render_template(
 		'teacher/events.html',
@@ -334,6 +307,7 @@ def teacher_events() -> ResponseReturnValue:
 		page_description='Встречи и консультации, где вы участвуете',
 		pages=get_pages(),
 		events=view_models,
+		next_cursor=next_cursor,
 		search_query=search_query,
 	)
 
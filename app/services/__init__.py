@@ -0,0 +1,40 @@
+from .availability import (
+    AvailabilityRegistry,
+    BookedCell,
+    EventAvailability,
+    availability_registry,
+    event_layout,
+    layout_slot_index,
+)
+from .password_hashing import hash_passwords, shutdown_hash_pool, unusable_password_hash
+from .slot_stream import InProcessPubSub, PubSubBackend, SlotDelta, SlotStreamBroker, slot_stream_broker
+from .status_scheduler import StatusScheduler
+from .user_cache import SchoolSnapshot, SessionUser, UserSessionCache, user_session_cache
+from .view_cache import CacheBackend, EventViewCache, LRUCacheBackend, booking_grid_cache
+
+
+__all__ = [
+    'AvailabilityRegistry',
+    'BookedCell',
+    'CacheBackend',
+    'EventAvailability',
+    'EventViewCache',
+    'InProcessPubSub',
+    'LRUCacheBackend',
+    'PubSubBackend',
+    'SchoolSnapshot',
+    'SessionUser',
+    'SlotDelta',
+    'SlotStreamBroker',
+    'StatusScheduler',
+    'UserSessionCache',
+    'availability_registry',
+    'booking_grid_cache',
+    'event_layout',
+    'hash_passwords',
+    'layout_slot_index',
+    'shutdown_hash_pool',
+    'unusable_password_hash',
+    'slot_stream_broker',
+    'user_session_cache',
+]
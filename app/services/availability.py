@@ -0,0 +1,250 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Iterable, Optional
+
+from ..models import Event, Slot, SlotStatus
+from ..repositories import SlotRepository
+from ..signals import event_schedule_changed, slot_booked, slot_released
+
+BookingVersion = tuple[int, int]
+EventLayout = tuple[datetime, int, int]
+
+
+@dataclass(frozen=True)
+class BookedCell:
+    slot_id: int
+    teacher_id: int
+    parent_id: int
+    start_time: datetime
+    end_time: datetime
+
+
+def event_layout(event: Event) -> EventLayout:
+    return (
+        event.start_time,
+        event.consultation_duration_minutes or 0,
+        event.consultations_count or 0,
+    )
+
+
+def layout_slot_index(layout: EventLayout, start_time: datetime) -> Optional[int]:
+    """Index of the consultation starting at START_TIME, None if off the grid."""
+    event_start, duration, count = layout
+    if duration <= 0:
+        return None
+    index, remainder = divmod(start_time - event_start, timedelta(minutes=duration))
+    if remainder or not 0 <= index < count:
+        return None
+    return index
+
+
+@dataclass
+class EventAvailability:
+    """Booked and cancelled slots of one event as one bitmask per teacher.
+
+    Bit ``i`` of a teacher mask stands for the ``i``-th consultation of the
+    event, so counting and "anything free?" checks are integer operations
+    instead of loops over Slot objects.
+    """
+
+    event_id: int
+    layout: EventLayout
+    version: BookingVersion = (0, 0)
+    booked: dict[int, int] = field(default_factory=dict)
+    cancelled: dict[int, int] = field(default_factory=dict)
+    cells: dict[tuple[int, int], BookedCell] = field(default_factory=dict)
+    unaligned: list[BookedCell] = field(default_factory=list)
+
+    @property
+    def slot_count(self) -> int:
+        return self.layout[2]
+
+    @property
+    def full_mask(self) -> int:
+        return (1 << self.slot_count) - 1
+
+    def slot_index(self, start_time: datetime) -> Optional[int]:
+        return layout_slot_index(self.layout, start_time)
+
+    def slot_start(self, index: int) -> datetime:
+        event_start, duration, _ = self.layout
+        return event_start + timedelta(minutes=index * duration)
+
+    def state(self, teacher_id: int, index: int) -> str:
+        bit = 1 << index
+        if self.booked.get(teacher_id, 0) & bit:
+            return 'booked'
+        if self.cancelled.get(teacher_id, 0) & bit:
+            return 'cancelled'
+        return 'free'
+
+    def cell(self, teacher_id: int, index: int) -> Optional[BookedCell]:
+        return self.cells.get((teacher_id, index))
+
+    def booked_count(self, teacher_id: int) -> int:
+        return self.booked.get(teacher_id, 0).bit_count()
+
+    def free_mask(self, teacher_id: int) -> int:
+        return self.full_mask & ~(self.booked.get(teacher_id, 0) | self.cancelled.get(teacher_id, 0))
+
+    def has_free(self, teacher_id: int) -> bool:
+        return self.free_mask(teacher_id) != 0
+
+    def bookings_for_teacher(self, teacher_id: int) -> list[BookedCell]:
+        bookings = [cell for (owner_id, _), cell in self.cells.items() if owner_id == teacher_id]
+        bookings.extend(cell for cell in self.unaligned if cell.teacher_id == teacher_id)
+        bookings.sort(key=lambda cell: (cell.start_time, cell.slot_id))
+        return bookings
+
+    def add(self, cell: BookedCell, status: SlotStatus) -> None:
+        index = self.slot_index(cell.start_time)
+        if status == SlotStatus.cancelled:
+            if index is not None:
+                self.cancelled[cell.teacher_id] = self.cancelled.get(cell.teacher_id, 0) | (1 << index)
+            return
+        if index is None:
+            self.unaligned.append(cell)
+            return
+        self.booked[cell.teacher_id] = self.booked.get(cell.teacher_id, 0) | (1 << index)
+        self.cells[(cell.teacher_id, index)] = cell
+
+    def remove(self, cell: BookedCell) -> None:
+        index = self.slot_index(cell.start_time)
+        if index is None:
+            self.unaligned = [item for item in self.unaligned if item.slot_id != cell.slot_id]
+            return
+        mask = ~(1 << index)
+        self.booked[cell.teacher_id] = self.booked.get(cell.teacher_id, 0) & mask
+        self.cancelled[cell.teacher_id] = self.cancelled.get(cell.teacher_id, 0) & mask
+        self.cells.pop((cell.teacher_id, index), None)
+
+
+def _cell_from_slot(slot: Slot) -> BookedCell:
+    return BookedCell(
+        slot_id=slot.slot_id,
+        teacher_id=slot.teacher_id,
+        parent_id=slot.parent_id,
+        start_time=slot.start_time,
+        end_time=slot.end_time,
+    )
+
+
+class AvailabilityRegistry:
+    """Per-process cache of EventAvailability, kept in step with bookings.
+
+    Bookings made in this process patch the cached bitmaps directly. Every
+    lookup also compares the cached (count, max slot id) with the database,
+    so bookings made by other workers trigger a rebuild instead of being
+    missed. Only events that have not finished are kept.
+    """
+
+    def __init__(self, max_events: int = 64) -> None:
+        self.max_events = max_events
+        self._entries: OrderedDict[int, EventAvailability] = OrderedDict()
+        self._lock = threading.Lock()
+
+        slot_booked.connect(self._on_slot_booked, weak=False)
+        slot_released.connect(self._on_slot_released, weak=False)
+        event_schedule_changed.connect(self._on_event_changed, weak=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get(self, event: Event, slot_repository: SlotRepository) -> EventAvailability:
+        return self.get_many([event], slot_repository)[event.event_id]
+
+    def get_many(
+        self,
+        events: Iterable[Event],
+        slot_repository: SlotRepository,
+    ) -> dict[int, EventAvailability]:
+        events_by_id = {event.event_id: event for event in events}
+        if not events_by_id:
+            return {}
+
+        versions = slot_repository.get_booking_versions(events_by_id)
+        result: dict[int, EventAvailability] = {}
+        stale: dict[int, EventAvailability] = {}
+
+        with self._lock:
+            for event_id, event in events_by_id.items():
+                version = versions.get(event_id, (0, 0))
+                layout = event_layout(event)
+                entry = self._entries.get(event_id)
+                if entry is not None and entry.version == version and entry.layout == layout:
+                    self._entries.move_to_end(event_id)
+                    result[event_id] = entry
+                else:
+                    stale[event_id] = EventAvailability(event_id=event_id, layout=layout, version=version)
+
+        if stale:
+            for slot_id, event_id, teacher_id, parent_id, start_time, end_time, status in (
+                slot_repository.get_booking_cells(stale)
+            ):
+                cell = BookedCell(
+                    slot_id=slot_id,
+                    teacher_id=teacher_id,
+                    parent_id=parent_id,
+                    start_time=start_time,
+                    end_time=end_time,
+                )
+                stale[event_id].add(cell, status)
+
+            now = datetime.now()
+            with self._lock:
+                for event_id, entry in stale.items():
+                    # Finished events are built for this call only; a teacher's
+                    # long history would otherwise evict the live booking grids.
+                    if events_by_id[event_id].end_time < now:
+                        continue
+                    self._entries[event_id] = entry
+                    self._entries.move_to_end(event_id)
+                while len(self._entries) > self.max_events:
+                    self._entries.popitem(last=False)
+            result.update(stale)
+
+        return result
+
+    def _on_slot_booked(self, _sender: Any, *, slot: Slot, **_kwargs: Any) -> None:
+        cell = _cell_from_slot(slot)
+        with self._lock:
+            entry = self._entries.get(slot.event_id)
+            if entry is None:
+                return
+            count, max_slot_id = entry.version
+            entry.add(cell, slot.status)
+            entry.version = (count + 1, max(max_slot_id, cell.slot_id))
+
+    def _on_slot_released(self, _sender: Any, *, slot: Slot, **_kwargs: Any) -> None:
+        cell = _cell_from_slot(slot)
+        with self._lock:
+            entry = self._entries.get(slot.event_id)
+            if entry is None:
+                return
+            count, max_slot_id = entry.version
+            if cell.slot_id >= max_slot_id:
+                # The new max id is unknown without asking the database.
+                self._entries.pop(slot.event_id, None)
+                return
+            entry.remove(cell)
+            entry.version = (count - 1, max_slot_id)
+
+    def _on_event_changed(self, _sender: Any, *, event_id: int, **_kwargs: Any) -> None:
+        with self._lock:
+            self._entries.pop(event_id, None)
+
+
+availability_registry = AvailabilityRegistry()
+
+
+__all__ = [
+    'AvailabilityRegistry',
+    'BookedCell',
+    'EventAvailability',
+    'availability_registry',
+    'event_layout',
+    'layout_slot_index',
+]
@@ -0,0 +1,179 @@
+import os
+import socket
+import threading
+from datetime import timedelta
+from typing import IO, Callable, Optional
+from uuid import uuid4
+
+from flask import Flask, current_app
+
+from ..auth.password_setup import password_setup_link_max_age
+from ..models import ImportJob, ImportJobStatus
+from ..repositories import ImportJobRepository, UserRepository, get_repository
+from .teacher_import import (
+    TeacherImportError,
+    TeacherImportResult,
+    import_limits,
+    import_teachers,
+    iter_workbook_rows,
+)
+
+DEFAULT_STALE_AFTER = timedelta(minutes=30)
+
+
+def upload_dir() -> str:
+    return current_app.config.get('TEACHER_IMPORT_UPLOAD_DIR') or os.path.join(current_app.instance_path, 'imports')
+
+
+def store_upload(stream: IO[bytes]) -> str:
+    directory = upload_dir()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{uuid4().hex}.xlsx')
+    with open(path, 'wb') as target:
+        while chunk := stream.read(64 * 1024):
+            target.write(chunk)
+    return path
+
+
+def _remove_upload(path: Optional[str]) -> None:
+    if not path:
+        return
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def enqueue_teacher_import(stream: IO[bytes], *, school_id: int, created_by: Optional[int]) -> ImportJob:
+    job_repository: ImportJobRepository = get_repository('import_jobs')
+    path = store_upload(stream)
+    try:
+        job = job_repository.create(school_id=school_id, file_path=path, created_by=created_by)
+    except Exception:
+        job_repository.rollback()
+        _remove_upload(path)
+        raise
+    if current_app.config.get('IMPORT_JOBS_RUN_IN_PROCESS', True):
+        import_job_runner.wake(current_app._get_current_object())
+    return job
+
+
+def run_import_job(
+    job: ImportJob,
+    *,
+    job_repository: ImportJobRepository,
+    user_repository: UserRepository,
+) -> None:
+    _, max_rows = import_limits()
+    file_path = job.file_path
+
+    def report(result: TeacherImportResult) -> None:
+        job_repository.update_progress(
+            job,
+            processed_rows=result.processed_rows,
+            created_count=len(result.created),
+            errors=result.errors,
+        )
+
+    try:
+        if not file_path or not os.path.exists(file_path):
+            raise TeacherImportError('Загруженный файл не найден. Повторите загрузку')
+        with open(file_path, 'rb') as stream:
+            result = import_teachers(
+                iter_workbook_rows(stream, max_rows=max_rows),
+                school_id=job.school_id,
+                user_repository=user_repository,
+                max_rows=max_rows,
+                on_batch=report,
+                on_created=lambda accounts: job_repository.record_created(job, accounts),
+                created=job_repository.get_created(job),
+            )
+    except TeacherImportError as exc:
+        job_repository.rollback()
+        job_repository.finish(job, status=ImportJobStatus.failed, message=str(exc))
+    except Exception:
+        job_repository.rollback()
+        current_app.logger.exception('Teacher import job %s failed', job.job_id)
+        job_repository.finish(
+            job,
+            status=ImportJobStatus.failed,
+            message='Не удалось выполнить импорт из-за внутренней ошибки. Попробуйте позже',
+        )
+    else:
+        if result.created:
+            message = f'Добавлено учителей: {len(result.created)}'
+        else:
+            message = 'Учителя не были созданы'
+        job_repository.finish(job, status=ImportJobStatus.completed, message=message)
+    finally:
+        _remove_upload(file_path)
+
+
+class ImportJobRunner:
+    """Runs queued import jobs from the ``import_jobs`` table.
+
+    Workers claim jobs with a conditional UPDATE, so any number of runners
+    (web process threads and ``flask import-jobs run``) can share a queue.
+    """
+
+    def __init__(self, *, poll_interval: timedelta = timedelta(seconds=5)) -> None:
+        self._poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def worker_id() -> str:
+        return f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'[:64]
+
+    def run_pending(self) -> int:
+        job_repository: ImportJobRepository = get_repository('import_jobs')
+        user_repository: UserRepository = get_repository('users')
+        stale_minutes = current_app.config.get('IMPORT_JOB_STALE_AFTER_MINUTES')
+        stale_after = timedelta(minutes=stale_minutes) if stale_minutes else DEFAULT_STALE_AFTER
+        job_repository.requeue_stale(stale_after)
+        # Created accounts are only kept while their setup links still work.
+        job_repository.purge_results(password_setup_link_max_age())
+
+        processed = 0
+        while True:
+            job = job_repository.claim_next(self.worker_id())
+            if job is None:
+                return processed
+            run_import_job(job, job_repository=job_repository, user_repository=user_repository)
+            processed += 1
+
+    def run_forever(self, app: Flask, should_stop: Callable[[], bool] = lambda: False) -> None:
+        while not should_stop():
+            self._wakeup.clear()
+            with app.app_context():
+                try:
+                    self.run_pending()
+                except Exception:
+                    app.logger.exception('Import job runner pass failed')
+            self._wakeup.wait(self._poll_interval.total_seconds())
+
+    def wake(self, app: Flask) -> None:
+        """Start the in-process worker thread if needed and let it check the queue."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self.run_forever,
+                    args=(app,),
+                    name='import-jobs',
+                    daemon=True,
+                )
+                self._thread.start()
+        self._wakeup.set()
+
+
+import_job_runner = ImportJobRunner()
+
+
+__all__ = [
+    'ImportJobRunner',
+    'enqueue_teacher_import',
+    'import_job_runner',
+    'run_import_job',
+    'store_upload',
+]
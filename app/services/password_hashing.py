@@ -0,0 +1,65 @@
+import multiprocessing
+import os
+import secrets
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Sequence
+
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash
+
+# Below this many passwords the pool round-trip costs more than it saves.
+INLINE_HASH_LIMIT = 4
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def default_hash_workers() -> int:
+    if has_app_context():
+        configured = current_app.config.get('PASSWORD_HASH_WORKERS')
+        if configured:
+            return max(1, int(configured))
+    return os.cpu_count() or 1
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # spawn, not fork: gunicorn workers run threads and hold DB
+            # connections that must not be copied into the children.
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _pool_workers = workers
+        return _pool
+
+
+def hash_passwords(passwords: Sequence[str], *, workers: Optional[int] = None) -> list[str]:
+    """Hash passwords with ``generate_password_hash`` across a bounded process pool."""
+    workers = workers or default_hash_workers()
+    if workers <= 1 or len(passwords) <= INLINE_HASH_LIMIT:
+        return [generate_password_hash(password) for password in passwords]
+
+    chunksize = max(1, len(passwords) // (workers * 4))
+    return list(_get_pool(workers).map(generate_password_hash, passwords, chunksize=chunksize))
+
+
+def unusable_password_hash() -> str:
+    """A unique ``password_hash`` no password matches, for accounts set up by link."""
+    # check_password_hash rejects anything without a ``method$salt$hash`` shape.
+    return f'!{secrets.token_hex(16)}'
+
+
+def shutdown_hash_pool() -> None:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = None
+        _pool_workers = 0
+
+
+__all__ = ['default_hash_workers', 'hash_passwords', 'shutdown_hash_pool', 'unusable_password_hash']
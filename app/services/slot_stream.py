@@ -0,0 +1,179 @@
+import queue
+import threading
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Optional, Protocol
+
+from ..models import Slot
+from ..signals import event_schedule_changed, slot_booked, slot_released
+
+RESYNC = {'kind': 'resync'}
+
+
+class Subscription(Protocol):
+    def get(self, timeout: float) -> Optional[dict[str, Any]]: ...
+
+    def close(self) -> None: ...
+
+
+class PubSubBackend(Protocol):
+    """Transport behind SlotStreamBroker; messages are JSON-compatible dicts.
+
+    A backend shared between workers (Redis pub/sub, Postgres LISTEN/NOTIFY)
+    makes bookings from every worker reach every stream.
+    """
+
+    def publish(self, channel: str, message: dict[str, Any]) -> None: ...
+
+    def subscribe(self, channel: str) -> Subscription: ...
+
+
+class _QueueSubscription:
+    def __init__(self, backend: 'InProcessPubSub', channel: str, max_pending: int) -> None:
+        self.backend = backend
+        self.channel = channel
+        self.queue: queue.Queue[dict[str, Any]] = queue.Queue(maxsize=max_pending)
+        self.overflowed = False
+
+    def put(self, message: dict[str, Any]) -> None:
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            # A client this far behind cannot be patched delta by delta.
+            self.overflowed = True
+
+    def get(self, timeout: float) -> Optional[dict[str, Any]]:
+        if self.overflowed:
+            self.overflowed = False
+            with self.queue.mutex:
+                self.queue.queue.clear()
+            return RESYNC
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self) -> None:
+        self.backend.unsubscribe(self)
+
+
+class InProcessPubSub:
+    """Delivers messages to subscribers of this process only."""
+
+    def __init__(self, max_pending: int = 256) -> None:
+        self.max_pending = max_pending
+        self._subscribers: dict[str, set[_QueueSubscription]] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, channel: str, message: dict[str, Any]) -> None:
+        with self._lock:
+            subscribers = tuple(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put(message)
+
+    def subscribe(self, channel: str) -> Subscription:
+        subscription = _QueueSubscription(self, channel, self.max_pending)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: _QueueSubscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is None:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.channel]
+
+    def subscriber_count(self, channel: str) -> int:
+        with self._lock:
+            return len(self._subscribers.get(channel, ()))
+
+
+@dataclass(frozen=True)
+class SlotDelta:
+    teacher_id: int
+    start_time: datetime
+    booked: bool
+    slot_id: Optional[int] = None
+    parent_id: Optional[int] = None
+
+    def to_message(self) -> dict[str, Any]:
+        message = asdict(self)
+        message['kind'] = 'slot'
+        message['start_time'] = self.start_time.isoformat()
+        return message
+
+    @classmethod
+    def from_message(cls, message: dict[str, Any]) -> 'SlotDelta':
+        return cls(
+            teacher_id=message['teacher_id'],
+            start_time=datetime.fromisoformat(message['start_time']),
+            booked=message['booked'],
+            slot_id=message.get('slot_id'),
+            parent_id=message.get('parent_id'),
+        )
+
+
+class SlotStreamBroker:
+    """Publishes booking changes of an event to its live streams.
+
+    Deltas carry the slot start time rather than its index: the stream
+    knows the event layout it rendered, so the broker needs no database
+    access inside the signal handlers. Schedule changes publish a resync,
+    since indexes of the old layout no longer apply.
+    """
+
+    def __init__(self, backend: Optional[PubSubBackend] = None) -> None:
+        self.backend: PubSubBackend = backend or InProcessPubSub()
+
+        slot_booked.connect(self._on_slot_booked, weak=False)
+        slot_released.connect(self._on_slot_released, weak=False)
+        event_schedule_changed.connect(self._on_event_changed, weak=False)
+
+    def set_backend(self, backend: PubSubBackend) -> None:
+        self.backend = backend
+
+    @staticmethod
+    def channel(event_id: int) -> str:
+        return f'event-slots:{event_id}'
+
+    def subscribe(self, event_id: int) -> Subscription:
+        return self.backend.subscribe(self.channel(event_id))
+
+    def publish(self, event_id: int, message: dict[str, Any]) -> None:
+        self.backend.publish(self.channel(event_id), message)
+
+    def _on_slot_booked(self, _sender: Any, *, slot: Slot, **_kwargs: Any) -> None:
+        self.publish(slot.event_id, SlotDelta(
+            teacher_id=slot.teacher_id,
+            start_time=slot.start_time,
+            booked=True,
+            slot_id=slot.slot_id,
+            parent_id=slot.parent_id,
+        ).to_message())
+
+    def _on_slot_released(self, _sender: Any, *, slot: Slot, **_kwargs: Any) -> None:
+        self.publish(slot.event_id, SlotDelta(
+            teacher_id=slot.teacher_id,
+            start_time=slot.start_time,
+            booked=False,
+        ).to_message())
+
+    def _on_event_changed(self, _sender: Any, *, event_id: int, **_kwargs: Any) -> None:
+        self.publish(event_id, RESYNC)
+
+
+slot_stream_broker = SlotStreamBroker()
+
+
+__all__ = [
+    'InProcessPubSub',
+    'PubSubBackend',
+    'RESYNC',
+    'SlotDelta',
+    'SlotStreamBroker',
+    'Subscription',
+    'slot_stream_broker',
+]
@@ -0,0 +1,123 @@
+import heapq
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional
+
+from ..repositories import EventRepository
+from ..signals import event_schedule_changed
+
+Clock = Callable[[], datetime]
+Sleeper = Callable[[float], None]
+
+
+class StatusScheduler:
+    """Moves events between statuses exactly at their start/end boundaries.
+
+    Upcoming boundaries are kept in a min-heap, so each tick only touches the
+    events whose boundary has actually passed. The heap is rebuilt when an
+    event is saved in this process, when the events table changes in another
+    process (detected by polling a cheap fingerprint), and every
+    ``reload_interval`` as a safety net.
+    """
+
+    def __init__(
+        self,
+        repository: EventRepository,
+        *,
+        clock: Clock = datetime.now,
+        sleep: Sleeper = time.sleep,
+        poll_interval: timedelta = timedelta(seconds=5),
+        reload_interval: timedelta = timedelta(minutes=5),
+    ) -> None:
+        self._repository = repository
+        self._clock = clock
+        self._sleep = sleep
+        self.poll_interval = poll_interval
+        self.reload_interval = reload_interval
+
+        self._heap: list[tuple[datetime, int]] = []
+        self._reload_requested = True
+        self._next_reload_at: Optional[datetime] = None
+        self._next_poll_at: Optional[datetime] = None
+        self._fingerprint: Optional[tuple[int, Optional[datetime]]] = None
+
+        event_schedule_changed.connect(self.request_reload, weak=False)
+
+    def close(self) -> None:
+        event_schedule_changed.disconnect(self.request_reload)
+
+    def request_reload(self, *_args: Any, **_kwargs: Any) -> None:
+        self._reload_requested = True
+
+    @property
+    def pending(self) -> list[tuple[datetime, int]]:
+        return sorted(self._heap)
+
+    def reload(self) -> int:
+        now = self._clock()
+        heap: list[tuple[datetime, int]] = []
+        for event_id, start_time, end_time in self._repository.get_status_boundaries(now):
+            if start_time > now:
+                heap.append((start_time, event_id))
+            heap.append((end_time, event_id))
+        heapq.heapify(heap)
+
+        self._heap = heap
+        self._reload_requested = False
+        self._next_reload_at = now + self.reload_interval
+        self._next_poll_at = now + self.poll_interval
+
+        # Catch up on anything that passed while the heap was stale.
+        changed = self._repository.refresh_statuses(reference_time=now)
+        self._fingerprint = self._repository.get_schedule_fingerprint()
+        return changed
+
+    def _schedule_changed_elsewhere(self, now: datetime) -> bool:
+        if self._next_poll_at is None or now < self._next_poll_at:
+            return False
+        self._next_poll_at = now + self.poll_interval
+        return self._repository.get_schedule_fingerprint() != self._fingerprint
+
+    def run_pending(self) -> int:
+        try:
+            now = self._clock()
+            if (
+                self._reload_requested
+                or self._next_reload_at is None
+                or now >= self._next_reload_at
+                or self._schedule_changed_elsewhere(now)
+            ):
+                changed = self.reload()
+            else:
+                changed = 0
+
+            due: set[int] = set()
+            while self._heap and self._heap[0][0] <= now:
+                _, event_id = heapq.heappop(self._heap)
+                due.add(event_id)
+
+            if due:
+                changed += self._repository.refresh_statuses_for_events(due, reference_time=now)
+                # Our own UPDATE moves the fingerprint; it is not an outside change.
+                self._fingerprint = self._repository.get_schedule_fingerprint()
+            return changed
+        finally:
+            # End the read transaction so the next tick sees fresh data.
+            self._repository.rollback()
+
+    def seconds_until_next(self) -> float:
+        now = self._clock()
+        candidates = [moment for moment in (self._next_reload_at, self._next_poll_at) if moment is not None]
+        if self._heap:
+            candidates.append(self._heap[0][0])
+        if not candidates:
+            return self.poll_interval.total_seconds()
+        return max(0.0, (min(candidates) - now).total_seconds())
+
+    def run_forever(self, should_stop: Callable[[], bool] = lambda: False) -> None:
+        while not should_stop():
+            self.run_pending()
+            self._sleep(self.seconds_until_next())
+
+
+__all__ = ['StatusScheduler']
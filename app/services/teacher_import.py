@@ -0,0 +1,330 @@
+import secrets
+import string
+from dataclasses import dataclass, field
+from typing import IO, Any, Callable, Iterable, Iterator, Optional
+
+from flask import current_app
+from openpyxl import load_workbook
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from ..auth.register import _parse_full_name
+from ..repositories import NewUser, UserRepository
+from .password_hashing import unusable_password_hash
+
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_MAX_ROWS = 5000
+DEFAULT_BATCH_SIZE = 500
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class TeacherImportError(Exception):
+    """The upload as a whole cannot be imported."""
+
+
+@dataclass
+class TeacherImportResult:
+    created: list[dict[str, str]] = field(default_factory=list)
+    row_errors: list[tuple[int, str]] = field(default_factory=list)
+    processed_rows: int = 0
+
+    @property
+    def errors(self) -> list[str]:
+        return [message for _, message in sorted(self.row_errors, key=lambda item: item[0])]
+
+
+def generate_password(length: int = 12) -> str:
+    alphabet = string.ascii_letters + string.digits
+    if length < 8:
+        length = 8
+    return ''.join(secrets.choice(alphabet) for _ in range(length))
+
+
+def import_limits() -> tuple[int, int]:
+    config = current_app.config
+    return (
+        int(config.get('TEACHER_IMPORT_MAX_BYTES', DEFAULT_MAX_BYTES)),
+        int(config.get('TEACHER_IMPORT_MAX_ROWS', DEFAULT_MAX_ROWS)),
+    )
+
+
+def too_many_rows_message(max_rows: int) -> str:
+    return f'В файле слишком много строк: допускается не более {max_rows} учителей за один импорт'
+
+
+def upload_too_large_message(max_bytes: int) -> str:
+    if max_bytes >= 1024 * 1024:
+        limit_label = f'{max_bytes // (1024 * 1024)} МБ'
+    else:
+        limit_label = f'{max(1, max_bytes // 1024)} КБ'
+    return f'Файл слишком большой: допускается не более {limit_label}'
+
+
+def upload_body_limit(max_bytes: int) -> int:
+    """Request body limit for an upload of at most MAX_BYTES, multipart framing included."""
+    return max_bytes + MULTIPART_OVERHEAD_BYTES
+
+
+def check_upload_size(stream: IO[bytes], max_bytes: int) -> int:
+    stream.seek(0, 2)
+    size = stream.tell()
+    stream.seek(0)
+    if size > max_bytes:
+        raise TeacherImportError(upload_too_large_message(max_bytes))
+    return size
+
+
+def iter_workbook_rows(stream: IO[bytes], *, max_rows: int) -> Iterator[tuple[Any, ...]]:
+    """Yield rows of the active sheet without loading the workbook into memory."""
+    try:
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+    except Exception as exc:
+        raise TeacherImportError(
+            'Не удалось прочитать файл. Убедитесь, что это корректный Excel-документ (.xlsx)'
+        ) from exc
+
+    try:
+        worksheet = workbook.active
+        # The dimension tag is optional, so this only rejects early;
+        # import_teachers() enforces the limit while reading.
+        declared_rows = worksheet.max_row if worksheet.max_row is not None else 0
+        if declared_rows > max_rows + 1:
+            raise TeacherImportError(too_many_rows_message(max_rows))
+        yield from worksheet.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def _validate_row(
+    offset: int,
+    row: tuple[Any, ...],
+    *,
+    email_index: int,
+    fullname_index: int,
+    seen_emails: set[str],
+) -> tuple[Optional[tuple[int, str, NewUser]], Optional[str]]:
+    email_raw = row[email_index] if len(row) > email_index else None
+    full_name_raw = row[fullname_index] if len(row) > fullname_index else None
+
+    if email_raw is None and full_name_raw is None:
+        return None, None
+
+    email_value = str(email_raw).strip() if email_raw is not None else ''
+    full_name_value = str(full_name_raw).strip() if full_name_raw is not None else ''
+
+    if not email_value:
+        return None, f'Строка {offset}: не указана электронная почта учителя'
+
+    email_lower = email_value.lower()
+    if (
+        '@' not in email_lower
+        or email_lower.startswith('@')
+        or email_lower.endswith('@')
+        or ' ' in email_value
+        or '.' not in email_lower.split('@', 1)[-1]
+    ):
+        return None, f'Строка {offset}: некорректный адрес электронной почты — "{email_value}"'
+
+    if email_lower in seen_emails:
+        return None, f'Строка {offset}: адрес "{email_value}" уже встречался в файле. Дубликат пропущен'
+
+    seen_emails.add(email_lower)
+
+    if not full_name_value:
+        return None, f'Строка {offset}: не указано ФИО учителя'
+
+    try:
+        first_name, last_name, middle_name = _parse_full_name(full_name_value)
+    except ValueError as exc:
+        return None, f'Строка {offset}: {exc}'
+
+    user = NewUser(
+        email=email_lower,
+        # Teachers choose their password through a setup link.
+        password_hash=unusable_password_hash(),
+        first_name=first_name,
+        last_name=last_name,
+        middle_name=middle_name,
+    )
+    return (offset, email_value, user), None
+
+
+def _created_account(user: NewUser) -> dict[str, str]:
+    return {
+        'full_name': ' '.join(filter(None, [user.last_name, user.first_name, user.middle_name])),
+        'email': user.email,
+    }
+
+
+def _create_batch(
+    candidates: list[tuple[int, str, NewUser]],
+    *,
+    school_id: int,
+    user_repository: UserRepository,
+    result: TeacherImportResult,
+    on_created: Optional[Callable[[list[dict[str, str]]], None]],
+) -> None:
+    # Rows created by an earlier, interrupted run of the same import.
+    already_created = {account['email'] for account in result.created}
+    candidates = [candidate for candidate in candidates if candidate[2].email not in already_created]
+
+    # A concurrent import may take an email between the check and the
+    # insert; the second attempt re-reads existing emails and skips them.
+    for attempt in range(2):
+        existing_emails = user_repository.get_existing_emails(user.email for _, _, user in candidates)
+        for offset, email_value, user in candidates:
+            if user.email in existing_emails:
+                result.row_errors.append(
+                    (offset, f'Строка {offset}: пользователь с электронной почтой "{email_value}" уже существует')
+                )
+        candidates = [candidate for candidate in candidates if candidate[2].email not in existing_emails]
+        if not candidates:
+            return
+
+        accounts = [_created_account(user) for _, _, user in candidates]
+        try:
+            if on_created is not None:
+                on_created(accounts)
+            user_repository.create_many(
+                [user for _, _, user in candidates],
+                role='teacher',
+                school_id=school_id,
+            )
+        except IntegrityError:
+            user_repository.rollback()
+            if attempt == 0:
+                continue
+            current_app.logger.exception('Failed to create teachers from import')
+        except SQLAlchemyError:
+            user_repository.rollback()
+            current_app.logger.exception('Failed to create teachers from import')
+        else:
+            result.created.extend(accounts)
+            return
+
+        result.row_errors.extend(
+            (offset, f'Строка {offset}: не удалось создать учителя из-за ошибки базы данных')
+            for offset, _, _ in candidates
+        )
+        return
+
+
+def import_teachers(
+    rows: Iterable[tuple[Any, ...]],
+    *,
+    school_id: int,
+    user_repository: UserRepository,
+    max_rows: int = DEFAULT_MAX_ROWS,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    on_batch: Optional[Callable[[TeacherImportResult], None]] = None,
+    on_created: Optional[Callable[[list[dict[str, str]]], None]] = None,
+    created: Iterable[dict[str, str]] = (),
+) -> TeacherImportResult:
+    """Validate rows as they are read and create teachers batch by batch.
+
+    Each batch is its own transaction, so memory stays bounded by the batch
+    size and a database error only loses the rows of one batch. Problems
+    found after the first batch was committed are reported as row errors
+    instead of raised, so created teachers are still reported.
+
+    ``on_created`` runs inside the batch transaction, before it commits, so
+    the caller can record the accounts atomically with their insert.
+    ``created`` lists accounts recorded by an interrupted run; their rows
+    are skipped instead of reported as existing users.
+    """
+    row_iter = iter(rows)
+    header_row = next(row_iter, None)
+    if header_row is None:
+        raise TeacherImportError('Файл пуст. Добавьте данные об учителях и повторите попытку')
+
+    normalized_header = [str(cell).strip().lower() if isinstance(cell, str) else '' for cell in header_row]
+    has_header = 'email' in normalized_header and 'full_name' in normalized_header
+
+    if has_header:
+        email_index = normalized_header.index('email')
+        fullname_index = normalized_header.index('full_name')
+        data_rows: Iterable[tuple[Any, ...]] = row_iter
+        row_start_index = 2
+    else:
+        email_index = 0
+        fullname_index = 1
+        data_rows = _prepend(header_row, row_iter)
+        row_start_index = 1
+
+    if email_index == fullname_index:
+        raise TeacherImportError('Файл должен содержать отдельные колонки для email и ФИО учителя')
+
+    result = TeacherImportResult(created=list(created))
+    seen_emails: set[str] = set()
+    batch: list[tuple[int, str, NewUser]] = []
+
+    rows_with_offsets = enumerate(data_rows, start=row_start_index)
+    while True:
+        try:
+            offset, row = next(rows_with_offsets)
+        except StopIteration:
+            break
+        except Exception as exc:
+            if not result.created:
+                raise TeacherImportError(
+                    'Не удалось прочитать файл. Убедитесь, что это корректный Excel-документ (.xlsx)'
+                ) from exc
+            current_app.logger.exception('Failed to read teachers workbook')
+            result.row_errors.append((result.processed_rows + row_start_index, 'Не удалось дочитать файл до конца'))
+            break
+
+        if result.processed_rows >= max_rows:
+            result.row_errors.append((offset, f'{too_many_rows_message(max_rows)}. Строки начиная с {offset} пропущены'))
+            break
+        result.processed_rows += 1
+        candidate, error = _validate_row(
+            offset,
+            tuple(row),
+            email_index=email_index,
+            fullname_index=fullname_index,
+            seen_emails=seen_emails,
+        )
+        if error:
+            result.row_errors.append((offset, error))
+        if candidate:
+            batch.append(candidate)
+        if len(batch) >= batch_size:
+            _create_batch(
+                batch,
+                school_id=school_id,
+                user_repository=user_repository,
+                result=result,
+                on_created=on_created,
+            )
+            batch = []
+            if on_batch is not None:
+                on_batch(result)
+
+    if batch:
+        _create_batch(
+            batch,
+            school_id=school_id,
+            user_repository=user_repository,
+            result=result,
+            on_created=on_created,
+        )
+    if on_batch is not None:
+        on_batch(result)
+    return result
+
+
+def _prepend(first: tuple[Any, ...], rest: Iterator[tuple[Any, ...]]) -> Iterator[tuple[Any, ...]]:
+    yield first
+    yield from rest
+
+
+__all__ = [
+    'TeacherImportError',
+    'TeacherImportResult',
+    'generate_password',
+    'import_limits',
+    'import_teachers',
+    'iter_workbook_rows',
+    'too_many_rows_message',
+    'upload_body_limit',
+    'upload_too_large_message',
+]
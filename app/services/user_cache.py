@@ -0,0 +1,157 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from flask import current_app, has_app_context
+from flask_login import UserMixin
+
+from ..models import School, User
+from ..signals import school_changed, user_changed
+
+DEFAULT_TTL_SECONDS = 60
+
+
+@dataclass(frozen=True)
+class SchoolSnapshot:
+    school_id: int
+    school_name: str
+    invite_code: Optional[str]
+
+    @classmethod
+    def from_school(cls, school: School) -> 'SchoolSnapshot':
+        return cls(school_id=school.school_id, school_name=school.school_name, invite_code=school.invite_code)
+
+
+@dataclass(frozen=True, eq=False)
+class SessionUser(UserMixin):
+    """Read-only identity of the logged-in user, detached from any session.
+
+    It carries what templates, policies and routes read from
+    ``current_user``. Code that changes the user has to load the ORM object
+    through ``UserRepository`` instead.
+    """
+
+    user_id: int
+    email: str
+    first_name: str
+    last_name: str
+    middle_name: Optional[str]
+    role: str
+    school_id: Optional[int]
+    school: Optional[SchoolSnapshot]
+
+    @classmethod
+    def from_user(cls, user: User) -> 'SessionUser':
+        return cls(
+            user_id=user.user_id,
+            email=user.email,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            middle_name=user.middle_name,
+            role=user.role,
+            school_id=user.school_id,
+            school=SchoolSnapshot.from_school(user.school) if user.school else None,
+        )
+
+    @property
+    def teacher_id(self) -> Optional[int]:
+        return self.user_id if self.role == 'teacher' else None
+
+    @property
+    def parent_id(self) -> Optional[int]:
+        return self.user_id if self.role == 'parent' else None
+
+    @property
+    def admin_id(self) -> Optional[int]:
+        return self.user_id if self.role == 'admin' else None
+
+    @property
+    def surname_name(self) -> str:
+        return f'{self.last_name} {self.first_name}'
+
+    @property
+    def full_name(self) -> str:
+        return f'{self.last_name} {self.first_name} {self.middle_name or ""}'.strip()
+
+    @property
+    def initials(self) -> str:
+        return f'{self.last_name} {self.first_name[0]}. {self.middle_name[0] + "." if self.middle_name else ""}'
+
+    def get_id(self) -> str:
+        return str(self.user_id)
+
+
+class UserSessionCache:
+    """Per-process TTL cache of SessionUser snapshots keyed by user id.
+
+    Changes made through the repositories in this process drop entries via
+    the ``user_changed``/``school_changed`` signals; changes made by other
+    workers become visible once the TTL (``USER_CACHE_TTL_SECONDS``) runs out.
+    """
+
+    def __init__(self, max_users: int = 1024) -> None:
+        self.max_users = max_users
+        self._entries: OrderedDict[int, tuple[float, SessionUser]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        user_changed.connect(self._on_user_changed, weak=False)
+        school_changed.connect(self._on_school_changed, weak=False)
+
+    @staticmethod
+    def ttl() -> float:
+        if has_app_context():
+            configured = current_app.config.get('USER_CACHE_TTL_SECONDS')
+            if configured is not None:
+                return float(configured)
+        return DEFAULT_TTL_SECONDS
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get(self, user_id: int, loader: Callable[[int], Optional[User]]) -> Optional[SessionUser]:
+        ttl = self.ttl()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                return entry[1]
+
+        user = loader(user_id)
+        if user is None:
+            self.invalidate(user_id)
+            return None
+
+        snapshot = SessionUser.from_user(user)
+        if ttl > 0:
+            with self._lock:
+                self._entries[user_id] = (now + ttl, snapshot)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_users:
+                    self._entries.popitem(last=False)
+        return snapshot
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def invalidate_school(self, school_id: int) -> None:
+        with self._lock:
+            stale = [user_id for user_id, (_, user) in self._entries.items() if user.school_id == school_id]
+            for user_id in stale:
+                del self._entries[user_id]
+
+    def _on_user_changed(self, _sender: Any, *, user_id: int, **_kwargs: Any) -> None:
+        self.invalidate(user_id)
+
+    def _on_school_changed(self, _sender: Any, *, school_id: int, **_kwargs: Any) -> None:
+        self.invalidate_school(school_id)
+
+
+user_session_cache = UserSessionCache()
+
+
+__all__ = ['SchoolSnapshot', 'SessionUser', 'UserSessionCache', 'user_session_cache']
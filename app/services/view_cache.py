@@ -0,0 +1,119 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Protocol, TypeVar
+
+from ..models import Slot
+from ..signals import event_schedule_changed, slot_booked, slot_released, user_changed
+
+ValueType = TypeVar('ValueType')
+
+
+class CacheBackend(Protocol):
+    """Storage behind EventViewCache; swap in a shared store for many workers."""
+
+    def get(self, key: str) -> Any: ...
+
+    def set(self, key: str, value: Any) -> None: ...
+
+    def counter(self, key: str) -> int: ...
+
+    def incr(self, key: str) -> int: ...
+
+
+class LRUCacheBackend:
+    """In-process backend: values are evicted least-recently-used, counters never."""
+
+    def __init__(self, max_entries: int = 128) -> None:
+        self.max_entries = max_entries
+        self._values: OrderedDict[str, Any] = OrderedDict()
+        self._counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            value = self._values.get(key)
+            if value is not None:
+                self._values.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._values[key] = value
+            self._values.move_to_end(key)
+            while len(self._values) > self.max_entries:
+                self._values.popitem(last=False)
+
+    def counter(self, key: str) -> int:
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+            self._counters.clear()
+
+
+class EventViewCache:
+    """Read-through cache of per-event view data.
+
+    Entries are keyed by event id, a version counter per event and a token
+    chosen by the caller (for example the booking version of the event).
+    Bookings, event edits and user changes bump the counters through
+    signals, so stale entries are never read again and simply age out of
+    the backend.
+    """
+
+    def __init__(self, name: str, backend: Optional[CacheBackend] = None) -> None:
+        self.name = name
+        self.backend: CacheBackend = backend or LRUCacheBackend()
+
+        slot_booked.connect(self._on_slot_changed, weak=False)
+        slot_released.connect(self._on_slot_changed, weak=False)
+        event_schedule_changed.connect(self._on_event_changed, weak=False)
+        user_changed.connect(self._on_user_changed, weak=False)
+
+    def set_backend(self, backend: CacheBackend) -> None:
+        self.backend = backend
+
+    def _version_key(self, event_id: Optional[int] = None) -> str:
+        return f'{self.name}:version:{"all" if event_id is None else event_id}'
+
+    def bump(self, event_id: int) -> None:
+        self.backend.incr(self._version_key(event_id))
+
+    def bump_all(self) -> None:
+        self.backend.incr(self._version_key())
+
+    def version(self, event_id: int) -> tuple[int, int]:
+        return self.backend.counter(self._version_key()), self.backend.counter(self._version_key(event_id))
+
+    def get_or_build(self, event_id: int, token: Hashable, builder: Callable[[], ValueType]) -> ValueType:
+        generation, version = self.version(event_id)
+        key = f'{self.name}:{event_id}:{generation}:{version}:{token!r}'
+        value = self.backend.get(key)
+        if value is None:
+            value = builder()
+            self.backend.set(key, value)
+        return value
+
+    def _on_slot_changed(self, _sender: Any, *, slot: Slot, **_kwargs: Any) -> None:
+        self.bump(slot.event_id)
+
+    def _on_event_changed(self, _sender: Any, *, event_id: int, **_kwargs: Any) -> None:
+        self.bump(event_id)
+
+    def _on_user_changed(self, _sender: Any, **_kwargs: Any) -> None:
+        # Teacher names and emails are part of the views; renames are rare
+        # enough to drop everything.
+        self.bump_all()
+
+
+booking_grid_cache = EventViewCache('booking-grid')
+
+
+__all__ = ['CacheBackend', 'EventViewCache', 'LRUCacheBackend', 'booking_grid_cache']
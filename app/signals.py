@@ -0,0 +1,29 @@
+from blinker import Namespace
+
+_signals = Namespace()
+
+# Sent with ``event_id`` after an event is created, edited or deleted.
+event_schedule_changed = _signals.signal('event-schedule-changed')
+
+# Sent with ``slot`` after a booking is committed or removed.
+slot_booked = _signals.signal('slot-booked')
+slot_released = _signals.signal('slot-released')
+
+# Sent with ``user_id`` / ``school_id`` after a user or school row is
+# updated or deleted.
+user_changed = _signals.signal('user-changed')
+school_changed = _signals.signal('school-changed')
+
+# Sent by the app with ``endpoint`` and ``findings`` when N+1 detection
+# flags a request.
+n_plus_one_detected = _signals.signal('n-plus-one-detected')
+
+
+__all__ = [
+    'event_schedule_changed',
+    'n_plus_one_detected',
+    'school_changed',
+    'slot_booked',
+    'slot_released',
+    'user_changed',
+]
@@ -59,4 +59,4 @@ function setupCopyButtons(root = document) {
     });
 }
 
-export { setupCopyButtons };
+export { setupCopyButtons, writeToClipboard };
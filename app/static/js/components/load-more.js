@@ -0,0 +1,59 @@
+import { qs } from '../utils/dom.js';
+
+function setupLoadMore({ root = document, gridSelector, onAppend = null } = {}) {
+    const grid = qs(root, gridSelector);
+    if (!grid) {
+        return;
+    }
+
+    const bindContainer = (container) => {
+        const link = container ? qs(container, '[data-load-more-link]') : null;
+        if (!link) {
+            return;
+        }
+
+        link.addEventListener('click', async (event) => {
+            event.preventDefault();
+            if (container.getAttribute('aria-busy') === 'true') {
+                return;
+            }
+            container.setAttribute('aria-busy', 'true');
+
+            try {
+                const response = await fetch(link.href, {
+                    credentials: 'same-origin',
+                    headers: { 'X-Requested-With': 'fetch' },
+                });
+                if (!response.ok) {
+                    throw new Error(`Unexpected status ${response.status}`);
+                }
+
+                const html = await response.text();
+                const page = new DOMParser().parseFromString(html, 'text/html');
+                const nextGrid = qs(page, gridSelector);
+                const appended = nextGrid ? Array.from(nextGrid.children) : [];
+                appended.forEach((node) => grid.appendChild(document.adoptNode(node)));
+
+                const nextContainer = qs(page, '[data-load-more]');
+                if (nextContainer) {
+                    const adopted = document.adoptNode(nextContainer);
+                    container.replaceWith(adopted);
+                    bindContainer(adopted);
+                } else {
+                    container.remove();
+                }
+
+                if (onAppend && appended.length) {
+                    onAppend(grid);
+                }
+            } catch (error) {
+                container.removeAttribute('aria-busy');
+                window.location.assign(link.href);
+            }
+        });
+    };
+
+    bindContainer(qs(root, '[data-load-more]'));
+}
+
+export { setupLoadMore };
@@ -0,0 +1,74 @@
+async function fetchCurrentPage() {
+    const response = await fetch(window.location.href, {
+        credentials: 'same-origin',
+        headers: { 'X-Requested-With': 'fetch' },
+    });
+    if (!response.ok) {
+        throw new Error(`Unexpected status ${response.status}`);
+    }
+    const html = await response.text();
+    return new DOMParser().parseFromString(html, 'text/html');
+}
+
+function subscribeSlotStream(url, { onSlot, onReconnect = null, onResync = null } = {}) {
+    if (!url || typeof window.EventSource !== 'function') {
+        return null;
+    }
+
+    const source = new EventSource(url);
+    let connected = false;
+
+    source.addEventListener('ready', () => {
+        // Bookings made while the browser was reconnecting were not pushed.
+        if (connected && onReconnect) {
+            onReconnect();
+        }
+        connected = true;
+    });
+
+    source.addEventListener('slot', (event) => {
+        let delta = null;
+        try {
+            delta = JSON.parse(event.data);
+        } catch (error) {
+            return;
+        }
+        onSlot(delta);
+    });
+
+    source.addEventListener('resync', () => {
+        source.close();
+        if (onResync) {
+            onResync();
+        } else {
+            window.location.reload();
+        }
+    });
+
+    window.addEventListener('pagehide', () => source.close(), { once: true });
+    return source;
+}
+
+function pollWhileVisible(seconds, refresh) {
+    const intervalMs = Number(seconds) * 1000;
+    if (!(intervalMs > 0)) {
+        return null;
+    }
+
+    // Unchanged pages come back as 304s, so polling visible tabs stays cheap.
+    return window.setInterval(() => {
+        if (document.visibilityState === 'visible') {
+            refresh();
+        }
+    }, intervalMs);
+}
+
+function watchSlots(grid, { onSlot, refresh }) {
+    const source = subscribeSlotStream(grid.dataset.slotStream, { onSlot, onReconnect: refresh });
+    if (!source) {
+        pollWhileVisible(grid.dataset.slotPoll, refresh);
+    }
+    return source;
+}
+
+export { fetchCurrentPage, pollWhileVisible, subscribeSlotStream, watchSlots };
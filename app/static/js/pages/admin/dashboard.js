@@ -1,3 +1,4 @@
+import { fetchCurrentPage, watchSlots } from '../../components/slot-stream.js';
 import { qs, qsa } from '../../utils/dom.js';
 
 function setupCountdown(root = document) {
@@ -128,9 +129,62 @@ function setupTeacherSearch(root = document) {
     applyFilter();
 }
 
+function setSlotCellState(cell, state) {
+    cell.dataset.slotState = state;
+    cell.className = `teacher-card__slot teacher-card__slot--${state}`;
+}
+
+function refreshTeacherCard(card) {
+    const cells = qsa(card, '[data-slot-cell]');
+    const full = cells.length > 0 && cells.every((cell) => cell.dataset.slotState !== 'free');
+    card.classList.toggle('teacher-card--full', full);
+    const banner = qs(card, '[data-teacher-full-banner]');
+    if (banner) {
+        banner.hidden = !full;
+    }
+}
+
+function setupLiveSlots(root = document) {
+    const grid = qs(root, '[data-slot-poll]');
+    if (!grid) {
+        return;
+    }
+
+    const cardsById = new Map(qsa(grid, '[data-teacher-card]').map((card) => [card.dataset.teacherId, card]));
+
+    const applyState = (teacherId, index, state) => {
+        const card = cardsById.get(String(teacherId));
+        const cell = card ? qs(card, `[data-slot-cell][data-slot-index="${index}"]`) : null;
+        if (!cell || cell.dataset.slotState === state) {
+            return;
+        }
+        setSlotCellState(cell, state);
+        refreshTeacherCard(card);
+    };
+
+    const syncFromPage = async () => {
+        try {
+            const page = await fetchCurrentPage();
+            qsa(page, '[data-teacher-card]').forEach((card) => {
+                qsa(card, '[data-slot-cell]').forEach((cell) => {
+                    applyState(card.dataset.teacherId, cell.dataset.slotIndex, cell.dataset.slotState);
+                });
+            });
+        } catch (error) {
+            // The next delta or reload brings the grid up to date.
+        }
+    };
+
+    watchSlots(grid, {
+        onSlot: (delta) => applyState(delta.teacher_id, delta.index, delta.state),
+        refresh: syncFromPage,
+    });
+}
+
 function initAdminDashboard(root = document) {
     setupCountdown(root);
     setupTeacherSearch(root);
+    setupLiveSlots(root);
 }
 
 if (document.readyState === 'loading') {
@@ -1,4 +1,5 @@
 import { setupDropdowns } from '../../components/dropdowns.js';
+import { setupLoadMore } from '../../components/load-more.js';
 import { setupEventsModal } from './modal.js';
 import { setupEventsGrid } from './grid.js';
 import { setupEventsDetails } from './details.js';
@@ -8,6 +9,7 @@ function initEventsPage(root = document) {
     setupEventsDetails(root);
     setupDropdowns(root);
     setupEventsGrid({ root, modalManager });
+    setupLoadMore({ root, gridSelector: '.events-grid', onAppend: (grid) => setupDropdowns(grid) });
 }
 
 if (document.readyState === 'loading') {
@@ -1,3 +1,5 @@
+import { watchSlots } from '../../components/slot-stream.js';
+
 const forms = document.querySelectorAll('[data-slot-form]');
 const modalTemplate = document.getElementById('parent-slot-modal-template');
 
@@ -22,6 +24,22 @@ const ACTION_DESCRIPTIONS = {
     cancel: 'Вы собираетесь отменить свою запись.',
 };
 
+const STATE_BADGES = {
+    mine: 'Отменить запись',
+    taken: 'Занято',
+    closed: 'Поздно записываться',
+};
+
+const LOCKED_STATES = new Set(['taken', 'closed']);
+
+// Codes of the compact grid served by /parent/events/grid.
+const GRID_STATES = {
+    a: 'available',
+    m: 'mine',
+    t: 'taken',
+    c: 'closed',
+};
+
 function ensureModal() {
     if (!modalTemplate) {
         return null;
@@ -162,19 +180,138 @@ function submitFormImmediately(form) {
     }
 }
 
-forms.forEach((form) => {
+function slotKey(teacherId, index) {
+    return `${teacherId}:${index}`;
+}
+
+function formKey(form) {
+    const teacherId = form.querySelector('input[name="teacher_id"]')?.value;
+    const index = form.querySelector('input[name="slot_index"]')?.value;
+    return slotKey(teacherId, index);
+}
+
+function applySlotState(form, state, slotId) {
     const button = form.querySelector('[data-slot-button]');
-    if (!button) {
+    if (!button || button.classList.contains('parent-slot--pending')) {
+        return;
+    }
+
+    const action = state === 'mine' ? 'cancel' : 'book';
+    form.dataset.slotState = state;
+    form.dataset.slotId = slotId ?? '';
+    const slotIdInput = form.querySelector('input[name="slot_id"]');
+    if (slotIdInput) {
+        slotIdInput.value = slotId ?? '';
+    }
+    const actionInput = form.querySelector('input[name="action"]');
+    if (actionInput) {
+        actionInput.value = action;
+    }
+
+    button.className = `parent-slot parent-slot--${state}`;
+    button.dataset.slotAction = action;
+    button.disabled = LOCKED_STATES.has(state);
+    if (state === 'mine') {
+        button.setAttribute('aria-pressed', 'true');
+    } else {
+        button.removeAttribute('aria-pressed');
+    }
+
+    let badge = button.querySelector('.parent-slot__badge');
+    const badgeText = STATE_BADGES[state];
+    if (!badgeText) {
+        badge?.remove();
+    } else {
+        if (!badge) {
+            badge = document.createElement('span');
+            badge.className = 'parent-slot__badge';
+            button.appendChild(badge);
+        }
+        badge.textContent = badgeText;
+    }
+
+    if (activeForm === form && LOCKED_STATES.has(state)) {
+        closeModal();
+    }
+}
+
+function setupLiveUpdates() {
+    const grid = document.querySelector('[data-slot-grid]');
+    if (!grid) {
         return;
     }
 
-    const state = form.dataset.slotState;
+    const formsByKey = new Map();
+    forms.forEach((form) => formsByKey.set(formKey(form), form));
+
+    const applyGrid = (data) => {
+        if (String(data.event_id) !== grid.dataset.eventId) {
+            window.location.reload();
+            return;
+        }
+        const slotIds = new Map(data.mine.map(([teacherId, index, slotId]) => [slotKey(teacherId, index), slotId]));
+        data.teachers.forEach(([teacherId, , states]) => {
+            Array.from(states).forEach((code, index) => {
+                const key = slotKey(teacherId, index);
+                const form = formsByKey.get(key);
+                const state = GRID_STATES[code];
+                if (form && state && form.dataset.slotState !== state) {
+                    applySlotState(form, state, slotIds.get(key) ?? null);
+                }
+            });
+        });
+    };
+
+    let refreshing = false;
+    const refreshGrid = async () => {
+        if (refreshing) {
+            return;
+        }
+        refreshing = true;
+        try {
+            const response = await fetch(grid.dataset.slotGrid, {
+                credentials: 'same-origin',
+                headers: { Accept: 'application/json' },
+            });
+            if (response.ok) {
+                applyGrid(await response.json());
+            }
+        } catch (error) {
+            // The next delta or refresh brings the grid up to date.
+        } finally {
+            refreshing = false;
+        }
+    };
+
+    document.addEventListener('visibilitychange', () => {
+        if (document.visibilityState === 'visible') {
+            refreshGrid();
+        }
+    });
 
-    if (button.disabled || state === 'taken' || state === 'closed') {
+    watchSlots(grid, {
+        onSlot: (delta) => {
+            const form = formsByKey.get(slotKey(delta.teacher_id, delta.index));
+            if (form) {
+                applySlotState(form, delta.state, delta.slot_id);
+            }
+        },
+        refresh: refreshGrid,
+    });
+}
+
+forms.forEach((form) => {
+    const button = form.querySelector('[data-slot-button]');
+    if (!button) {
         return;
     }
 
     form.addEventListener('submit', (event) => {
+        if (LOCKED_STATES.has(form.dataset.slotState)) {
+            event.preventDefault();
+            return;
+        }
+
         if (form.dataset.skipConfirm === 'true') {
             delete form.dataset.skipConfirm;
             return;
@@ -184,3 +321,5 @@ forms.forEach((form) => {
         openModal(form);
     });
 });
+
+setupLiveUpdates();
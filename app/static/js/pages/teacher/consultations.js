@@ -0,0 +1,13 @@
+import { setupLoadMore } from '../../components/load-more.js';
+
+function initTeacherConsultations(root = document) {
+    setupLoadMore({ root, gridSelector: '.teacher-consultations__list' });
+}
+
+if (document.readyState === 'loading') {
+    document.addEventListener('DOMContentLoaded', () => initTeacherConsultations(), { once: true });
+} else {
+    initTeacherConsultations();
+}
+
+export { initTeacherConsultations };
@@ -1,7 +1,9 @@
+import { setupLoadMore } from '../../components/load-more.js';
 import { setupEventsDetails } from '../events/details.js';
 
 function initTeacherEvents(root = document) {
     setupEventsDetails(root);
+    setupLoadMore({ root, gridSelector: '.events-grid' });
 }
 
 if (document.readyState === 'loading') {
@@ -1,5 +1,34 @@
 import { qs } from '../../utils/dom.js';
 import { closeAllDropdowns } from '../../components/dropdowns.js';
+import { createAlert } from '../../components/alerts.js';
+import { writeToClipboard } from '../../components/copy-buttons.js';
+
+async function requestPasswordLink(url, teacherName) {
+    try {
+        const response = await fetch(url, {
+            method: 'POST',
+            headers: { Accept: 'application/json' },
+        });
+        const data = await response.json().catch(() => null);
+        if (!response.ok || !data || !data.success) {
+            createAlert({
+                message: (data && data.message) || 'Не удалось получить ссылку. Попробуйте позже',
+                type: 'danger',
+            });
+            return;
+        }
+        const copied = await writeToClipboard(data.link);
+        const subject = `Ссылка для установки пароля${teacherName ? ` (${teacherName})` : ''}`;
+        createAlert({
+            message: copied ? `${subject} скопирована:` : `${subject}:`,
+            type: 'success',
+            details: [data.link],
+        });
+    } catch (error) {
+        console.error('Failed to request password link', error);
+        createAlert({ message: 'Не удалось получить ссылку. Попробуйте позже', type: 'danger' });
+    }
+}
 
 function setupTeacherGrid({ root = document, modalManager = null } = {}) {
     const teacherGrid = qs(root, '.teachers-grid');
@@ -27,6 +56,11 @@ function setupTeacherGrid({ root = document, modalManager = null } = {}) {
             return;
         }
 
+        if (action === 'password-link') {
+            requestPasswordLink(actionButton.dataset.passwordLinkUrl, actionButton.dataset.teacherName || '');
+            return;
+        }
+
         if (action === 'delete') {
             if (!deleteForm) {
                 return;
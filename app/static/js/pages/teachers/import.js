@@ -2,6 +2,34 @@ import { qs } from '../../utils/dom.js';
 import { createAlert } from '../../components/alerts.js';
 
 const LOADING_MARKUP = '<span class="button__icon" aria-hidden="true">⏳</span><span>Загрузка…</span>';
+const POLL_INTERVAL_MS = 1000;
+
+function progressMarkup(processed) {
+    return `<span class="button__icon" aria-hidden="true">⏳</span><span>Импорт: ${processed} строк…</span>`;
+}
+
+function delay(ms) {
+    return new Promise((resolve) => {
+        window.setTimeout(resolve, ms);
+    });
+}
+
+async function waitForImportJob(statusUrl, onProgress) {
+    for (;;) {
+        await delay(POLL_INTERVAL_MS);
+        const response = await fetch(statusUrl, { headers: { Accept: 'application/json' } });
+        const data = await response.json().catch(() => null);
+        if (!response.ok || !data) {
+            return data && data.message
+                ? { success: false, ...data }
+                : { success: false, message: 'Не удалось получить статус импорта. Попробуйте позже' };
+        }
+        if (data.done) {
+            return data;
+        }
+        onProgress(data);
+    }
+}
 
 function buildTeachersDetailsList(teachers) {
     if (!Array.isArray(teachers) || !teachers.length) {
@@ -11,8 +39,8 @@ function buildTeachersDetailsList(teachers) {
     return teachers.map((teacher) => {
         const name = teacher.full_name || '—';
         const email = teacher.email || '—';
-        const password = teacher.password || '—';
-        return `${name} — ${email} — пароль: ${password}`;
+        const link = teacher.link || '—';
+        return `${name} — ${email} — ссылка для установки пароля: ${link}`;
     });
 }
 
@@ -109,6 +137,15 @@ function setupTeacherImport(root = document) {
                 return;
             }
 
+            if (data && data.status_url) {
+                importTrigger.innerHTML = progressMarkup(0);
+                const result = await waitForImportJob(data.status_url, (progress) => {
+                    importTrigger.innerHTML = progressMarkup(progress.processed || 0);
+                });
+                handleImportResponse(result);
+                return;
+            }
+
             handleImportResponse(data);
         } catch (error) {
             console.error('Failed to upload teachers file', error);
@@ -0,0 +1,27 @@
+"""Add updated_at to events
+
+Revision ID: 3c5e8a1f9b27
+Revises: bac3ec7e9f54
+Create Date: 2025-10-20 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c5e8a1f9b27'
+down_revision = 'bac3ec7e9f54'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'events',
+        sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.func.now(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('events', 'updated_at')
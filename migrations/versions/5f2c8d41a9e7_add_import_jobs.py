@@ -0,0 +1,57 @@
+"""Add import_jobs queue table
+
+Revision ID: 5f2c8d41a9e7
+Revises: e4b91c7d2f60
+Create Date: 2025-10-22 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5f2c8d41a9e7'
+down_revision = 'e4b91c7d2f60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'import_jobs',
+        sa.Column('job_id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column(
+            'status',
+            sa.Enum('queued', 'running', 'completed', 'failed', name='importjobstatus'),
+            nullable=False,
+        ),
+        sa.Column('file_path', sa.String(length=255), nullable=True),
+        sa.Column('processed_rows', sa.Integer(), nullable=False),
+        sa.Column('created_count', sa.Integer(), nullable=False),
+        sa.Column('failed_count', sa.Integer(), nullable=False),
+        sa.Column('errors', sa.Text(), nullable=True),
+        sa.Column('result', sa.Text(), nullable=True),
+        sa.Column('message', sa.String(length=255), nullable=True),
+        sa.Column('worker_id', sa.String(length=64), nullable=True),
+        sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.func.now(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('school_id', sa.Integer(), nullable=False),
+        sa.Column('created_by', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ['school_id'], ['schools.school_id'],
+            name=op.f('fk_import_jobs_school_id_schools'), ondelete='CASCADE', onupdate='CASCADE',
+        ),
+        sa.ForeignKeyConstraint(
+            ['created_by'], ['users.user_id'],
+            name=op.f('fk_import_jobs_created_by_users'), ondelete='SET NULL', onupdate='CASCADE',
+        ),
+        sa.PrimaryKeyConstraint('job_id', name=op.f('pk_import_jobs')),
+    )
+    # Workers pick the oldest queued job.
+    op.create_index('ix_import_jobs_status', 'import_jobs', ['status', 'job_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_import_jobs_status', table_name='import_jobs')
+    op.drop_table('import_jobs')
@@ -0,0 +1,40 @@
+"""Add composite indexes for the hot repository queries
+
+Revision ID: 8c1e5a7d3b42
+Revises: 5f2c8d41a9e7
+Create Date: 2025-10-23 12:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8c1e5a7d3b42'
+down_revision = '5f2c8d41a9e7'
+branch_labels = None
+depends_on = None
+
+
+# slots(event_id) and slots(event_id, teacher_id, start_time) are already
+# served by uq_slots_event_teacher_start.
+INDEXES = (
+    ('ix_slots_parent_status_start', 'slots', ['parent_id', 'status', 'start_time']),
+    ('ix_events_school_end', 'events', ['school_id', 'end_time']),
+    ('ix_events_school_status_start', 'events', ['school_id', 'status', 'start_time']),
+    ('ix_users_school_role_name', 'users', ['school_id', 'role', 'last_name', 'first_name']),
+)
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    # Each index starts with a foreign key column; MySQL may have dropped
+    # the implicit foreign key index in its favour, so bring those back first.
+    op.create_index('ix_slots_parent_id', 'slots', ['parent_id'])
+    op.create_index('ix_events_school_id', 'events', ['school_id'])
+    op.create_index('ix_users_school_id', 'users', ['school_id'])
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
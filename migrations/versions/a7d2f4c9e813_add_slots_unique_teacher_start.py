@@ -0,0 +1,45 @@
+"""Add unique (event_id, teacher_id, start_time) index to slots
+
+Revision ID: a7d2f4c9e813
+Revises: 3c5e8a1f9b27
+Create Date: 2025-10-20 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d2f4c9e813'
+down_revision = '3c5e8a1f9b27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keep one row of every double-booked slot before the index makes
+    # duplicates impossible: a booked row wins over a cancelled one, then the
+    # earliest. Every other row has such a keeper and is deleted.
+    op.execute(
+        sa.text(
+            'DELETE dropped FROM slots AS dropped '
+            'JOIN slots AS keeper '
+            'ON keeper.event_id = dropped.event_id '
+            'AND keeper.teacher_id = dropped.teacher_id '
+            'AND keeper.start_time = dropped.start_time '
+            "AND (keeper.status = 'booked' AND dropped.status <> 'booked' "
+            'OR keeper.status = dropped.status AND keeper.slot_id < dropped.slot_id)'
+        )
+    )
+    op.create_unique_constraint(
+        'uq_slots_event_teacher_start',
+        'slots',
+        ['event_id', 'teacher_id', 'start_time'],
+    )
+
+
+def downgrade() -> None:
+    # MySQL may have dropped its implicit foreign key index on event_id in
+    # favour of the unique one, so give the foreign key an index back first.
+    op.create_index('ix_slots_event_id', 'slots', ['event_id'])
+    op.drop_constraint('uq_slots_event_teacher_start', 'slots', type_='unique')
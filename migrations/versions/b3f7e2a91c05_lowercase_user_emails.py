@@ -0,0 +1,33 @@
+"""Store user emails lowercased
+
+Revision ID: b3f7e2a91c05
+Revises: 8c1e5a7d3b42
+Create Date: 2025-10-24 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3f7e2a91c05'
+down_revision = '8c1e5a7d3b42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The app now lowercases emails on write and looks them up through
+    # uq_users_email as is. The default MySQL collation is case-insensitive,
+    # so the unique index already rules out two rows that collide here.
+    op.execute(
+        sa.text(
+            'UPDATE users SET email = LOWER(TRIM(email)) '
+            'WHERE BINARY email <> BINARY LOWER(TRIM(email))'
+        )
+    )
+
+
+def downgrade() -> None:
+    # The original spelling is gone; lowercased emails stay valid.
+    pass
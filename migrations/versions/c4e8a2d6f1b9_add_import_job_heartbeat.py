@@ -0,0 +1,26 @@
+"""Track import job liveness with a heartbeat
+
+Revision ID: c4e8a2d6f1b9
+Revises: f2b6d9e4a173
+Create Date: 2025-10-27 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8a2d6f1b9'
+down_revision = 'f2b6d9e4a173'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('import_jobs', sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+    # Jobs running during the upgrade keep their claim until the next beat is due.
+    op.execute("UPDATE import_jobs SET heartbeat_at = started_at WHERE status = 'running'")
+
+
+def downgrade() -> None:
+    op.drop_column('import_jobs', 'heartbeat_at')
@@ -0,0 +1,36 @@
+"""Rebuild the event search FULLTEXT index with the ngram parser
+
+Revision ID: d5a8c3f1e926
+Revises: b3f7e2a91c05
+Create Date: 2025-10-25 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a8c3f1e926'
+down_revision = 'b3f7e2a91c05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.drop_index('ix_events_search_text', table_name='events')
+    # The stopword setting is captured when the index is created. The
+    # default list holds single letters, which would drop every Latin
+    # ngram containing "a" or "i" and hide e.g. teacher emails.
+    op.execute(sa.text('SET SESSION innodb_ft_enable_stopword = OFF'))
+    op.create_index(
+        'ix_events_search_text',
+        'events',
+        ['search_text'],
+        mysql_prefix='FULLTEXT',
+        mysql_with_parser='ngram',
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_events_search_text', table_name='events')
+    op.create_index('ix_events_search_text', 'events', ['search_text'], mysql_prefix='FULLTEXT')
@@ -0,0 +1,45 @@
+"""Add denormalized search_text to events
+
+Revision ID: e4b91c7d2f60
+Revises: a7d2f4c9e813
+Create Date: 2025-10-21 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b91c7d2f60'
+down_revision = 'a7d2f4c9e813'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('events', sa.Column('search_text', sa.Text(), nullable=True))
+
+    # Same content as build_search_text(): name, period, teachers, buildings
+    # and rooms, lowercased. updated_at is kept so the backfill does not
+    # look like a schedule change.
+    op.execute(
+        sa.text(
+            "UPDATE events AS e SET e.updated_at = e.updated_at, e.search_text = LOWER(CONCAT_WS(' ', "
+            "e.name, "
+            "DATE_FORMAT(e.start_time, '%d.%m.%Y %H:%i'), "
+            "DATE_FORMAT(e.end_time, '%d.%m.%Y %H:%i'), "
+            "(SELECT GROUP_CONCAT(CONCAT_WS(' ', u.last_name, u.first_name, u.middle_name, u.email) SEPARATOR ' ') "
+            "FROM event_teachers AS et JOIN users AS u ON u.user_id = et.teacher_id "
+            "WHERE et.event_id = e.event_id), "
+            "(SELECT GROUP_CONCAT(CONCAT_WS(' ', b.name, bb.classroom) SEPARATOR ' ') "
+            "FROM building_booking AS bb LEFT JOIN buildings AS b ON b.building_id = bb.building_id "
+            "WHERE bb.event_id = e.event_id)"
+            "))"
+        )
+    )
+    op.create_index('ix_events_search_text', 'events', ['search_text'], mysql_prefix='FULLTEXT')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_events_search_text', table_name='events')
+    op.drop_column('events', 'search_text')
@@ -0,0 +1,46 @@
+"""Persist the event list status order and index the list order
+
+Revision ID: f2b6d9e4a173
+Revises: d5a8c3f1e926
+Create Date: 2025-10-26 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b6d9e4a173'
+down_revision = 'd5a8c3f1e926'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Same expression as Event.status_order.
+    op.add_column(
+        'events',
+        sa.Column(
+            'status_order',
+            sa.Integer(),
+            sa.Computed(
+                "CASE status WHEN 'ongoing' THEN 0 WHEN 'scheduled' THEN 1 "
+                "WHEN 'completed' THEN 2 WHEN 'cancelled' THEN 3 ELSE 4 END",
+                persisted=True,
+            ),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        'ix_events_school_status_order_start',
+        'events',
+        ['school_id', 'status_order', 'start_time', sa.text('event_id DESC')],
+    )
+    # The new index also starts with school_id, so the foreign key stays covered.
+    op.drop_index('ix_events_school_status_start', table_name='events')
+
+
+def downgrade() -> None:
+    op.create_index('ix_events_school_status_start', 'events', ['school_id', 'status', 'start_time'])
+    op.drop_index('ix_events_school_status_order_start', table_name='events')
+    op.drop_column('events', 'status_order')
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, text
+
+from app import create_app
+from app.models import (
+    Admin, Base, Building, BuildingBooking, Event, Parent, School, Slot, SlotStatus, Teacher, db,
+)
+
+# SQLite has no TIMESTAMPDIFF; the duration columns get an equivalent there.
+SQLITE_MINUTES_BETWEEN = 'CAST((julianday(end_time) - julianday(start_time)) * 1440 AS INTEGER)'
+
+for table in Base.metadata.tables.values():
+    for column in table.columns:
+        if column.computed is not None and 'TIMESTAMPDIFF' in str(column.computed.sqltext):
+            column.computed.sqltext = text(SQLITE_MINUTES_BETWEEN)
+
+
+@pytest.fixture(scope='module')
+def app(tmp_path_factory):
+    database = tmp_path_factory.mktemp('db') / 'consult.db'
+    app = create_app({
+        'TESTING': True,
+        'SECRET_KEY': 'test',
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database}',
+    })
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture(scope='module')
+def school(app):
+    """A school with an admin, a parent, three teachers and two events."""
+    with app.app_context():
+        school = School(school_name='Школа')
+        school.assign_invite_code()
+        db.session.add(school)
+        db.session.flush()
+
+        admin = Admin(email='admin@example.com', first_name='Анна', last_name='Админова', school_id=school.school_id)
+        parent = Parent(email='parent@example.com', first_name='Пётр', last_name='Родителев', school_id=school.school_id)
+        teachers = [
+            Teacher(email=f'teacher{i}@example.com', first_name='Учитель', last_name=f'Учителев{i}',
+                    school_id=school.school_id)
+            for i in range(3)
+        ]
+        for user in (admin, parent, *teachers):
+            user.set_password(f'password-{user.email}')
+        db.session.add_all([admin, parent, *teachers])
+        db.session.flush()
+
+        building = Building(name='Главный корпус', address='ул. Школьная, 1', school_id=school.school_id)
+        db.session.add(building)
+        db.session.flush()
+
+        start = datetime.now().replace(second=0, microsecond=0) + timedelta(days=1)
+        upcoming = Event(
+            name='Вечер консультаций', school_id=school.school_id, start_time=start,
+            end_time=start + timedelta(minutes=150), consultations_count=10, consultation_duration_minutes=15,
+        )
+        upcoming.teachers = teachers
+        past_start = start - timedelta(days=30)
+        past = Event(
+            name='Прошедшие консультации', school_id=school.school_id, start_time=past_start,
+            end_time=past_start + timedelta(minutes=60), consultations_count=4, consultation_duration_minutes=15,
+        )
+        past.teachers = teachers[:1]
+        db.session.add_all([upcoming, past])
+        db.session.flush()
+
+        db.session.add(BuildingBooking(
+            teacher_id=teachers[0].teacher_id, building_id=building.building_id,
+            event_id=upcoming.event_id, classroom='101',
+        ))
+        for i in range(2):
+            db.session.add(Slot(
+                event_id=upcoming.event_id, teacher_id=teachers[0].teacher_id, parent_id=parent.parent_id,
+                start_time=start + timedelta(minutes=15 * i), end_time=start + timedelta(minutes=15 * (i + 1)),
+                status=SlotStatus.booked,
+            ))
+        db.session.commit()
+
+        return {
+            'school_id': school.school_id,
+            'event_id': upcoming.event_id,
+            'admin_id': admin.user_id,
+            'parent_id': parent.user_id,
+            'teacher_ids': [teacher.user_id for teacher in teachers],
+        }
+
+
+@pytest.fixture(scope='module')
+def seeded_school_id(app):
+    """A realistic school from `flask seed school`: planners and N+1s need volume."""
+    result = app.test_cli_runner().invoke(args=[
+        'seed', 'school', '--parents', '50', '--events', '10', '--teachers', '20',
+        '--teachers-per-event', '10', '--slots-per-event', '10', '--random-seed', '1',
+    ])
+    assert result.exit_code == 0, result.output
+    with app.app_context():
+        return db.session.execute(select(School.school_id).order_by(School.school_id.desc())).scalar()
+
+
+@pytest.fixture
+def n_plus_one_raise(app):
+    """Fail the request with NPlusOneError when it repeats a query per row."""
+    keys = ('N_PLUS_ONE_DETECTION', 'N_PLUS_ONE_RAISE')
+    saved = {key: app.config.get(key) for key in keys}
+    app.config.update(N_PLUS_ONE_DETECTION=True, N_PLUS_ONE_RAISE=True)
+    yield
+    app.config.update(saved)
@@ -0,0 +1,100 @@
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+from app.cli.perf import logged_in_client
+from app.models import Event, Parent, Slot, db
+from app.repositories import SlotRepository, get_repository
+
+
+@pytest.fixture(scope='module')
+def second_parent_id(app, school):
+    with app.app_context():
+        parent = Parent(email='parent2@example.com', first_name='Ольга', last_name='Вторая',
+                        school_id=school['school_id'])
+        parent.set_password('password-parent2')
+        db.session.add(parent)
+        db.session.commit()
+        return parent.user_id
+
+
+def slot_rows(event_id: int, teacher_id: int, start_time) -> int:
+    return db.session.execute(
+        select(func.count()).select_from(Slot).where(
+            Slot.event_id == event_id, Slot.teacher_id == teacher_id, Slot.start_time == start_time,
+        )
+    ).scalar_one()
+
+
+def book(slot_repository: SlotRepository, event: Event, teacher_id: int, parent_id: int, index: int):
+    start = event.start_time + timedelta(minutes=event.consultation_duration_minutes * index)
+    return slot_repository.try_book(
+        event_id=event.event_id, teacher_id=teacher_id, parent_id=parent_id,
+        start_time=start, end_time=start + timedelta(minutes=event.consultation_duration_minutes),
+    )
+
+
+@pytest.mark.parametrize('second', ['same parent', 'other parent'])
+def test_a_slot_is_booked_once(app, school, second_parent_id, second):
+    teacher_id = school['teacher_ids'][1]
+    index = 3 if second == 'same parent' else 4
+    with app.app_context():
+        slot_repository: SlotRepository = get_repository('slots')
+        event = db.session.get(Event, school['event_id'])
+        first = book(slot_repository, event, teacher_id, school['parent_id'], index)
+        parent_id = school['parent_id'] if second == 'same parent' else second_parent_id
+        again = book(slot_repository, event, teacher_id, parent_id, index)
+
+        assert first.ok
+        assert (again.ok, again.error) == (False, 'taken')
+        assert slot_rows(event.event_id, teacher_id, first.request.start_time) == 1
+
+
+@pytest.mark.parametrize('parent_key, message', [
+    ('parent_id', 'Вы уже записаны на этот слот.'),
+    ('second_parent_id', 'Этот слот уже занят.'),
+])
+def test_booking_page_reports_who_holds_the_slot(app, school, second_parent_id, parent_key, message):
+    parent_id = second_parent_id if parent_key == 'second_parent_id' else school[parent_key]
+    with app.app_context():
+        client = logged_in_client(parent_id)
+        # Slot 0 of the first teacher is booked by the school's parent.
+        with app.app_context():
+            response = client.post('/parent/events', data={
+                'action': 'book', 'teacher_id': school['teacher_ids'][0], 'slot_index': 0,
+            })
+        assert response.status_code == 302
+        with client.session_transaction() as session:
+            assert [text for _, text in session['_flashes']] == [message]
+
+
+def test_concurrent_bookings_leave_one_row(app, school):
+    result = app.test_cli_runner().invoke(args=[
+        'slots', 'stress-booking', '--workers', '8', '--rounds', '2', '--event-id', str(school['event_id']),
+    ])
+    assert result.exit_code == 0, result.output
+    assert 'booked: 2,' in result.output
+    assert 'double bookings: 0' in result.output
+
+
+@pytest.mark.parametrize('atomic, free_status', [(True, 'skipped'), (False, 'booked')])
+def test_batch_reports_the_parents_own_slot_as_mine(app, school, atomic, free_status):
+    teacher_ids = school['teacher_ids']
+    with app.app_context():
+        own_slot_id = db.session.execute(
+            select(Slot.slot_id).where(
+                Slot.event_id == school['event_id'], Slot.teacher_id == teacher_ids[0],
+                Slot.parent_id == school['parent_id'],
+            ).order_by(Slot.start_time).limit(1)
+        ).scalar_one()
+        client = logged_in_client(school['parent_id'])
+        with app.app_context():
+            response = client.post('/parent/events/book', json={'atomic': atomic, 'items': [
+                {'teacher_id': teacher_ids[0], 'slot_index': 0},
+                {'teacher_id': teacher_ids[2], 'slot_index': 8 if atomic else 7},
+            ]})
+
+    items = response.get_json()['results']
+    assert [item['status'] for item in items] == ['mine', free_status]
+    assert items[0]['slot_id'] == own_slot_id
@@ -0,0 +1,26 @@
+from app.models import db
+from app.query_plans import captured_selects, explain_probes, full_scans
+
+
+def test_hot_queries_do_not_scan_tables(app, seeded_school_id):
+    with app.app_context():
+        scans = {
+            label: sorted({
+                table
+                for statement, parameters in captured_selects(probe)
+                for table in full_scans(statement, parameters, tables)
+            })
+            for label, tables, probe in explain_probes(seeded_school_id)
+        }
+    assert {label: tables for label, tables in scans.items() if tables} == {}
+
+
+def test_event_list_pages_are_read_in_index_order(app, seeded_school_id):
+    labels = ('EventRepository.get_for_school', 'EventRepository.get_for_school (next page)')
+    with app.app_context():
+        probes = {label: probe for label, _tables, probe in explain_probes(seeded_school_id)}
+        connection = db.session.connection()
+        for label in labels:
+            for statement, parameters in captured_selects(probes[label]):
+                plan = [row[-1] for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)]
+                assert not any('TEMP B-TREE' in detail for detail in plan), (label, plan)
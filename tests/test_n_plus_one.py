@@ -0,0 +1,47 @@
+import pytest
+from sqlalchemy import func, select
+
+from app.cli.perf import crawlable_routes, get_isolated, logged_in_client, parameterised_routes
+from app.models import Admin, Parent, Slot, Teacher, db, event_teachers_table
+from app.repositories import get_repository
+
+
+@pytest.fixture(scope='module')
+def busiest_users(app, seeded_school_id):
+    """The seeded admin, plus the teacher and parent with the most rows behind their pages."""
+    with app.app_context():
+        admin_id = db.session.execute(
+            select(Admin.admin_id).where(Admin.school_id == seeded_school_id)
+        ).scalar()
+        teacher_id = db.session.execute(
+            select(event_teachers_table.c.teacher_id)
+            .join(Teacher, Teacher.teacher_id == event_teachers_table.c.teacher_id)
+            .where(Teacher.school_id == seeded_school_id)
+            .group_by(event_teachers_table.c.teacher_id)
+            .order_by(func.count().desc())
+            .limit(1)
+        ).scalar()
+        parent_id = db.session.execute(
+            select(Slot.parent_id)
+            .join(Parent, Parent.parent_id == Slot.parent_id)
+            .where(Parent.school_id == seeded_school_id)
+            .group_by(Slot.parent_id)
+            .order_by(func.count().desc())
+            .limit(1)
+        ).scalar()
+    return {'admin': admin_id, 'teacher': teacher_id, 'parent': parent_id}
+
+
+@pytest.mark.parametrize('role', ['admin', 'teacher', 'parent'])
+def test_pages_have_no_n_plus_one(app, busiest_users, n_plus_one_raise, role):
+    with app.app_context():
+        user = get_repository('users').get_by_id(busiest_users[role])
+        extra_routes = parameterised_routes(user)
+        client = logged_in_client(user.user_id)
+        # NPlusOneError propagates out of the request and fails the test.
+        statuses = {route: get_isolated(client, route).status_code for route in crawlable_routes() + extra_routes}
+
+    assert all(status < 500 for status in statuses.values()), statuses
+    assert all(statuses[route] == 200 for route in extra_routes), statuses
+    if role != 'parent':
+        assert any('cursor=' in route for route in extra_routes)
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.cli.perf import ROLE_ROUTES, count_statements, get_isolated, logged_in_client
+from app.models import Event, Slot, SlotStatus, Teacher, db
+from app.services import user_session_cache
+
+# Statements a warm request may issue; the busiest pages need 8 today.
+MAX_WARM_QUERIES = 10
+
+
+def warm_counts(app, user_id: int, role: str) -> dict[str, int]:
+    counts = {}
+    with app.app_context():
+        client = logged_in_client(user_id)
+        for route in ROLE_ROUTES[role]:
+            user_session_cache.invalidate(user_id)
+            assert get_isolated(client, route).status_code == 200, route
+            with count_statements() as warm:
+                response = get_isolated(client, route)
+            assert response.status_code == 200, route
+            counts[route] = len(warm)
+    return counts
+
+
+def add_events(school: dict, count: int) -> None:
+    teachers = list(db.session.execute(
+        db.select(Teacher).where(Teacher.school_id == school['school_id'])
+    ).scalars())
+    start = datetime.now().replace(second=0, microsecond=0) + timedelta(days=2)
+    for day in range(count):
+        event_start = start + timedelta(days=day)
+        event = Event(
+            name=f'Консультации {day}', school_id=school['school_id'], start_time=event_start,
+            end_time=event_start + timedelta(minutes=60), consultations_count=4, consultation_duration_minutes=15,
+        )
+        event.teachers = teachers
+        db.session.add(event)
+        db.session.flush()
+        for teacher in teachers:
+            db.session.add(Slot(
+                event_id=event.event_id, teacher_id=teacher.teacher_id, parent_id=school['parent_id'],
+                start_time=event_start, end_time=event_start + timedelta(minutes=15), status=SlotStatus.booked,
+            ))
+    db.session.commit()
+
+
+@pytest.fixture(scope='module')
+def users(school):
+    return {
+        'admin': school['admin_id'],
+        'teacher': school['teacher_ids'][0],
+        'parent': school['parent_id'],
+    }
+
+
+@pytest.mark.parametrize('role', sorted(ROLE_ROUTES))
+def test_warm_requests_stay_within_budget(app, users, role):
+    counts = warm_counts(app, users[role], role)
+    over = {route: count for route, count in counts.items() if count > MAX_WARM_QUERIES}
+    assert not over, f'over {MAX_WARM_QUERIES} statements: {over}'
+
+
+def test_query_counts_do_not_grow_with_data(app, school, users):
+    before = {role: warm_counts(app, user_id, role) for role, user_id in users.items()}
+    with app.app_context():
+        add_events(school, 5)
+    after = {role: warm_counts(app, user_id, role) for role, user_id in users.items()}
+    assert after == before
@@ -0,0 +1,24 @@
+from app.cli.perf import get_isolated, logged_in_client
+
+
+def test_stream_is_off_by_default(app, school):
+    with app.app_context():
+        parent = logged_in_client(school['parent_id'])
+        admin = logged_in_client(school['admin_id'])
+        assert get_isolated(parent, f"/events/{school['event_id']}/stream").status_code == 404
+
+        for client, route in ((parent, '/parent/events'), (admin, '/')):
+            page = get_isolated(client, route).get_data(as_text=True)
+            assert 'data-slot-poll=' in page
+            assert 'data-slot-stream=' not in page
+
+
+def test_stream_can_be_enabled(app, school):
+    app.config['SLOT_STREAM_ENABLED'] = True
+    try:
+        with app.app_context():
+            parent = logged_in_client(school['parent_id'])
+            page = get_isolated(parent, '/parent/events').get_data(as_text=True)
+            assert f"data-slot-stream=\"/events/{school['event_id']}/stream\"" in page
+    finally:
+        app.config['SLOT_STREAM_ENABLED'] = False
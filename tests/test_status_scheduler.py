@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+from typing import Callable
+
+import pytest
+
+from app.models import EventStatus, School, db
+from app.repositories import get_repository
+from app.services.status_scheduler import StatusScheduler
+
+BASE = datetime(2030, 9, 1, 17, 0)
+
+
+class FakeClock:
+    def __init__(self, now: datetime) -> None:
+        self.now = now
+        self.on_sleep: Callable[[], None] = lambda: None
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.on_sleep()
+        self.now += timedelta(seconds=seconds)
+
+
+@pytest.fixture
+def scheduler_setup(app):
+    with app.app_context():
+        school = School(school_name='Школа планировщика')
+        school.assign_invite_code()
+        db.session.add(school)
+        db.session.commit()
+
+        repository = get_repository('events')
+        events = {
+            name: repository.create(
+                name=name, school_id=school.school_id, start_time=BASE + start, end_time=BASE + end,
+            ).event_id
+            for name, start, end in (
+                ('early', timedelta(minutes=30), timedelta(hours=3)),
+                ('late', timedelta(hours=1), timedelta(hours=2)),
+            )
+        }
+        clock = FakeClock(BASE)
+        scheduler = StatusScheduler(
+            repository,
+            clock=clock,
+            sleep=clock.sleep,
+            poll_interval=timedelta(days=1),
+            reload_interval=timedelta(days=1),
+        )
+        try:
+            yield repository, scheduler, clock, events
+        finally:
+            scheduler.close()
+            db.session.rollback()
+            db.session.delete(db.session.get(School, school.school_id))
+            db.session.commit()
+
+
+def statuses(repository, events):
+    db.session.expire_all()
+    return {name: repository.get_by_id(event_id).status for name, event_id in events.items()}
+
+
+def test_boundaries_are_kept_in_time_order(scheduler_setup):
+    _repository, scheduler, _clock, events = scheduler_setup
+    scheduler.run_pending()
+
+    assert scheduler.pending == [
+        (BASE + timedelta(minutes=30), events['early']),
+        (BASE + timedelta(hours=1), events['late']),
+        (BASE + timedelta(hours=2), events['late']),
+        (BASE + timedelta(hours=3), events['early']),
+    ]
+    assert scheduler.seconds_until_next() == 30 * 60
+
+
+def test_transitions_fire_exactly_at_the_boundaries(scheduler_setup):
+    repository, scheduler, clock, events = scheduler_setup
+    ticks: list[tuple[datetime, dict]] = []
+    clock.on_sleep = lambda: ticks.append((clock.now, statuses(repository, events)))
+    scheduler.run_forever(should_stop=lambda: clock.now > BASE + timedelta(hours=3) or len(ticks) > 10)
+
+    scheduled, ongoing, completed = EventStatus.scheduled, EventStatus.ongoing, EventStatus.completed
+    assert ticks == [
+        (BASE, {'early': scheduled, 'late': scheduled}),
+        (BASE + timedelta(minutes=30), {'early': ongoing, 'late': scheduled}),
+        (BASE + timedelta(hours=1), {'early': ongoing, 'late': ongoing}),
+        (BASE + timedelta(hours=2), {'early': ongoing, 'late': completed}),
+        (BASE + timedelta(hours=3), {'early': completed, 'late': completed}),
+    ]
+
+
+def test_schedule_is_rebuilt_after_an_edit(scheduler_setup):
+    repository, scheduler, clock, events = scheduler_setup
+    scheduler.run_pending()
+
+    # Sends event_schedule_changed, as the admin event form does.
+    repository.update(events['late'], start_time=BASE + timedelta(minutes=10))
+    clock.now = BASE + timedelta(minutes=10)
+    scheduler.run_pending()
+
+    assert statuses(repository, events)['late'] == EventStatus.ongoing
+    assert (BASE + timedelta(hours=1), events['late']) not in scheduler.pending
+    assert scheduler.pending[0] == (BASE + timedelta(minutes=30), events['early'])
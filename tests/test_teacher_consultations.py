@@ -0,0 +1,42 @@
+import re
+
+import pytest
+
+from app.cli.perf import get_isolated, logged_in_client
+from app.services import availability_registry
+
+NEXT_PAGE = re.compile(r'href="(/teacher/consultations\?cursor=[^"]+)"')
+
+
+@pytest.fixture
+def one_event_per_page(app):
+    saved = app.config.get('EVENTS_PAGE_SIZE')
+    app.config['EVENTS_PAGE_SIZE'] = 1
+    yield
+    app.config['EVENTS_PAGE_SIZE'] = saved
+
+
+def test_consultations_are_paginated(app, school, one_event_per_page, monkeypatch):
+    looked_up = []
+    get_many = availability_registry.get_many
+
+    def recording_get_many(events, slot_repository):
+        events = list(events)
+        looked_up.append([event.event_id for event in events])
+        return get_many(events, slot_repository)
+
+    monkeypatch.setattr(availability_registry, 'get_many', recording_get_many)
+
+    # The first teacher takes part in both of the school's events.
+    with app.app_context():
+        client = logged_in_client(school['teacher_ids'][0])
+        first = get_isolated(client, '/teacher/consultations').get_data(as_text=True)
+        next_page = NEXT_PAGE.search(first)
+        assert next_page is not None
+        second = get_isolated(client, next_page.group(1).replace('&amp;', '&')).get_data(as_text=True)
+
+    assert first.count('<article class="teacher-consultations__event">') == 1
+    assert second.count('<article class="teacher-consultations__event">') == 1
+    assert NEXT_PAGE.search(second) is None
+    assert [len(event_ids) for event_ids in looked_up] == [1, 1]
+    assert looked_up[0] != looked_up[1]
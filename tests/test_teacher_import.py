@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+
+import pytest
+from openpyxl import Workbook
+
+from app.cli.perf import get_isolated, logged_in_client
+from app.models import ImportJobStatus, db
+from app.repositories import get_repository
+from app.services.import_jobs import run_import_job
+
+
+@pytest.fixture
+def import_job(app, school, tmp_path):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(['email', 'full_name'])
+    sheet.append(['new.teacher@example.com', 'Новикова Нина Николаевна'])
+    path = tmp_path / 'teachers.xlsx'
+    workbook.save(path)
+
+    with app.app_context():
+        job_repository = get_repository('import_jobs')
+        job = job_repository.create(school_id=school['school_id'], file_path=str(path), created_by=school['admin_id'])
+        run_import_job(job, job_repository=job_repository, user_repository=get_repository('users'))
+        return job.job_id
+
+
+def test_setup_links_survive_repeated_polls(app, school, import_job):
+    with app.app_context():
+        admin = logged_in_client(school['admin_id'])
+        polls = [get_isolated(admin, f'/teachers/import/{import_job}').get_json() for _ in range(2)]
+
+    for payload in polls:
+        assert payload['success'] is True
+        assert [teacher['email'] for teacher in payload['teachers']] == ['new.teacher@example.com']
+        assert '/auth/password/' in payload['teachers'][0]['link']
+
+
+def test_imported_teachers_get_no_usable_password(app, school, import_job):
+    with app.app_context():
+        teacher = get_repository('users').get_by_email('new.teacher@example.com')
+        assert teacher.password_hash.startswith('!')
+        assert not teacher.check_password('')
+
+
+def test_admin_can_reissue_a_setup_link(app, school):
+    teacher_id = school['teacher_ids'][0]
+    with app.app_context():
+        admin = logged_in_client(school['admin_id'])
+        response = admin.post(f'/teachers/{teacher_id}/password-link')
+        missing = admin.post('/teachers/999999/password-link')
+
+    assert response.get_json()['link'].count('/auth/password/') == 1
+    assert missing.status_code == 404
+
+
+def test_only_silent_jobs_are_requeued(app, school):
+    with app.app_context():
+        job_repository = get_repository('import_jobs')
+        busy = job_repository.create(school_id=school['school_id'], file_path='busy.xlsx')
+        silent = job_repository.create(school_id=school['school_id'], file_path='silent.xlsx')
+        for job, last_beat in ((busy, timedelta(minutes=1)), (silent, timedelta(minutes=45))):
+            job.status = ImportJobStatus.running
+            job.started_at = datetime.now() - timedelta(hours=2)
+            job.heartbeat_at = datetime.now() - last_beat
+        db.session.commit()
+
+        assert job_repository.requeue_stale(timedelta(minutes=30)) == 1
+        db.session.expire_all()
+        assert job_repository.get_by_id(busy.job_id).status == ImportJobStatus.running
+        assert job_repository.get_by_id(silent.job_id).status == ImportJobStatus.queued